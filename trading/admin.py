@@ -1,5 +1,3 @@
-import asyncio
-
 from django import forms
 from django.contrib import admin
 from django.contrib import messages
@@ -9,9 +7,15 @@ from .models.wallet import Wallet
 from .models.provider_configs import BSCConfig
 from .models.config import AutoTradingConfig
 from .models.currency import Currency
+from .models.deployer import Deployer
+from .models.exposure import Exposure
 from .models.telegram import TelegramUser
 from .models.trade import Trade
-from .services.bsc_trade import BSCTradingService
+from .models.listing_features import ListingFeatures
+from .models.token_analysis import TokenAnalysis
+from .models.token_security import TokenSecurity
+from .models.transfer_index import TransferIndex
+from .tasks.trading import buy_currencies, liquidate_trades
 
 
 ACTION_CHECKBOX_NAME = "select_across"
@@ -32,6 +36,28 @@ class AutoTradingConfigAdmin(admin.ModelAdmin):
         ("Transaction Settings", {
             "fields": ("slippage_percent", "gas_limit")
         }),
+        ("Pre-signed Exits", {
+            "fields": (
+                "presign_exits", "presign_slippage_percent", "presign_reserve_threshold_percent",
+                "presign_deadline_seconds"
+            )
+        }),
+        ("Rug Detection", {
+            "fields": ("rug_liquidity_removal_percent", "rug_deployer_transfer_percent")
+        }),
+        ("Listing Score", {
+            "fields": ("min_listing_score", "listing_score_weights")
+        }),
+        ("Deployer Reputation", {
+            "fields": ("max_deployer_bad_tokens",)
+        }),
+        ("Listing Admission", {
+            "fields": ("deep_analysis_policy",)
+        }),
+        ("Data Retention", {
+            "fields": ("retention_days", "archive_old_data", "cleanup_chunk_size", "cleanup_time_budget_seconds",
+                       "price_tick_retention_hours", "price_candle_retention_days")
+        }),
         ("General", {
             "fields": ("trading_enabled",)
         })
@@ -53,7 +79,8 @@ class SellTradeForm(forms.Form):
             ("MANUAL", "Manual sell"),
             ("DROP_FROM_PEAK", "Price dropped from peak"),
             ("BELOW_ENTRY", "Price below entry"),
-            ("PROFIT_TARGET", "Profit target reached")
+            ("PROFIT_TARGET", "Profit target reached"),
+            ("RUG_DETECTED", "Liquidity removal or deployer dump")
         ],
         label="Sell Reason"
     )
@@ -76,8 +103,11 @@ class TradeAdmin(admin.ModelAdmin):
     ]
     list_filter = ["status", "sell_reason", "buy_timestamp"]
     search_fields = ["currency__symbol", "currency__address"]
-    readonly_fields = ["profit_loss", "profit_loss_percentage"]
-    actions = ["sell_trades"]
+    readonly_fields = [
+        "profit_loss", "profit_loss_percentage", "presigned_sell_tx", "presigned_sell_nonce",
+        "presigned_sell_deadline", "presigned_sell_expected_out", "presigned_sell_price", "presigned_sell_updated_at"
+    ]
+    actions = ["sell_trades", "liquidate_selected"]
 
     def sell_trades(self, request, queryset):
         """Action to sell selected trades"""
@@ -88,54 +118,19 @@ class TradeAdmin(admin.ModelAdmin):
 
             if form.is_valid():
                 reason = form.cleaned_data["reason"]
-
-                success_count = 0
-                error_count = 0
-
-                for trade in queryset:
-                    if trade.status != "BOUGHT":
-                        self.message_user(
-                            request,
-                            f"Trade {trade.id} is not in BOUGHT status",
-                            messages.WARNING
-                        )
-                        continue
-
-                    try:
-                        trader = BSCTradingService(trade.currency.address)
-
-                        # Run sell in sync context
-                        asyncio.get_event_loop().run_until_complete(
-                            trader.sell(trade.buy_amount)
-                        )
-                        trade.sell_reason = reason
-                        trade.save()
-                        success_count += 1
-                    except Exception as e:
-                        error_count += 1
-                        self.message_user(
-                            request,
-                            f"Error selling trade {trade.id}: {str(e)}",
-                            messages.ERROR
-                        )
-
-                if success_count:
-                    self.message_user(
-                        request,
-                        f"Successfully sold {success_count} trades",
-                        messages.SUCCESS
-                    )
-                if error_count:
-                    self.message_user(
-                        request,
-                        f"Failed to sell {error_count} trades",
-                        messages.ERROR
-                    )
+                trade_ids = list(queryset.filter(status="BOUGHT").values_list("id", flat=True))
+                skipped = queryset.count() - len(trade_ids)
+                if skipped:
+                    self.message_user(request, f"{skipped} trades are not in BOUGHT status", messages.WARNING)
+                if trade_ids:
+                    # One job sells all selected trades in a single batch
+                    liquidate_trades.send(trade_ids, reason)
+                    self.message_user(request, f"Sell of {len(trade_ids)} trades queued", messages.SUCCESS)
                 return None
 
         if not form:
             form = SellTradeForm(initial={
-                "_selected_action": request.POST.getlist()
+                "_selected_action": request.POST.getlist(ACTION_CHECKBOX_NAME)
             })
 
         return render(
@@ -149,15 +144,30 @@ class TradeAdmin(admin.ModelAdmin):
         )
     sell_trades.short_description = "Sell selected trades"
 
+    def liquidate_selected(self, request, queryset):
+        """Action to sell selected trades in one batch"""
+        trade_ids = list(queryset.filter(status="BOUGHT").values_list("id", flat=True))
+        if not trade_ids:
+            self.message_user(request, "No trades in BOUGHT status selected", messages.WARNING)
+            return
+
+        liquidate_trades.send(trade_ids, "MANUAL")
+        self.message_user(
+            request,
+            f"Batch sell of {len(trade_ids)} trades queued",
+            messages.SUCCESS
+        )
+    liquidate_selected.short_description = "Sell selected trades in one batch"
+
 @admin.register(Currency)
 class CurrencyAdmin(admin.ModelAdmin):
     list_display = [
         "symbol", "address", "status", "price_first_seen",
         "current_price", "created_at"
     ]
-    list_filter = ["status", "created_at"]
+    list_filter = ["status", "rejection_category", "created_at"]
     search_fields = ["symbol", "address"]
-    readonly_fields = ["created_at", "updated_at"]
+    readonly_fields = ["created_at", "updated_at", "deployers"]
     actions = ["buy_currencies"]
 
     def buy_currencies(self, request, queryset):
@@ -169,46 +179,18 @@ class CurrencyAdmin(admin.ModelAdmin):
 
             if form.is_valid():
                 amount = form.cleaned_data["amount"]
-
-                success_count = 0
-                error_count = 0
-
-                for currency in queryset:
-                    trader = BSCTradingService(currency.address)
-                    if currency.status not in ["NEW", "ANALYZING"]:
-                        self.message_user(
-                            request,
-                            f"Currency {currency.symbol} is not in NEW or ANALYZING status",
-                            messages.WARNING
-                        )
-                        continue
-
-                    try:
-                        # Run buy in sync context
-                        asyncio.get_event_loop().run_until_complete(
-                            trader.buy(amount=amount)
-                        )
-                        success_count += 1
-                    except Exception as e:
-                        error_count += 1
-                        self.message_user(
-                            request,
-                            f"Error buying currency {currency.symbol}: {str(e)}",
-                            messages.ERROR
-                        )
-
-                if success_count:
-                    self.message_user(
-                        request,
-                        f"Successfully bought {success_count} currencies",
-                        messages.SUCCESS
-                    )
-                if error_count:
+                currency_ids = list(queryset.buyable().values_list("id", flat=True))
+                skipped = queryset.count() - len(currency_ids)
+                if skipped:
                     self.message_user(
                         request,
-                        f"Failed to buy {error_count} currencies",
-                        messages.ERROR
+                        f"{skipped} currencies are not in NEW or ANALYZING status",
+                        messages.WARNING
                     )
+                if currency_ids:
+                    # One job runs all buys, within the trading limits
+                    buy_currencies.send(currency_ids, str(amount))
+                    self.message_user(request, f"Buy of {len(currency_ids)} currencies queued", messages.SUCCESS)
                 return None
 
         if not form:
@@ -278,4 +260,75 @@ class BSCConfigAdmin(admin.ModelAdmin):
 
     def has_delete_permission(self, request, obj=None):
         """Prevent deleting the configuration"""
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(TokenSecurity)
+class TokenSecurityAdmin(admin.ModelAdmin):
+    list_display = ["token_address", "chain_id", "static_updated_at", "dynamic_updated_at"]
+    list_filter = ["chain_id"]
+    search_fields = ["token_address"]
+
+
+@admin.register(TransferIndex)
+class TransferIndexAdmin(admin.ModelAdmin):
+    list_display = ["currency", "last_block", "transfer_count", "holder_count", "truncated", "updated_at"]
+    search_fields = ["currency__symbol", "currency__address"]
+    exclude = ["balances"]
+    readonly_fields = ["from_block", "last_block", "transfer_count", "holder_count", "truncated"]
+
+
+@admin.register(ListingFeatures)
+class ListingFeaturesAdmin(admin.ModelAdmin):
+    list_display = ["token_address", "currency", "score", "version", "updated_at"]
+    search_fields = ["token_address", "currency__symbol"]
+    exclude = ["vector"]
+    readonly_fields = ["token_address", "currency", "score", "version"]
+
+
+@admin.register(Deployer)
+class DeployerAdmin(admin.ModelAdmin):
+    list_display = ["address", "tokens_count", "rejected_count", "loss_count", "rug_count", "profit_count", "blocked"]
+    list_filter = ["blocked"]
+    list_editable = ["blocked"]
+    search_fields = ["address"]
+    readonly_fields = ["tokens_count", "rejected_count", "loss_count", "rug_count", "profit_count"]
+
+
+@admin.register(Exposure)
+class ExposureAdmin(admin.ModelAdmin):
+    list_display = ["open_count", "invested", "reserved_count", "reserved_amount", "updated_at"]
+    readonly_fields = ["open_count", "invested", "reserved_count", "reserved_amount", "updated_at"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class SellTaxFilter(admin.SimpleListFilter):
+    title = "sell tax"
+    parameter_name = "sell_tax"
+
+    def lookups(self, request, model_admin):
+        return [("0", "No tax"), ("10", "Above 10%"), ("50", "Above 50%")]
+
+    def queryset(self, request, queryset):
+        if self.value() == "0":
+            return queryset.filter(sell_tax=0)
+        if self.value() in ("10", "50"):
+            return queryset.filter(sell_tax__gt=int(self.value()))
+        return queryset
+
+
+@admin.register(TokenAnalysis)
+class TokenAnalysisAdmin(admin.ModelAdmin):
+    list_display = ["currency", "buy_tax", "sell_tax", "liquidity", "holder_count", "score", "is_honeypot", "updated_at"]
+    list_filter = [
+        "currency__status", SellTaxFilter, "is_honeypot", "is_open_source",
+        "is_proxy", "is_blacklisted", "cannot_sell_all", "transfer_pausable"
+    ]
+    search_fields = ["currency__symbol", "currency__address"]
+    list_select_related = ["currency"]
+    readonly_fields = ["currency", "created_at", "updated_at"]
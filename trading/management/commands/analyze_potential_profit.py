@@ -6,6 +6,10 @@ from datetime import datetime, timedelta
 import pandas as pd
 from typing import List, Dict
 import logging
+import numpy as np
+from ...models.listing_features import ListingFeatures
+from ...services.exit_rules import ExitRuleEvaluator
+from ...services.listing_score import ListingScorer, build_features
 from ...services.pancakeswap import PancakeSwapMonitor
 from ...services.price_service import PriceService
 from typing import Optional
@@ -59,13 +63,15 @@ class TradingAnalyzer:
         self.profit_target = Decimal(3)
 
         self.results = []
+        self.features = []
+        self.score_model = async_to_sync(ListingScorer().get_model)()
 
     def run_analysis(self):
         """Run full analysis process"""
         try:
             print("Starting trading analysis...")
 
-            # Get historical listings
+            # Get historical listings, their security is loaded in batched requests and later checks read the cache
             listings = self._get_historical_listings()
             print(f"Found {len(listings)} listings to analyze")
 
@@ -73,6 +79,7 @@ class TradingAnalyzer:
             for listing in listings:
                 result = self._analyze_listing(listing)
                 if result:
+                    self.features.append(result.pop('features'))
                     self.results.append(result)
 
             # Generate and save report
@@ -138,10 +145,12 @@ class TradingAnalyzer:
             if not prices:
                 return None
 
-            # Check security requirements
+            # Check security requirements, unsafe listings are kept for score threshold evaluation
             security = self._check_token_security(listing['token_address'])
-            if not security['is_safe']:
-                return None
+
+            analysis = dict(listing.get('security') or {})
+            analysis.setdefault('liquidity', listing['initial_liquidity'])
+            features = build_features(analysis)
 
             # Simulate trading
             entry_price = prices[0]  # Initial price
@@ -155,23 +164,11 @@ class TradingAnalyzer:
                 if price > peak_price:
                     peak_price = price
 
-                # Check exit conditions
-                drop_from_peak = (peak_price - price) / peak_price * 100
-                price_change = (price - entry_price) / entry_price * 100
-
-                if drop_from_peak >= self.max_price_drop:
+                # Check exit conditions, same rules as live trading
+                reason = ExitRuleEvaluator.reason(entry_price, price, peak_price, self.max_price_drop, self.profit_target)
+                if reason:
                     exit_price = price
-                    exit_reason = 'DROP_FROM_PEAK'
-                    holding_time = i
-                    break
-                elif price < entry_price:
-                    exit_price = price
-                    exit_reason = 'BELOW_ENTRY'
-                    holding_time = i
-                    break
-                elif price >= (entry_price * self.profit_target):
-                    exit_price = price
-                    exit_reason = 'PROFIT_TARGET'
+                    exit_reason = reason
                     holding_time = i
                     break
 
@@ -194,7 +191,8 @@ class TradingAnalyzer:
                 'profit_usdt': profit_usdt,
                 'profit_percentage': profit_percentage,
                 'would_trade': security['is_safe'],
-                'security_issues': security['issues']
+                'security_issues': security['issues'],
+                'features': features
             }
 
         except Exception as e:
@@ -248,6 +246,8 @@ class TradingAnalyzer:
         try:
             # Convert results to DataFrame
             df = pd.DataFrame(self.results)
+            if self.features:
+                df['score'] = self.score_model.score(self._feature_matrix(df))
 
             # Calculate statistics
             if df.to_dict():
@@ -270,12 +270,56 @@ class TradingAnalyzer:
                     print(f"{key}: {value}")
 
                 print(f"\nDetailed results saved to {self.output_file}")
+
+                self._evaluate_score_thresholds(df)
             else:
                 print("Error generating report: no tokens")
         except Exception as e:
             raise e
             print(f"Error generating report: {str(e)}")
 
+    def _feature_matrix(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Feature vectors of the analyzed listings
+
+        Vectors stored by the live ScoreFilter also hold deployer history,
+        they are used when present and left untouched, listings never seen
+        live fall back to the vector built from the backtest analysis
+        """
+        addresses = [address.lower() for address in df['token_address']]
+        stored_addresses, matrix = ListingScorer.load_matrix(
+            ListingFeatures.objects.filter(token_address__in=addresses)
+        )
+        stored = dict(zip(stored_addresses, matrix))
+        df['stored_features'] = [address in stored for address in addresses]
+        return np.vstack([
+            stored.get(address, features) for address, features in zip(addresses, self.features)
+        ])
+
+    @staticmethod
+    def _evaluate_score_thresholds(df: pd.DataFrame, steps: int = 10):
+        """Trades, profit and win rate when buying only listings scoring at least each threshold"""
+        if 'score' not in df or df.empty:
+            return
+
+        order = np.argsort(-df['score'].to_numpy())
+        scores = df['score'].to_numpy()[order]
+        profits = df['profit_usdt'].to_numpy(dtype=float)[order]
+
+        # Prefix sums over listings sorted by score answer every threshold at once
+        trades = np.arange(1, len(scores) + 1)
+        total_profit = np.cumsum(profits)
+        wins = np.cumsum(profits > 0)
+
+        print("\nScore Thresholds:")
+        print(f"{'Min score':>12} {'Trades':>7} {'Profit':>12} {'Avg':>10} {'Win %':>7}")
+        for threshold in np.unique(np.quantile(scores, np.linspace(0, 1, steps + 1)))[::-1]:
+            last = np.searchsorted(-scores, -threshold, side='right') - 1
+            print(
+                f"{threshold:>12.2f} {trades[last]:>7} {total_profit[last]:>12.2f} "
+                f"{total_profit[last] / trades[last]:>10.2f} {wins[last] / trades[last] * 100:>6.1f}%"
+            )
+
     def _get_block_number(self, timestamp: datetime) -> int:
         async_to_sync(self.monitor.get_configs)()
         """Get approximate block number for timestamp"""
@@ -1,6 +1,8 @@
+from asgiref.sync import async_to_sync
 from django.core.management.base import BaseCommand
 
 from trading.models.trade import Trade
+from trading.services.price_history import PriceHistory
 
 
 class Command(BaseCommand):
@@ -19,6 +21,12 @@ class Command(BaseCommand):
             default='trading_analysis.csv',
             help='Output file path'
         )
+        parser.add_argument(
+            '--max-sell-tax',
+            type=int,
+            default=10,
+            help='Sell tax percent above which trades are summarized separately'
+        )
 
     def handle(self, *args, **options):
         import csv
@@ -33,7 +41,7 @@ class Command(BaseCommand):
         # Get trades
         trades = Trade.objects.filter(
             buy_timestamp__gte=start_date
-        ).select_related('currency')
+        ).select_related('currency__analysis')
 
         # Calculate statistics
         total_trades = trades.count()
@@ -67,6 +75,24 @@ class Command(BaseCommand):
         self.stdout.write(f'Total Profit: ${total_profit:.2f} USDT')
         self.stdout.write(f'Average Profit: {avg_profit:.2f}%')
 
+        taxed = trades.filter(status='SOLD', currency__analysis__sell_tax__gt=options['max_sell_tax']).aggregate(
+            count=Count('id'),
+            total=Sum('profit_loss'),
+            avg=Avg('profit_loss_percentage')
+        )
+        self.stdout.write(
+            f'Sell Tax Above {options["max_sell_tax"]}%: {taxed["count"]} trades, '
+            f'${taxed["total"] or 0:.2f} USDT, {taxed["avg"] or 0:.2f}% average'
+        )
+
+        sold_trades = list(trades.filter(status='SOLD'))
+        paths = async_to_sync(PriceHistory().trade_paths)(sold_trades)
+        if paths:
+            drawdowns = [path['max_drawdown_percent'] for path in paths.values()]
+            peak_hours = [path['time_to_peak'].total_seconds() / 3600 for path in paths.values()]
+            self.stdout.write(f'Average Max Drawdown: {sum(drawdowns) / len(drawdowns):.2f}% ({len(paths)} trades with price history)')
+            self.stdout.write(f'Average Time to Peak: {sum(peak_hours) / len(peak_hours):.2f} hours')
+
         # Export detailed data
         with open(options['output'], 'w', newline='') as csvfile:
             writer = csv.writer(csvfile)
@@ -79,11 +105,19 @@ class Command(BaseCommand):
                 'Profit/Loss',
                 'Profit %',
                 'Hold Time (hours)',
-                'Sell Reason'
+                'Sell Reason',
+                'Buy Tax',
+                'Sell Tax',
+                'Liquidity',
+                'Score',
+                'Max Drawdown %',
+                'Time to Peak (hours)'
             ])
 
-            for trade in trades.filter(status='SOLD'):
+            for trade in sold_trades:
                 hold_time = (trade.sell_timestamp - trade.buy_timestamp).total_seconds() / 3600
+                analysis = getattr(trade.currency, 'analysis', None)
+                path = paths.get(trade.id)
 
                 writer.writerow([
                     trade.currency.symbol,
@@ -94,7 +128,13 @@ class Command(BaseCommand):
                     trade.profit_loss,
                     trade.profit_loss_percentage,
                     round(hold_time, 2),
-                    trade.get_sell_reason_display()
+                    trade.get_sell_reason_display(),
+                    analysis.buy_tax if analysis else '',
+                    analysis.sell_tax if analysis else '',
+                    analysis.liquidity if analysis else '',
+                    analysis.score if analysis else '',
+                    round(path['max_drawdown_percent'], 2) if path else '',
+                    round(path['time_to_peak'].total_seconds() / 3600, 2) if path else ''
                 ])
 
         self.stdout.write(f'\nDetailed analysis exported to {options["output"]}')
@@ -0,0 +1,173 @@
+import json
+import random
+import statistics
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from trading.models.currency import Currency
+from trading.models.trade import Trade
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time hot Trade/Currency queries on synthetic rows with and without their indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--currencies',
+            type=int,
+            default=100000,
+            help='Number of synthetic currencies'
+        )
+        parser.add_argument(
+            '--trades',
+            type=int,
+            default=50000,
+            help='Number of synthetic trades'
+        )
+        parser.add_argument(
+            '--open-trades',
+            type=int,
+            default=20,
+            help='How many of the trades are still open'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Runs per query, the median execution time is reported'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for synthetic rows'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.ERROR('Query plans are only compared on PostgreSQL'))
+            return
+
+        # Everything runs in one transaction that is rolled back, the database is left as it was
+        try:
+            with transaction.atomic():
+                self.seed(options)
+                with_indexes = self.measure(options['repeat'])
+                self.drop_indexes()
+                without_indexes = self.measure(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(f'\n{"Query":<22} {"No index":>12} {"Indexed":>12} {"Speedup":>8}  Plan')
+        for name, (indexed_ms, indexed_plan) in with_indexes.items():
+            plain_ms, plain_plan = without_indexes[name]
+            speedup = plain_ms / indexed_ms if indexed_ms else 0
+            self.stdout.write(
+                f'{name:<22} {plain_ms:>9.3f} ms {indexed_ms:>9.3f} ms {speedup:>7.1f}x  '
+                f'{plain_plan} -> {indexed_plan}'
+            )
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        closed = ['SOLD', 'REJECTED', 'ERROR']
+
+        currencies = [
+            Currency(
+                symbol=f'BENCH{i}',
+                # Outside the range of real token addresses used by the bot
+                address=f'0x{0xbe0c:04x}{i:036x}',
+                status='NEW' if i % 500 == 0 else rng.choice(closed),
+                price_first_seen=Decimal('0.001'),
+                price_peak=Decimal('0.001'),
+                current_price=Decimal('0.001')
+            )
+            for i in range(options['currencies'])
+        ]
+        Currency.objects.bulk_create(currencies, batch_size=5000)
+        currency_ids = [currency.id for currency in currencies]
+
+        trades = []
+        for i in range(options['trades']):
+            bought = now - timedelta(minutes=rng.randint(0, 90 * 24 * 60))
+            is_open = i < options['open_trades']
+            trades.append(Trade(
+                currency_id=currency_ids[i % len(currency_ids)],
+                status='BOUGHT' if is_open else 'SOLD',
+                entry_price=Decimal('0.001'),
+                buy_amount=Decimal('30'),
+                buy_timestamp=bought,
+                sell_timestamp=None if is_open else bought + timedelta(minutes=rng.randint(1, 600))
+            ))
+        Trade.objects.bulk_create(trades, batch_size=5000)
+
+        with connection.cursor() as cursor:
+            # auto_now gives every synthetic row the same updated_at, spread them over 90 days
+            cursor.execute(
+                f"UPDATE {Currency._meta.db_table} SET updated_at = now() - random() * interval '90 days' "
+                f"WHERE id >= %s",
+                [min(currency_ids)]
+            )
+            cursor.execute(f"ANALYZE {Currency._meta.db_table}")
+            cursor.execute(f"ANALYZE {Trade._meta.db_table}")
+
+        self.stdout.write(f'Seeded {len(currencies)} currencies and {len(trades)} trades')
+
+    @staticmethod
+    def queries():
+        cutoff = timezone.now() - timedelta(days=30)
+        symbol = 'BENCH12345'
+        return {
+            'open trades': Trade.objects.filter(status='BOUGHT'),
+            'open trade of symbol': Trade.objects.filter(currency__symbol=symbol, status='BOUGHT'),
+            'currency by symbol': Currency.objects.filter(symbol=symbol)[:1],
+            'trades since': Trade.objects.filter(buy_timestamp__gte=timezone.now() - timedelta(days=7)),
+            'cleanup currencies': Currency.objects.filter(
+                status__in=['SOLD', 'REJECTED', 'ERROR'],
+                updated_at__lt=cutoff
+            ).values('id'),
+            'cleanup trades': Trade.objects.filter(status='SOLD', sell_timestamp__lt=cutoff).values('id'),
+            'active currencies': Currency.objects.filter(status__in=['NEW', 'ANALYZING', 'BOUGHT']).values('id'),
+        }
+
+    def measure(self, repeat: int) -> dict:
+        """Median execution time and top plan node of every query"""
+        results = {}
+        for name, queryset in self.queries().items():
+            timings = []
+            plan = None
+            for _ in range(repeat):
+                explained = json.loads(queryset.explain(analyze=True, format='json'))[0]
+                timings.append(explained['Execution Time'])
+                plan = self._scan(explained['Plan'])
+            results[name] = (statistics.median(timings), plan)
+        return results
+
+    @classmethod
+    def _scan(cls, node: dict) -> str:
+        """First scan node of a plan, e.g. Index Scan on trade_open_idx"""
+        if node['Node Type'].endswith('Scan') and node['Node Type'] != 'Bitmap Heap Scan':
+            index = node.get('Index Name')
+            return f"{node['Node Type']}{f' {index}' if index else ''}"
+        for child in node.get('Plans', []):
+            return cls._scan(child)
+        return node['Node Type']
+
+    @staticmethod
+    def drop_indexes():
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for model in (Currency, Trade):
+                for index in model._meta.indexes:
+                    schema_editor.remove_index(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Currency._meta.db_table}")
+            cursor.execute(f"ANALYZE {Trade._meta.db_table}")
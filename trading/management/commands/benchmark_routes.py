@@ -0,0 +1,73 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from web3 import AsyncWeb3
+
+from trading.services.route_finder import RouteFinder
+
+
+class Command(BaseCommand):
+    help = 'Benchmark route finder on a synthetic pair graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--known-tokens',
+            type=int,
+            default=6,
+            help='Number of known (intermediate) tokens in the graph'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=10000,
+            help='Number of best_route calls to time'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for reserves'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        finder = RouteFinder()
+
+        def address(i):
+            return AsyncWeb3.to_checksum_address(f"0x{i:040x}")
+
+        token = address(1)
+        known = [address(i + 2) for i in range(options['known_tokens'])]
+        native = known[0]
+
+        for i, a in enumerate(known):
+            finder.set_pair(token, a, rng.randint(10 ** 20, 10 ** 26), rng.randint(10 ** 18, 10 ** 24))
+            for b in known[i + 1:]:
+                finder.set_pair(a, b, rng.randint(10 ** 22, 10 ** 27), rng.randint(10 ** 22, 10 ** 27))
+
+        amount_in = 10 ** 18
+        gas_price = 3 * 10 ** 9
+        timings = []
+        route = None
+        for _ in range(options['iterations']):
+            started = time.perf_counter()
+            route = finder.best_route(native, token, amount_in, gas_price=gas_price, native_token=native)
+            timings.append(time.perf_counter() - started)
+
+        timings.sort()
+        mean_us = statistics.mean(timings) * 1e6
+        p99_us = timings[int(len(timings) * 0.99) - 1] * 1e6
+
+        self.stdout.write('\nRoute Finder Benchmark:')
+        self.stdout.write(f'Known tokens: {len(known)}')
+        self.stdout.write(f'Iterations: {len(timings)}')
+        self.stdout.write(f'Best path hops: {len(route["path"]) - 1}')
+        self.stdout.write(f'Mean: {mean_us:.1f} us')
+        self.stdout.write(f'P99: {p99_us:.1f} us')
+
+        if p99_us < 1000:
+            self.stdout.write(self.style.SUCCESS('Route finding is under 1 ms'))
+        else:
+            self.stdout.write(self.style.WARNING('Route finding exceeds 1 ms'))
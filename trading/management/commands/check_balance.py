@@ -2,9 +2,9 @@ from asgiref.sync import async_to_sync
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db.models import Sum
 
 from trading.models.config import AutoTradingConfig
+from trading.models.exposure import Exposure
 from trading.models.trade import Trade
 from trading.services.binance_client import BinanceClient
 
@@ -12,24 +12,25 @@ from trading.services.binance_client import BinanceClient
 class Command(BaseCommand):
     help = 'Check trading balances and limits'
 
+    @staticmethod
+    async def snapshot():
+        """Config, exposure ledger and open trades with their currencies"""
+        config = await AutoTradingConfig.get_config()
+        exposure = await Exposure.get()
+        trades = [trade async for trade in Trade.objects.open().select_related('currency')]
+        return config, exposure, trades
+
     def handle(self, *args, **options):
-        config = async_to_sync(AutoTradingConfig.get_config)()
+        config, exposure, active_trades = async_to_sync(self.snapshot)()
         binance = BinanceClient(settings.BINANCE_API_KEY, settings.BINANCE_API_SECRET)
 
         # Get USDT balance
         balance = binance.get_usdt_balance()
         self.stdout.write(f'USDT Balance: ${balance:.2f}')
 
-        # Get active trades
-        active_trades = Trade.objects.filter(status='BOUGHT')
-        active_count = active_trades.count()
-
-        self.stdout.write(f'\nActive Trades: {active_count}/{config.max_active_trades}')
-
-        total_invested = active_trades.aggregate(
-            total=Sum('buy_amount')
-        )['total'] or 0
+        self.stdout.write(f'\nActive Trades: {exposure.open_count}/{config.max_active_trades}')
 
+        total_invested = exposure.invested
         max_investment = config.trade_amount * config.max_active_trades
 
         self.stdout.write(f'Total Invested: ${total_invested:.2f}')
@@ -37,7 +38,7 @@ class Command(BaseCommand):
         self.stdout.write(f'Available for Trading: ${max_investment - total_invested:.2f}')
 
         # Show active trades
-        if active_count > 0:
+        if active_trades:
             self.stdout.write('\nActive Trade Details:')
             for trade in active_trades:
                 profit = (trade.currency.current_price - trade.entry_price) / trade.entry_price * 100
@@ -45,4 +46,4 @@ class Command(BaseCommand):
                     f'{trade.currency.symbol}: '
                     f'${trade.buy_amount:.2f} invested, '
                     f'{profit:+.2f}% P/L'
-                )
\ No newline at end of file
+                )
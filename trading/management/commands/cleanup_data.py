@@ -0,0 +1,41 @@
+from asgiref.sync import async_to_sync
+
+from django.core.management.base import BaseCommand
+
+from trading.services.data_cleaner import DataCleaner
+
+
+class Command(BaseCommand):
+    help = 'Delete old trades, currencies and price candles in chunks, archiving them first if configured'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archive',
+            action='store_true',
+            default=None,
+            help='Archive rows before deleting them'
+        )
+        parser.add_argument(
+            '--no-archive',
+            action='store_false',
+            dest='archive',
+            help='Delete without archiving'
+        )
+        parser.add_argument(
+            '--budget',
+            type=float,
+            help='Time budget in seconds, defaults to the configured one'
+        )
+
+    def handle(self, *args, **options):
+        report = async_to_sync(DataCleaner(options['archive'], options['budget']).run)()
+
+        self.stdout.write(f'\n{"Table":<12} {"Deleted":>9} {"Seconds":>9} {"Rows/s":>9}')
+        for name, value in report.items():
+            self.stdout.write(
+                f'{name:<12} {value["deleted"]:>9} {value["seconds"]:>9.1f} {value["rows_per_second"]:>9.0f}'
+            )
+        if all(value['finished'] for value in report.values()):
+            self.stdout.write(self.style.SUCCESS('All expired rows deleted'))
+        else:
+            self.stdout.write(self.style.WARNING('Time budget spent, run again to continue'))
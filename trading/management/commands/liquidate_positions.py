@@ -0,0 +1,41 @@
+from asgiref.sync import async_to_sync
+
+from django.core.management.base import BaseCommand
+
+from trading.models.trade import Trade
+from trading.services.batch_liquidator import BatchLiquidator
+
+
+class Command(BaseCommand):
+    help = 'Sell all open trades in one batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'trade_ids',
+            nargs='*',
+            type=int,
+            help='Trades to sell, all open trades by default'
+        )
+        parser.add_argument(
+            '--reason',
+            default='MANUAL',
+            choices=[reason for reason, _ in Trade.SELL_REASON_CHOICES],
+            help='Sell reason stored on the trades'
+        )
+
+    def handle(self, *args, **options):
+        summary = async_to_sync(BatchLiquidator().liquidate)(options['trade_ids'] or None, options['reason'])
+
+        for trade in summary['sold']:
+            self.stdout.write(
+                f'{trade.currency.symbol}: sold for {trade.sell_amount:.8f}, '
+                f'P/L {trade.profit_loss_percentage:.2f}%'
+            )
+
+        self.stdout.write(f'\nSold: {len(summary["sold"])}')
+        if summary['skipped']:
+            self.stdout.write(self.style.WARNING(f'Skipped: {summary["skipped"]}'))
+        if summary['failed']:
+            self.stdout.write(self.style.ERROR(f'Failed: {summary["failed"]}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Batch liquidation completed'))
@@ -0,0 +1,34 @@
+from asgiref.sync import async_to_sync
+
+from django.core.management.base import BaseCommand
+
+from trading.services.listing_filters import ListingFilterPipeline
+
+
+class Command(BaseCommand):
+    help = 'Show rejection rate and latency of listing filters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Clear collected stats'
+        )
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            async_to_sync(ListingFilterPipeline.reset_stats)()
+            self.stdout.write(self.style.SUCCESS('Listing filter stats cleared'))
+            return
+
+        stats = async_to_sync(ListingFilterPipeline.get_stats)()
+        if not stats:
+            self.stdout.write('No listing filter stats collected yet')
+            return
+
+        self.stdout.write(f'\n{"Filter":<12} {"Runs":>8} {"Rejected":>9} {"Rate":>8} {"Mean":>10}')
+        for name, value in sorted(stats.items(), key=lambda item: -item[1]['rejection_rate']):
+            self.stdout.write(
+                f'{name:<12} {value["runs"]:>8} {value["rejections"]:>9} '
+                f'{value["rejection_rate"]:>7.1f}% {value["mean_latency_ms"]:>7.0f} ms'
+            )
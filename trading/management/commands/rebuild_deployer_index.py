@@ -0,0 +1,13 @@
+from asgiref.sync import async_to_sync
+
+from django.core.management.base import BaseCommand
+
+from trading.services.deployer_index import DeployerIndex
+
+
+class Command(BaseCommand):
+    help = 'Link contract creators to currencies and recount deployer outcomes from past trades'
+
+    def handle(self, *args, **options):
+        count = async_to_sync(DeployerIndex.rebuild)()
+        self.stdout.write(self.style.SUCCESS(f'Deployer index rebuilt: {count} deployers'))
@@ -0,0 +1,107 @@
+import json
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from web3 import AsyncWeb3
+
+from trading.models.config import AutoTradingConfig
+from trading.models.provider_configs import BSCConfig
+from trading.services.rug_detector import BURN_TOPIC, MINT_TOPIC, SYNC_TOPIC, TRANSFER_TOPIC, RugDetector, WatchedPosition
+
+
+class Command(BaseCommand):
+    help = 'Replay pair and token logs of a block range through the rug detector'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--token', required=True, help='Token address')
+        parser.add_argument('--pair', required=True, help='Pair address')
+        parser.add_argument(
+            '--deployer',
+            action='append',
+            default=[],
+            help='Deployer or owner address, can be repeated'
+        )
+        parser.add_argument('--total-supply', type=int, help='Token total supply in wei, read from chain by default')
+        parser.add_argument('--from-block', type=int, help='First block to replay')
+        parser.add_argument('--to-block', type=int, help='Last block to replay')
+        parser.add_argument('--logs', help='Replay logs from a JSON file instead of fetching them')
+        parser.add_argument('--dump', help='Save fetched logs to a JSON file for later replays')
+        parser.add_argument('--liquidity-removal-percent', type=Decimal, help='Override configured threshold')
+        parser.add_argument('--deployer-transfer-percent', type=Decimal, help='Override configured threshold')
+
+    def handle(self, *args, **options):
+        liquidity_removal_percent = options['liquidity_removal_percent']
+        deployer_transfer_percent = options['deployer_transfer_percent']
+        if liquidity_removal_percent is None or deployer_transfer_percent is None:
+            config = async_to_sync(AutoTradingConfig.get_config)()
+            liquidity_removal_percent = liquidity_removal_percent or config.rug_liquidity_removal_percent
+            deployer_transfer_percent = deployer_transfer_percent or config.rug_deployer_transfer_percent
+        detector = RugDetector(liquidity_removal_percent, deployer_transfer_percent)
+
+        if options['logs']:
+            with open(options['logs']) as f:
+                logs = json.load(f)
+            total_supply = options['total_supply'] or 0
+        else:
+            if options['from_block'] is None or options['to_block'] is None:
+                raise CommandError('--from-block and --to-block are required without --logs')
+            logs, total_supply = async_to_sync(self.fetch)(options)
+            if options['dump']:
+                with open(options['dump'], 'w') as f:
+                    json.dump(logs, f, indent=2)
+                self.stdout.write(f'Saved {len(logs)} logs to {options["dump"]}')
+
+        detector.watch(WatchedPosition(0, options['token'], options['pair'], options['deployer'], total_supply))
+        alerts = detector.process_logs(logs)
+
+        self.stdout.write(f'\nReplayed {len(logs)} logs')
+        if not alerts:
+            self.stdout.write(self.style.SUCCESS('No rug detected'))
+        for alert in alerts:
+            self.stdout.write(self.style.WARNING(
+                f'Block {alert["block_number"]}: {alert["reason"]} {alert["percent"]:.2f}%'
+            ))
+
+    @staticmethod
+    async def fetch(options):
+        bsc_config = await BSCConfig.get_config()
+        w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(bsc_config.rpc_nodes.split(" ")[0]))
+        token = w3.to_checksum_address(options['token'])
+
+        total_supply = options['total_supply']
+        if total_supply is None:
+            contract = w3.eth.contract(address=token, abi=[{
+                "constant": True,
+                "inputs": [],
+                "name": "totalSupply",
+                "outputs": [{"name": "", "type": "uint256"}],
+                "type": "function"
+            }])
+            total_supply = await contract.functions.totalSupply().call()
+
+        logs = list(await w3.eth.get_logs({
+            "address": w3.to_checksum_address(options['pair']),
+            "topics": [[BURN_TOPIC, SYNC_TOPIC, MINT_TOPIC]],
+            "fromBlock": options['from_block'],
+            "toBlock": options['to_block']
+        }))
+        if options['deployer']:
+            logs += await w3.eth.get_logs({
+                "address": token,
+                "topics": [TRANSFER_TOPIC, ["0x" + "0" * 24 + address[2:].lower() for address in options['deployer']]],
+                "fromBlock": options['from_block'],
+                "toBlock": options['to_block']
+            })
+
+        return [
+            {
+                'address': log['address'],
+                'topics': [w3.to_hex(topic) for topic in log['topics']],
+                'data': w3.to_hex(log['data']),
+                'blockNumber': log['blockNumber'],
+                'logIndex': log['logIndex'],
+                'transactionHash': w3.to_hex(log['transactionHash'])
+            }
+            for log in logs
+        ], total_supply
@@ -26,9 +26,29 @@ class Command(BaseCommand):
             trading_tasks.monitor_active_trades.send,
             IntervalTrigger(seconds=300),
         )
+        scheduler.add_job(
+            trading_tasks.refresh_presigned_exits.send,
+            IntervalTrigger(seconds=30),
+        )
+        scheduler.add_job(
+            trading_tasks.index_transfers.send,
+            IntervalTrigger(seconds=15),
+        )
+        scheduler.add_job(
+            trading_tasks.reconcile_exposure.send,
+            IntervalTrigger(minutes=5),
+        )
+        scheduler.add_job(
+            trading_tasks.settle_pending_sells.send,
+            IntervalTrigger(minutes=1),
+        )
         scheduler.add_job(
             trading_tasks.cleanup_old_data.send,
-            IntervalTrigger(hours=24),
+            IntervalTrigger(hours=1),
+        )
+        scheduler.add_job(
+            trading_tasks.downsample_price_ticks.send,
+            IntervalTrigger(minutes=10),
         )
         try:
             scheduler.start()
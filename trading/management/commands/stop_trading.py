@@ -4,11 +4,19 @@ from django.core.management.base import BaseCommand
 
 from trading.models.config import AutoTradingConfig
 from trading.services.notification import NotificationService
+from trading.tasks.trading import liquidate_trades
 
 
 class Command(BaseCommand):
     help = 'Stop trading bot'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--liquidate',
+            action='store_true',
+            help='Sell all open trades in one batch'
+        )
+
     def handle(self, *args, **options):
         config = async_to_sync(AutoTradingConfig.get_config)()
         notification = NotificationService()
@@ -17,5 +25,9 @@ class Command(BaseCommand):
             config.trading_enabled = False
             config.save()
 
+        if options['liquidate']:
+            liquidate_trades.send(None, 'MANUAL')
+            self.stdout.write('Batch sell of open trades queued')
+
         self.stdout.write(self.style.SUCCESS('Trading bot stopped'))
         notification.notify_all_users("🔴 Trading bot stopped")
\ No newline at end of file
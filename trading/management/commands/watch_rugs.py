@@ -0,0 +1,31 @@
+import asyncio
+import logging
+
+from django.core.management.base import BaseCommand
+
+from trading.services.notification import NotificationService
+from trading.services.rug_detector import RugWatcher
+from trading.tasks.trading import execute_sell
+
+logger = logging.getLogger('trading')
+
+
+class Command(BaseCommand):
+    help = 'Watch open trades for liquidity removal and deployer dumps, sell on detection'
+
+    def handle(self, *args, **options):
+        notification = NotificationService()
+
+        async def on_alert(alert):
+            execute_sell.send(alert['trade_id'], 'RUG_DETECTED')
+            await notification.notify_error(
+                "Rug detected",
+                f"Trade {alert['trade_id']}: {alert['reason']} {alert['percent']:.2f}% "
+                f"in block {alert['block_number']}, selling"
+            )
+
+        self.stdout.write('Watching open trades...')
+        try:
+            asyncio.run(RugWatcher(on_alert).run())
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Rug watcher stopped'))
@@ -0,0 +1,33 @@
+import logging
+
+import dramatiq
+from dramatiq.asyncio import get_event_loop_thread
+
+logger = logging.getLogger('trading')
+
+
+class WorkerServicesMiddleware(dramatiq.Middleware):
+    """
+    Build WorkerServices when a worker boots and close them on shutdown
+
+    The broker is set up before Django apps are loaded, services and their
+    models are only imported once the worker runs
+    """
+
+    def after_worker_boot(self, broker, worker):
+        from .services.worker_services import worker_services
+
+        worker_services()
+        logger.info("Worker services ready")
+
+    def before_worker_shutdown(self, broker, worker):
+        from .services.worker_services import close_worker_services
+
+        # The AsyncIO middleware stops the event loop only after the worker shut down
+        event_loop_thread = get_event_loop_thread()
+        if event_loop_thread is None:
+            return
+        try:
+            event_loop_thread.run_coroutine(close_worker_services())
+        except Exception as e:
+            logger.warning(f"Error closing worker services: {e}")
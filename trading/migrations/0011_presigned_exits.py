@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:55
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0010_alter_trade_buy_amount_alter_trade_entry_price_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='presign_deadline_seconds',
+            field=models.IntegerField(default=600, help_text='Deadline of pre-signed sell transactions (seconds)'),
+        ),
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='presign_exits',
+            field=models.BooleanField(default=False, help_text='Keep a signed sell transaction ready for every open trade'),
+        ),
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='presign_reserve_threshold_percent',
+            field=models.DecimalField(decimal_places=2, default=Decimal('2.00'), help_text='Re-sign when expected sell output moves more than this (%)', max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='presigned_sell_deadline',
+            field=models.BigIntegerField(help_text='Unix timestamp', null=True),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='presigned_sell_expected_out',
+            field=models.DecimalField(decimal_places=0, help_text='In wei', max_digits=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='presigned_sell_nonce',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='presigned_sell_price',
+            field=models.DecimalField(decimal_places=18, max_digits=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='presigned_sell_tx',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='presigned_sell_updated_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
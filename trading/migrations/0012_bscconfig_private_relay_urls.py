@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0011_presigned_exits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bscconfig',
+            name='private_relay_urls',
+            field=models.CharField(blank=True, default='', help_text="Private transaction relays, signed transactions are sent to them along with rpc_nodes. Delimiter is ' ' (space)", max_length=600),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0012_bscconfig_private_relay_urls'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenSecurity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_address', models.CharField(help_text='Lowercase', max_length=42)),
+                ('chain_id', models.CharField(max_length=20)),
+                ('static_data', models.JSONField(default=dict, help_text='Facts fixed by the contract code')),
+                ('static_updated_at', models.DateTimeField(null=True)),
+                ('dynamic_data', models.JSONField(default=dict, help_text='Taxes, holders, liquidity and other changing values')),
+                ('dynamic_updated_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Token securities',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tokensecurity',
+            constraint=models.UniqueConstraint(fields=('token_address', 'chain_id'), name='unique_token_security'),
+        ),
+    ]
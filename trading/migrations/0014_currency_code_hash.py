@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0013_token_security'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='currency',
+            name='code_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Keccak of runtime bytecode', max_length=66, null=True),
+        ),
+    ]
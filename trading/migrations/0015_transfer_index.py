@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0014_currency_code_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransferIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_block', models.BigIntegerField(help_text='Contract creation block, first indexed block')),
+                ('last_block', models.BigIntegerField(help_text='Last indexed block')),
+                ('transfer_count', models.IntegerField(default=0)),
+                ('holder_count', models.IntegerField(default=0)),
+                ('balances', models.BinaryField(default=b'', help_text='20 byte address and 32 byte signed balance per holder')),
+                ('truncated', models.BooleanField(default=False, help_text="Address limit reached, new holders aren't tracked")),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('currency', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='transfer_index', to='trading.currency')),
+            ],
+            options={
+                'verbose_name_plural': 'Transfer indexes',
+            },
+        ),
+    ]
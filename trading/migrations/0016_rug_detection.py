@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:10
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0015_transfer_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='rug_deployer_transfer_percent',
+            field=models.DecimalField(decimal_places=2, default=Decimal('2.00'), help_text='Sell when the deployer or owner moves this much of the supply in one block (%)', max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='rug_liquidity_removal_percent',
+            field=models.DecimalField(decimal_places=2, default=Decimal('10.00'), help_text='Sell when this much pool liquidity is removed in one block (%)', max_digits=5),
+        ),
+        migrations.AlterField(
+            model_name='trade',
+            name='sell_reason',
+            field=models.CharField(choices=[('DROP_FROM_PEAK', 'Dropped from peak (20%)'), ('BELOW_ENTRY', 'Below entry price'), ('PROFIT_TARGET', '3x profit target'), ('MANUAL', 'Manual sell'), ('RUG_DETECTED', 'Liquidity removal or deployer dump')], max_length=20, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0016_rug_detection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='listing_score_weights',
+            field=models.JSONField(blank=True, default=dict, help_text="Feature weights overriding the defaults, 'bias' is added to every score"),
+        ),
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='min_listing_score',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Reject listings scoring below this, empty to only record scores', max_digits=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='ListingFeatures',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_address', models.CharField(help_text='Lowercase', max_length=42, unique=True)),
+                ('version', models.IntegerField(help_text='Feature layout version')),
+                ('vector', models.BinaryField(help_text='float64 array')),
+                ('score', models.FloatField(null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('currency', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='features', to='trading.currency')),
+            ],
+            options={
+                'verbose_name_plural': 'Listing features',
+            },
+        ),
+    ]
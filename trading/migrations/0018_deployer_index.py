@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0017_listing_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Deployer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(help_text='Lowercase', max_length=42, unique=True)),
+                ('tokens_count', models.IntegerField(default=0)),
+                ('rejected_count', models.IntegerField(default=0)),
+                ('loss_count', models.IntegerField(default=0)),
+                ('rug_count', models.IntegerField(default=0)),
+                ('profit_count', models.IntegerField(default=0)),
+                ('blocked', models.BooleanField(default=False, help_text='Reject all tokens of this deployer')),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='max_deployer_bad_tokens',
+            field=models.IntegerField(default=2, help_text='Reject listings of deployers with this many rejected, lost or rugged tokens, 0 to disable'),
+        ),
+        migrations.AddField(
+            model_name='currency',
+            name='deployers',
+            field=models.ManyToManyField(blank=True, related_name='currencies', to='trading.deployer'),
+        ),
+    ]
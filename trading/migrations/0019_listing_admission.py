@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0018_deployer_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='deep_analysis_policy',
+            field=models.CharField(choices=[('UNCERTAIN', 'Buy listings cleared by cached data, deep-analyze the rest first'), ('ALWAYS', 'Deep-analyze every admitted listing before buying')], default='UNCERTAIN', help_text='Which admitted listings wait for deep analysis before a buy', max_length=10),
+        ),
+    ]
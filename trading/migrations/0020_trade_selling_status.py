@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0019_listing_admission'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trade',
+            name='status',
+            field=models.CharField(choices=[('BOUGHT', 'Bought'), ('SELLING', 'Selling'), ('SOLD', 'Sold')], max_length=10),
+        ),
+    ]
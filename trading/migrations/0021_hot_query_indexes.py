@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:21
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently so trading keeps writing to the tables
+    atomic = False
+
+    dependencies = [
+        ('trading', '0020_trade_selling_status'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='currency',
+            index=models.Index(fields=['symbol'], name='currency_symbol_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='currency',
+            index=models.Index(condition=models.Q(('status__in', ['SOLD', 'REJECTED', 'ERROR'])), fields=['updated_at'], name='currency_closed_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='currency',
+            index=models.Index(condition=models.Q(('status__in', ['NEW', 'ANALYZING', 'BUYING', 'BOUGHT', 'SELLING'])), fields=['status'], name='currency_active_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='trade',
+            index=models.Index(condition=models.Q(('status__in', ['BOUGHT', 'SELLING'])), fields=['currency', 'status'], name='trade_open_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='trade',
+            index=models.Index(fields=['buy_timestamp'], name='trade_buy_timestamp_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='trade',
+            index=models.Index(condition=models.Q(('status', 'SOLD')), fields=['sell_timestamp'], name='trade_sold_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:23
+
+from django.db import migrations, models
+
+
+def seed_exposure(apps, schema_editor):
+    Exposure = apps.get_model('trading', 'Exposure')
+    Trade = apps.get_model('trading', 'Trade')
+    open_trades = Trade.objects.filter(status__in=['BOUGHT', 'SELLING'])
+    Exposure.objects.update_or_create(pk=1, defaults={
+        'open_count': open_trades.count(),
+        'invested': open_trades.aggregate(invested=models.Sum('buy_amount'))['invested'] or 0
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0021_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exposure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_count', models.IntegerField(default=0)),
+                ('invested', models.DecimalField(decimal_places=18, default=0, max_digits=50)),
+                ('reserved_count', models.IntegerField(default=0)),
+                ('reserved_amount', models.DecimalField(decimal_places=18, default=0, max_digits=50)),
+                ('reserved_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Exposure',
+            },
+        ),
+        migrations.RunPython(seed_exposure, migrations.RunPython.noop),
+    ]
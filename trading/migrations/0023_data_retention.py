@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0022_exposure_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='archive_old_data',
+            field=models.BooleanField(default=True, help_text='Write deleted rows to gzipped JSONL files in ARCHIVE_ROOT first'),
+        ),
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='cleanup_chunk_size',
+            field=models.IntegerField(default=1000, help_text='Rows deleted per statement'),
+        ),
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='cleanup_time_budget_seconds',
+            field=models.IntegerField(default=60, help_text='Cleanup stops after this long and continues on the next run'),
+        ),
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='retention_days',
+            field=models.IntegerField(default=30, help_text='Delete sold trades and closed currencies older than this (days)'),
+        ),
+    ]
@@ -0,0 +1,144 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:27
+
+import json
+from decimal import Decimal, InvalidOperation
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+# Frozen copies of trading.models.token_analysis as of this migration
+FLAG_FIELDS = (
+    "is_open_source",
+    "is_honeypot",
+    "can_take_back_ownership",
+    "owner_change_balance",
+    "selfdestruct",
+    "trading_cooldown",
+    "personal_slippage_modifiable",
+    "transfer_pausable",
+    "cannot_buy",
+    "external_call",
+    "slippage_modifiable",
+    "is_anti_whale",
+    "anti_whale_modifiable",
+    "is_whitelisted",
+    "is_blacklisted",
+    "is_proxy",
+    "cannot_sell_all",
+)
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value)) if value not in (None, "") else None
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _int(value):
+    number = _decimal(value)
+    return int(number) if number is not None else None
+
+
+def analysis_fields(analysis):
+    fields = {flag: analysis.get(flag) for flag in FLAG_FIELDS}
+    fields.update({
+        'buy_tax': _decimal(analysis.get('buy_tax')),
+        'sell_tax': _decimal(analysis.get('sell_tax')),
+        'liquidity': _decimal(analysis.get('liquidity')),
+        'holder_count': _int(analysis.get('holder_count')),
+        'top10_holders_percent': _decimal(analysis.get('top10_holders_percent')),
+        'transactions_count': _int(analysis.get('transactions_count')),
+        'score': _decimal(analysis.get('score')),
+        'error': analysis.get('error'),
+    })
+    return fields
+
+
+def _decode(value):
+    """analyze_data used to be stored as a JSON string, sometimes encoded twice"""
+    while isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def convert_analyze_data(apps, schema_editor):
+    Currency = apps.get_model('trading', 'Currency')
+    TokenAnalysis = apps.get_model('trading', 'TokenAnalysis')
+
+    currencies, analyses = [], []
+    for currency in Currency.objects.exclude(analyze_data=None).only('id', 'analyze_data').iterator(chunk_size=BATCH_SIZE):
+        if not isinstance(currency.analyze_data, str):
+            continue
+        currency.analyze_data = _decode(currency.analyze_data)
+        currencies.append(currency)
+        # Bytecode-only results have no security flags
+        if isinstance(currency.analyze_data, dict) and any(flag in currency.analyze_data for flag in FLAG_FIELDS):
+            analyses.append(TokenAnalysis(currency_id=currency.id, **analysis_fields(currency.analyze_data)))
+
+        if len(currencies) >= BATCH_SIZE:
+            Currency.objects.bulk_update(currencies, ['analyze_data'])
+            TokenAnalysis.objects.bulk_create(analyses, ignore_conflicts=True)
+            currencies, analyses = [], []
+
+    Currency.objects.bulk_update(currencies, ['analyze_data'])
+    TokenAnalysis.objects.bulk_create(analyses, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0023_data_retention'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='currency',
+            name='analyze_data',
+            field=models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+        ),
+        migrations.CreateModel(
+            name='TokenAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_open_source', models.BooleanField(null=True)),
+                ('is_honeypot', models.BooleanField(db_index=True, null=True)),
+                ('can_take_back_ownership', models.BooleanField(null=True)),
+                ('owner_change_balance', models.BooleanField(null=True)),
+                ('selfdestruct', models.BooleanField(null=True)),
+                ('trading_cooldown', models.BooleanField(null=True)),
+                ('personal_slippage_modifiable', models.BooleanField(null=True)),
+                ('transfer_pausable', models.BooleanField(null=True)),
+                ('cannot_buy', models.BooleanField(null=True)),
+                ('external_call', models.BooleanField(null=True)),
+                ('slippage_modifiable', models.BooleanField(null=True)),
+                ('is_anti_whale', models.BooleanField(null=True)),
+                ('anti_whale_modifiable', models.BooleanField(null=True)),
+                ('is_whitelisted', models.BooleanField(null=True)),
+                ('is_blacklisted', models.BooleanField(null=True)),
+                ('is_proxy', models.BooleanField(null=True)),
+                ('cannot_sell_all', models.BooleanField(null=True)),
+                ('buy_tax', models.DecimalField(db_index=True, decimal_places=6, max_digits=12, null=True)),
+                ('sell_tax', models.DecimalField(db_index=True, decimal_places=6, max_digits=12, null=True)),
+                ('liquidity', models.DecimalField(db_index=True, decimal_places=2, help_text='USD', max_digits=30, null=True)),
+                ('holder_count', models.IntegerField(null=True)),
+                ('top10_holders_percent', models.DecimalField(decimal_places=4, max_digits=8, null=True)),
+                ('transactions_count', models.IntegerField(null=True)),
+                ('score', models.DecimalField(db_index=True, decimal_places=4, max_digits=12, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('currency', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analysis', to='trading.currency')),
+            ],
+            options={
+                'verbose_name_plural': 'Token analyses',
+            },
+        ),
+        migrations.RunPython(convert_analyze_data, migrations.RunPython.noop),
+    ]
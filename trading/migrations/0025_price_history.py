@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0024_token_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='price_candle_retention_days',
+            field=models.IntegerField(default=90, help_text='Delete 1 minute price candles older than this (days)'),
+        ),
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='price_tick_retention_hours',
+            field=models.IntegerField(default=24, help_text='Raw price ticks older than this are downsampled into 1 minute candles (hours)'),
+        ),
+        migrations.CreateModel(
+            name='PriceTick',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=18, max_digits=30)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('currency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_ticks', to='trading.currency')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['currency', 'timestamp'], name='price_tick_currency_time_idx'), models.Index(fields=['timestamp'], name='price_tick_time_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceCandle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minute', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=18, max_digits=30)),
+                ('high', models.DecimalField(decimal_places=18, max_digits=30)),
+                ('low', models.DecimalField(decimal_places=18, max_digits=30)),
+                ('close', models.DecimalField(decimal_places=18, max_digits=30)),
+                ('ticks', models.IntegerField(default=0)),
+                ('currency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_candles', to='trading.currency')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['minute'], name='price_candle_minute_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='pricecandle',
+            constraint=models.UniqueConstraint(fields=('currency', 'minute'), name='price_candle_currency_minute'),
+        ),
+    ]
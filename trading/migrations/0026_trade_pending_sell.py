@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0025_price_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trade',
+            name='pending_sell',
+            field=models.JSONField(blank=True, help_text='Transaction hash, nonce and quote of the swap', null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:53
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0026_trade_pending_sell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autotradingconfig',
+            name='presign_slippage_percent',
+            field=models.DecimalField(decimal_places=2, default=Decimal('50.00'), help_text='Slippage of pre-signed sells (%), wide since they are sent on rugs and emergencies', max_digits=5),
+        ),
+        migrations.AlterField(
+            model_name='autotradingconfig',
+            name='presign_exits',
+            field=models.BooleanField(default=False, help_text="Keep a signed sell transaction ready for every open trade. All of them use the wallet's pending nonce, so any other wallet transaction invalidates them until the next refresh"),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:55
+
+from django.db import migrations, models
+from django.db.models import Q
+
+# Error messages of rejections, frozen as of this migration
+SECURITY_MESSAGES = Q(error_message='Failed security checks') | Q(error_message__startswith='Bytecode scan:') | Q(
+    error_message__startswith='Deployer ')
+LIMITS_MESSAGES = Q(error_message__in=['Trading limits reached', 'Insufficient balance'])
+
+
+def categorize_rejections(apps, schema_editor):
+    Currency = apps.get_model('trading', 'Currency')
+    rejected = Currency.objects.filter(status__in=['REJECTED', 'MANUAL'])
+    rejected.filter(SECURITY_MESSAGES).update(rejection_category='SECURITY')
+    rejected.filter(LIMITS_MESSAGES).update(rejection_category='LIMITS')
+    rejected.filter(rejection_category=None).update(rejection_category='MARKET')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0027_presign_slippage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='currency',
+            name='rejection_category',
+            field=models.CharField(blank=True, choices=[('SECURITY', 'Security'), ('MARKET', 'Market'), ('LIMITS', 'Trading limits')], max_length=10, null=True),
+        ),
+        migrations.RunPython(categorize_rejections, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def recount_rejections(apps, schema_editor):
+    """Counters included market and limit rejections so far"""
+    Deployer = apps.get_model('trading', 'Deployer')
+    security_rejections = Deployer.objects.filter(pk=OuterRef('pk')).annotate(
+        rejected=Count('currencies', filter=Q(
+            currencies__status='REJECTED',
+            currencies__rejection_category='SECURITY'
+        ), distinct=True)
+    ).values('rejected')
+    Deployer.objects.update(rejected_count=Coalesce(Subquery(security_rejections), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0028_currency_rejection_category'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='deployer',
+            name='rejected_count',
+            field=models.IntegerField(default=0, help_text='Tokens rejected for security reasons'),
+        ),
+        migrations.RunPython(recount_rejections, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0029_deployer_security_rejections'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='autotradingconfig',
+            name='deep_analysis_policy',
+            field=models.CharField(choices=[('UNCERTAIN', 'Buy listings cleared by cached data, transfer count and score, deep-analyze the rest first'), ('ALWAYS', 'Deep-analyze every admitted listing before buying')], default='UNCERTAIN', help_text='Which admitted listings wait for deep analysis before a buy', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='trade',
+            name='sell_reason',
+            field=models.CharField(choices=[('DROP_FROM_PEAK', 'Dropped from peak (20%)'), ('BELOW_ENTRY', 'Below entry price'), ('PROFIT_TARGET', '3x profit target'), ('MANUAL', 'Manual sell'), ('RUG_DETECTED', 'Liquidity removal or deployer dump'), ('ANALYSIS_REJECTED', 'Rejected by deep analysis after the buy')], max_length=20, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0030_analysis_rejected_sells'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExposureReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=18, max_digits=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name='exposure',
+            name='reserved_at',
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:04
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def taxes_to_percent(apps, schema_editor):
+    """Taxes were stored as the GoPlus fractions so far"""
+    TokenAnalysis = apps.get_model('trading', 'TokenAnalysis')
+    TokenAnalysis.objects.update(buy_tax=F('buy_tax') * 100, sell_tax=F('sell_tax') * 100)
+
+
+def taxes_to_fraction(apps, schema_editor):
+    TokenAnalysis = apps.get_model('trading', 'TokenAnalysis')
+    TokenAnalysis.objects.update(buy_tax=F('buy_tax') / 100, sell_tax=F('sell_tax') / 100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0031_exposure_reservations'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tokenanalysis',
+            name='buy_tax',
+            field=models.DecimalField(db_index=True, decimal_places=6, help_text='Percent', max_digits=12, null=True),
+        ),
+        migrations.AlterField(
+            model_name='tokenanalysis',
+            name='sell_tax',
+            field=models.DecimalField(db_index=True, decimal_places=6, help_text='Percent', max_digits=12, null=True),
+        ),
+        migrations.RunPython(taxes_to_percent, taxes_to_fraction),
+    ]
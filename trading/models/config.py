@@ -11,6 +11,10 @@ class AutoTradingConfig(models.Model):
         ('BSC', 'BSC'),
         ('Binance', 'Binance'),
     ]
+    DEEP_ANALYSIS_POLICY_CHOICES = [
+        ('UNCERTAIN', 'Buy listings cleared by cached data, transfer count and score, deep-analyze the rest first'),
+        ('ALWAYS', 'Deep-analyze every admitted listing before buying'),
+    ]
 
 
     # Trading parameters
@@ -55,6 +59,90 @@ class AutoTradingConfig(models.Model):
         help_text="Gas limit for transactions"
     )
 
+    # Pre-signed exits
+    presign_exits = models.BooleanField(
+        default=False,
+        help_text="Keep a signed sell transaction ready for every open trade. All of them use the wallet's "
+                  "pending nonce, so any other wallet transaction invalidates them until the next refresh"
+    )
+    presign_slippage_percent = models.DecimalField(
+        max_digits=5, decimal_places=2,
+        default=Decimal('50.00'),
+        help_text="Slippage of pre-signed sells (%), wide since they are sent on rugs and emergencies"
+    )
+    presign_reserve_threshold_percent = models.DecimalField(
+        max_digits=5, decimal_places=2,
+        default=Decimal('2.00'),
+        help_text="Re-sign when expected sell output moves more than this (%)"
+    )
+    presign_deadline_seconds = models.IntegerField(
+        default=600,
+        help_text="Deadline of pre-signed sell transactions (seconds)"
+    )
+
+    # Rug detection
+    rug_liquidity_removal_percent = models.DecimalField(
+        max_digits=5, decimal_places=2,
+        default=Decimal('10.00'),
+        help_text="Sell when this much pool liquidity is removed in one block (%)"
+    )
+    rug_deployer_transfer_percent = models.DecimalField(
+        max_digits=5, decimal_places=2,
+        default=Decimal('2.00'),
+        help_text="Sell when the deployer or owner moves this much of the supply in one block (%)"
+    )
+
+    # Listing score
+    min_listing_score = models.DecimalField(
+        max_digits=10, decimal_places=2,
+        null=True, blank=True,
+        help_text="Reject listings scoring below this, empty to only record scores"
+    )
+    listing_score_weights = models.JSONField(
+        default=dict, blank=True,
+        help_text="Feature weights overriding the defaults, 'bias' is added to every score"
+    )
+
+    # Deployer reputation
+    max_deployer_bad_tokens = models.IntegerField(
+        default=2,
+        help_text="Reject listings of deployers with this many rejected, lost or rugged tokens, 0 to disable"
+    )
+
+    # Listing admission
+    deep_analysis_policy = models.CharField(
+        max_length=10,
+        choices=DEEP_ANALYSIS_POLICY_CHOICES,
+        default='UNCERTAIN',
+        help_text="Which admitted listings wait for deep analysis before a buy"
+    )
+
+    # Data retention
+    retention_days = models.IntegerField(
+        default=30,
+        help_text="Delete sold trades and closed currencies older than this (days)"
+    )
+    archive_old_data = models.BooleanField(
+        default=True,
+        help_text="Write deleted rows to gzipped JSONL files in ARCHIVE_ROOT first"
+    )
+    cleanup_chunk_size = models.IntegerField(
+        default=1000,
+        help_text="Rows deleted per statement"
+    )
+    cleanup_time_budget_seconds = models.IntegerField(
+        default=60,
+        help_text="Cleanup stops after this long and continues on the next run"
+    )
+    price_tick_retention_hours = models.IntegerField(
+        default=24,
+        help_text="Raw price ticks older than this are downsampled into 1 minute candles (hours)"
+    )
+    price_candle_retention_days = models.IntegerField(
+        default=90,
+        help_text="Delete 1 minute price candles older than this (days)"
+    )
+
     # General settings
     trading_enabled = models.BooleanField(
         default=True,
@@ -88,6 +176,11 @@ class AutoTradingConfig(models.Model):
         self.pk = 1
         super().save(*args, **kwargs)
 
+    @property
+    def max_invested(self) -> Decimal:
+        """Most USDT held in open trades and buys in progress"""
+        return self.trade_amount * self.max_active_trades
+
     @classmethod
     async def get_config(cls):
         """Get or create configuration instance"""
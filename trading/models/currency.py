@@ -1,4 +1,53 @@
+from decimal import Decimal
+from typing import Dict, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .deployer import Deployer
+
+PRICE_FIELD = models.DecimalField(max_digits=30, decimal_places=18)
+
+
+class CurrencyQuerySet(models.QuerySet):
+
+    def _price_updates(self, prices: Dict[int, Decimal]) -> Dict:
+        price = Case(
+            *(When(pk=pk, then=Value(value, output_field=PRICE_FIELD)) for pk, value in prices.items()),
+            output_field=PRICE_FIELD
+        )
+        return {
+            'current_price': price,
+            # GREATEST skips NULL on Postgres, so currencies without a peak get the price
+            'price_peak': Greatest(F('price_peak'), price),
+            'updated_at': timezone.now()
+        }
+
+    def record_prices(self, prices: Dict[int, Decimal]) -> int:
+        """
+        Set current prices and raise peaks of many currencies in one UPDATE
+
+        Args:
+            prices: current price by currency id
+        """
+        if not prices:
+            return 0
+        return self.filter(pk__in=prices).update(**self._price_updates(prices))
+
+    async def arecord_prices(self, prices: Dict[int, Decimal]) -> int:
+        if not prices:
+            return 0
+        return await self.filter(pk__in=prices).aupdate(**self._price_updates(prices))
+
+    def buyable(self) -> 'CurrencyQuerySet':
+        """Currencies a manual buy may start on"""
+        return self.filter(status__in=['NEW', 'ANALYZING'])
+
+    async def aby_symbol(self, symbol: str) -> Optional['Currency']:
+        return await self.filter(symbol=symbol).afirst()
 
 
 class Currency(models.Model):
@@ -13,6 +62,12 @@ class Currency(models.Model):
         ('ERROR', 'Error'),
         ('MANUAL', 'Manual')
     ]
+    # Why a listing was rejected, only security rejections say something about the code or its deployer
+    REJECTION_CATEGORY_CHOICES = [
+        ('SECURITY', 'Security'),
+        ('MARKET', 'Market'),
+        ('LIMITS', 'Trading limits')
+    ]
 
     symbol = models.CharField(max_length=50)
     address = models.CharField(max_length=42, unique=True)
@@ -24,10 +79,42 @@ class Currency(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     error_message = models.TextField(null=True, blank=True)
-    analyze_data = models.JSONField(null=True)
+    rejection_category = models.CharField(max_length=10, choices=REJECTION_CATEGORY_CHOICES, null=True, blank=True)
+    analyze_data = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    deployers = models.ManyToManyField(Deployer, blank=True, related_name="currencies")
+    code_hash = models.CharField(max_length=66, null=True, blank=True, db_index=True, help_text="Keccak of runtime bytecode")
+
+    objects = CurrencyQuerySet.as_manager()
+
+    def apply_price(self, price: Decimal):
+        """Mirror record_prices on the instance"""
+        self.current_price = price
+        if self.price_peak is None or price > self.price_peak:
+            self.price_peak = price
+
+    async def arecord_price(self, price: Decimal):
+        """Store the current price, the peak is raised atomically in the same UPDATE"""
+        await Currency.objects.arecord_prices({self.pk: price})
+        self.apply_price(price)
 
     def __str__(self):
         return f"{self.symbol} ({self.status})"
 
     class Meta:
-        verbose_name_plural = "Currencies"
\ No newline at end of file
+        verbose_name_plural = "Currencies"
+        indexes = [
+            # Telegram /buy, /sell and /balance look currencies up by symbol
+            models.Index(fields=["symbol"], name="currency_symbol_idx"),
+            # cleanup_old_data, same status list as the query so the planner can use it
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(status__in=["SOLD", "REJECTED", "ERROR"]),
+                name="currency_closed_updated_idx"
+            ),
+            # Listings and positions in progress, a small share of all rows
+            models.Index(
+                fields=["status"],
+                condition=models.Q(status__in=["NEW", "ANALYZING", "BUYING", "BOUGHT", "SELLING"]),
+                name="currency_active_status_idx"
+            ),
+        ]
\ No newline at end of file
@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class Deployer(models.Model):
+    """Wallet that created a token contract or its pair, with outcomes of its past tokens"""
+    address = models.CharField(max_length=42, unique=True, help_text="Lowercase")
+    tokens_count = models.IntegerField(default=0)
+    rejected_count = models.IntegerField(default=0, help_text="Tokens rejected for security reasons")
+    loss_count = models.IntegerField(default=0)
+    rug_count = models.IntegerField(default=0)
+    profit_count = models.IntegerField(default=0)
+    blocked = models.BooleanField(default=False, help_text="Reject all tokens of this deployer")
+    first_seen = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def bad_count(self) -> int:
+        return self.rejected_count + self.loss_count + self.rug_count
+
+    def __str__(self):
+        return f"{self.address} ({self.bad_count}/{self.tokens_count} bad)"
@@ -0,0 +1,138 @@
+from datetime import timedelta
+from decimal import Decimal
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.db import models, transaction
+from django.db.models import Count, F, Sum, Value
+from django.utils import timezone
+
+
+class Exposure(models.Model):
+    """
+    Open positions ledger singleton
+
+    Kept up to date on every buy and sell, so trade limits are checked
+    without counting trades. A buy first reserves a slot with one conditional
+    UPDATE, concurrent buys can't take more slots than the limits allow
+    """
+    open_count = models.IntegerField(default=0)
+    invested = models.DecimalField(max_digits=50, decimal_places=18, default=0)
+    reserved_count = models.IntegerField(default=0)
+    reserved_amount = models.DecimalField(max_digits=50, decimal_places=18, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Reservations older than this are from buys that died, reconcile() drops them
+    reservation_ttl = timedelta(minutes=10)
+
+    class Meta:
+        verbose_name_plural = "Exposure"
+
+    @classmethod
+    async def get(cls) -> 'Exposure':
+        exposure, created = await cls.objects.aget_or_create(pk=1)
+        return exposure
+
+    def has_room(self, amount: Decimal, max_trades: int, max_invested: Decimal) -> bool:
+        return (
+            self.open_count + self.reserved_count < max_trades
+            and self.invested + self.reserved_amount + amount <= max_invested
+        )
+
+    @classmethod
+    def reserve(cls, amount: Decimal, max_trades: int, max_invested: Decimal) -> Optional['ExposureReservation']:
+        """Reserve a slot and amount for a buy, None if it would exceed the limits"""
+        cls.objects.get_or_create(pk=1)
+        with transaction.atomic():
+            updated = cls.objects.filter(
+                pk=1,
+                open_count__lt=Value(max_trades) - F('reserved_count'),
+                invested__lte=Value(max_invested - amount) - F('reserved_amount')
+            ).update(
+                reserved_count=F('reserved_count') + 1,
+                reserved_amount=F('reserved_amount') + amount
+            )
+            if not updated:
+                return None
+            return ExposureReservation.objects.create(amount=amount)
+
+    @classmethod
+    async def areserve(cls, amount: Decimal, max_trades: int, max_invested: Decimal) -> Optional['ExposureReservation']:
+        return await sync_to_async(cls.reserve)(amount, max_trades, max_invested)
+
+    @classmethod
+    def _drop_reservation(cls, reservation: 'ExposureReservation') -> bool:
+        """Delete a reservation and its share of the totals, False if reconcile() dropped it already"""
+        deleted, _ = ExposureReservation.objects.filter(pk=reservation.pk).delete()
+        if deleted:
+            cls.objects.filter(pk=1).update(
+                reserved_count=F('reserved_count') - 1,
+                reserved_amount=F('reserved_amount') - reservation.amount
+            )
+        return bool(deleted)
+
+    @classmethod
+    def release(cls, reservation: 'ExposureReservation'):
+        """Give back the reservation of a buy that didn't happen"""
+        with transaction.atomic():
+            cls._drop_reservation(reservation)
+
+    @classmethod
+    async def arelease(cls, reservation: 'ExposureReservation'):
+        await sync_to_async(cls.release)(reservation)
+
+    @classmethod
+    def commit(cls, reservation: Optional['ExposureReservation'], invested: Decimal):
+        """
+        Turn the reservation of a completed buy into an open position
+
+        Called in the transaction that creates the trade, so reconcile() never
+        counts the trade and its reservation together. A buy without reservation,
+        e.g. a manual one, only opens the position
+        """
+        if reservation is not None:
+            cls._drop_reservation(reservation)
+        cls.objects.filter(pk=1).update(open_count=F('open_count') + 1, invested=F('invested') + invested)
+
+    @classmethod
+    def close(cls, amount: Decimal):
+        """Remove a sold position, called in the transaction that marks the trade SOLD"""
+        cls.objects.filter(pk=1).update(open_count=F('open_count') - 1, invested=F('invested') - amount)
+
+    @classmethod
+    def reconcile(cls) -> 'Exposure':
+        """
+        Recount open positions from trades and drop stale reservations
+
+        The ledger row stays locked while counting, buys and sells writing it wait
+        """
+        from .trade import Trade
+
+        cls.objects.get_or_create(pk=1)
+        with transaction.atomic():
+            exposure = cls.objects.select_for_update().get(pk=1)
+            ExposureReservation.objects.filter(created_at__lt=timezone.now() - cls.reservation_ttl).delete()
+            reserved = ExposureReservation.objects.aggregate(count=Count('id'), amount=Sum('amount'))
+            open_trades = Trade.objects.open()
+            exposure.open_count = open_trades.count()
+            exposure.invested = open_trades.aggregate(invested=Sum('buy_amount'))['invested'] or 0
+            exposure.reserved_count = reserved['count']
+            exposure.reserved_amount = reserved['amount'] or 0
+            exposure.save()
+        return exposure
+
+    @classmethod
+    async def areconcile(cls) -> 'Exposure':
+        return await sync_to_async(cls.reconcile)()
+
+    def __str__(self):
+        return f"{self.open_count} open, {self.invested} invested"
+
+
+class ExposureReservation(models.Model):
+    """Slot held by a buy in progress, counted in Exposure.reserved_count"""
+    amount = models.DecimalField(max_digits=50, decimal_places=18)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.amount} reserved at {self.created_at}"
@@ -0,0 +1,20 @@
+from django.db import models
+
+from .currency import Currency
+
+
+class ListingFeatures(models.Model):
+    """Numeric feature vector of a listing, see services.listing_score.FEATURES for the layout"""
+    token_address = models.CharField(max_length=42, unique=True, help_text="Lowercase")
+    currency = models.OneToOneField(Currency, null=True, blank=True, on_delete=models.CASCADE, related_name="features")
+    version = models.IntegerField(help_text="Feature layout version")
+    vector = models.BinaryField(help_text="float64 array")
+    score = models.FloatField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.token_address} ({self.score})"
+
+    class Meta:
+        verbose_name_plural = "Listing features"
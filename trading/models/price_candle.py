@@ -0,0 +1,25 @@
+from django.db import models
+
+from .currency import Currency
+
+
+class PriceCandle(models.Model):
+    """One minute OHLC of a currency, downsampled from PriceTick rows"""
+    currency = models.ForeignKey(Currency, on_delete=models.CASCADE, related_name="price_candles")
+    minute = models.DateTimeField()
+    open = models.DecimalField(max_digits=30, decimal_places=18)
+    high = models.DecimalField(max_digits=30, decimal_places=18)
+    low = models.DecimalField(max_digits=30, decimal_places=18)
+    close = models.DecimalField(max_digits=30, decimal_places=18)
+    ticks = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.currency_id} @ {self.minute}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["currency", "minute"], name="price_candle_currency_minute"),
+        ]
+        indexes = [
+            models.Index(fields=["minute"], name="price_candle_minute_idx"),
+        ]
@@ -0,0 +1,45 @@
+from decimal import Decimal
+from typing import Dict
+
+from django.db import models
+from django.utils import timezone
+
+from .currency import Currency
+
+
+class PriceTick(models.Model):
+    """
+    Price seen by monitoring, append-only
+
+    Ticks older than price_tick_retention_hours are folded into
+    one minute PriceCandle rows by PriceHistory.downsample()
+    """
+    currency = models.ForeignKey(Currency, on_delete=models.CASCADE, related_name="price_ticks")
+    price = models.DecimalField(max_digits=30, decimal_places=18)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.currency_id} {self.price} @ {self.timestamp}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["currency", "timestamp"], name="price_tick_currency_time_idx"),
+            models.Index(fields=["timestamp"], name="price_tick_time_idx"),
+        ]
+
+    @classmethod
+    async def arecord(cls, prices: Dict[int, Decimal]) -> int:
+        """
+        Append one tick per currency in one INSERT
+
+        Args:
+            prices: current price by currency id
+        """
+        if not prices:
+            return 0
+        now = timezone.now()
+        ticks = await cls.objects.abulk_create([
+            cls(currency_id=currency_id, price=price, timestamp=now)
+            for currency_id, price in prices.items()
+        ])
+        return len(ticks)
@@ -11,6 +11,10 @@ class BSCConfig(models.Model):
     token_analyze_url_id =  models.CharField(max_length=20, default="56")
     factory_address = models.CharField(max_length=128, default="")
     main_api_url = models.CharField(max_length=128, default="")
+    private_relay_urls = models.CharField(
+        max_length=600, default="", blank=True,
+        help_text="Private transaction relays, signed transactions are sent to them along with rpc_nodes. Delimiter is ' ' (space)"
+    )
 
 
     def __str__(self):
@@ -1,7 +1,18 @@
+from typing import Optional
+
 from django.contrib.auth.models import User
 from django.db import models
 
 
+class TelegramUserQuerySet(models.QuerySet):
+
+    def notifiable(self) -> 'TelegramUserQuerySet':
+        return self.filter(is_active=True, notification_enabled=True)
+
+    async def aby_telegram_id(self, telegram_id: int) -> Optional['TelegramUser']:
+        return await self.select_related("user").filter(telegram_id=telegram_id).afirst()
+
+
 class TelegramUser(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     telegram_id = models.BigIntegerField(unique=True)
@@ -12,6 +23,8 @@ class TelegramUser(models.Model):
     registration_date = models.DateTimeField(auto_now_add=True)
     last_interaction = models.DateTimeField(auto_now=True)
 
+    objects = TelegramUserQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.user.username} (Telegram: {self.telegram_username or self.telegram_id})"
 
@@ -0,0 +1,106 @@
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Optional
+
+from django.db import models
+
+from .currency import Currency
+
+FLAG_FIELDS = (
+    "is_open_source",
+    "is_honeypot",
+    "can_take_back_ownership",
+    "owner_change_balance",
+    "selfdestruct",
+    "trading_cooldown",
+    "personal_slippage_modifiable",
+    "transfer_pausable",
+    "cannot_buy",
+    "external_call",
+    "slippage_modifiable",
+    "is_anti_whale",
+    "anti_whale_modifiable",
+    "is_whitelisted",
+    "is_blacklisted",
+    "is_proxy",
+    "cannot_sell_all",
+)
+
+
+def _decimal(value) -> Optional[Decimal]:
+    try:
+        return Decimal(str(value)) if value not in (None, "") else None
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _int(value) -> Optional[int]:
+    number = _decimal(value)
+    return int(number) if number is not None else None
+
+
+def _percent(value) -> Optional[Decimal]:
+    """Percent from a GoPlus tax, which is a fraction ("0.1" is 10%)"""
+    fraction = _decimal(value)
+    return fraction * 100 if fraction is not None else None
+
+
+def analysis_fields(analysis: Dict) -> Dict:
+    """TokenAnalysis column values from an analysis dict as built by ListingContext.analysis"""
+    fields = {flag: analysis.get(flag) for flag in FLAG_FIELDS}
+    fields.update({
+        'buy_tax': _percent(analysis.get('buy_tax')),
+        'sell_tax': _percent(analysis.get('sell_tax')),
+        'liquidity': _decimal(analysis.get('liquidity')),
+        'holder_count': _int(analysis.get('holder_count')),
+        'top10_holders_percent': _decimal(analysis.get('top10_holders_percent')),
+        'transactions_count': _int(analysis.get('transactions_count')),
+        'score': _decimal(analysis.get('score')),
+        'error': analysis.get('error'),
+    })
+    return fields
+
+
+class TokenAnalysis(models.Model):
+    """Security analysis of a listing in typed, indexable columns, mirrors Currency.analyze_data"""
+    currency = models.OneToOneField(Currency, on_delete=models.CASCADE, related_name="analysis")
+
+    is_open_source = models.BooleanField(null=True)
+    is_honeypot = models.BooleanField(null=True, db_index=True)
+    can_take_back_ownership = models.BooleanField(null=True)
+    owner_change_balance = models.BooleanField(null=True)
+    selfdestruct = models.BooleanField(null=True)
+    trading_cooldown = models.BooleanField(null=True)
+    personal_slippage_modifiable = models.BooleanField(null=True)
+    transfer_pausable = models.BooleanField(null=True)
+    cannot_buy = models.BooleanField(null=True)
+    external_call = models.BooleanField(null=True)
+    slippage_modifiable = models.BooleanField(null=True)
+    is_anti_whale = models.BooleanField(null=True)
+    anti_whale_modifiable = models.BooleanField(null=True)
+    is_whitelisted = models.BooleanField(null=True)
+    is_blacklisted = models.BooleanField(null=True)
+    is_proxy = models.BooleanField(null=True)
+    cannot_sell_all = models.BooleanField(null=True)
+
+    buy_tax = models.DecimalField(max_digits=12, decimal_places=6, null=True, db_index=True, help_text="Percent")
+    sell_tax = models.DecimalField(max_digits=12, decimal_places=6, null=True, db_index=True, help_text="Percent")
+    liquidity = models.DecimalField(max_digits=30, decimal_places=2, null=True, db_index=True, help_text="USD")
+    holder_count = models.IntegerField(null=True)
+    top10_holders_percent = models.DecimalField(max_digits=8, decimal_places=4, null=True)
+    transactions_count = models.IntegerField(null=True)
+    score = models.DecimalField(max_digits=12, decimal_places=4, null=True, db_index=True)
+    error = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Token analyses"
+
+    @classmethod
+    async def astore(cls, currency: Currency, analysis: Dict) -> 'TokenAnalysis':
+        token_analysis, _ = await cls.objects.aupdate_or_create(currency=currency, defaults=analysis_fields(analysis))
+        return token_analysis
+
+    def __str__(self):
+        return f"Analysis of {self.currency_id}"
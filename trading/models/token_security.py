@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class TokenSecurity(models.Model):
+    """GoPlus token_security result cached per token and chain"""
+    token_address = models.CharField(max_length=42, help_text="Lowercase")
+    chain_id = models.CharField(max_length=20)
+    static_data = models.JSONField(default=dict, help_text="Facts fixed by the contract code")
+    static_updated_at = models.DateTimeField(null=True)
+    dynamic_data = models.JSONField(default=dict, help_text="Taxes, holders, liquidity and other changing values")
+    dynamic_updated_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"{self.token_address} ({self.chain_id})"
+
+    class Meta:
+        verbose_name_plural = "Token securities"
+        constraints = [
+            models.UniqueConstraint(fields=["token_address", "chain_id"], name="unique_token_security")
+        ]
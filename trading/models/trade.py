@@ -1,11 +1,32 @@
-from django.db import models
+from decimal import Decimal
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.db import models, transaction
+from django.utils import timezone
 
 from .currency import Currency
+from .exposure import Exposure, ExposureReservation
 from ..models.wallet import Wallet
 
+OPEN_STATUSES = ('BOUGHT', 'SELLING')
+
+
+class TradeQuerySet(models.QuerySet):
+
+    def bought(self) -> 'TradeQuerySet':
+        """Trades exit rules and sells can act on, with their currency"""
+        return self.filter(status='BOUGHT').select_related('currency')
+
+    def open(self) -> 'TradeQuerySet':
+        """Trades holding tokens, including ones being sold"""
+        return self.filter(status__in=OPEN_STATUSES)
+
+
 class Trade(models.Model):
     STATUS_CHOICES = [
         ('BOUGHT', 'Bought'),
+        ('SELLING', 'Selling'),
         ('SOLD', 'Sold'),
     ]
 
@@ -14,6 +35,8 @@ class Trade(models.Model):
         ('BELOW_ENTRY', 'Below entry price'),
         ('PROFIT_TARGET', '3x profit target'),
         ('MANUAL', 'Manual sell'),
+        ('RUG_DETECTED', 'Liquidity removal or deployer dump'),
+        ('ANALYSIS_REJECTED', 'Rejected by deep analysis after the buy'),
     ]
 
     currency = models.ForeignKey(Currency, on_delete=models.CASCADE)
@@ -30,4 +53,120 @@ class Trade(models.Model):
     buy_timestamp = models.DateTimeField()
     sell_timestamp = models.DateTimeField(null=True)
     sell_reason = models.CharField(max_length=20, choices=SELL_REASON_CHOICES, null=True)
-    wallet = models.ForeignKey(Wallet, null=True, on_delete=models.CASCADE)
\ No newline at end of file
+    wallet = models.ForeignKey(Wallet, null=True, on_delete=models.CASCADE)
+
+    # Ready-to-broadcast sell kept by ExitPresigner
+    presigned_sell_tx = models.TextField(null=True, blank=True)
+    presigned_sell_nonce = models.BigIntegerField(null=True)
+    presigned_sell_deadline = models.BigIntegerField(null=True, help_text="Unix timestamp")
+    presigned_sell_expected_out = models.DecimalField(max_digits=50, decimal_places=0, null=True, help_text="In wei")
+    presigned_sell_price = models.DecimalField(max_digits=50, decimal_places=18, null=True)
+    presigned_sell_updated_at = models.DateTimeField(null=True)
+
+    # Sell broadcast but not confirmed yet, settled from its receipt by BatchLiquidator.settle_pending()
+    pending_sell = models.JSONField(null=True, blank=True, help_text="Transaction hash, nonce and quote of the swap")
+
+    objects = TradeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Open trades: monitoring, trade limits, /status, /trades and per-currency /sell
+            models.Index(
+                fields=["currency", "status"],
+                condition=models.Q(status__in=["BOUGHT", "SELLING"]),
+                name="trade_open_idx"
+            ),
+            # analyze_trades date ranges
+            models.Index(fields=["buy_timestamp"], name="trade_buy_timestamp_idx"),
+            # cleanup_old_data
+            models.Index(fields=["sell_timestamp"], condition=models.Q(status="SOLD"), name="trade_sold_idx"),
+        ]
+
+    def apply_sell(self, order: dict, reason: str):
+        """Fill sell fields and profit/loss from a BSCTradingService sell result"""
+        self.status = 'SOLD'
+        self.exit_price = Decimal(str(order['sell_price']))
+        self.sell_amount = Decimal(str(order['expected_out']))
+        self.sell_order_id = order['transaction_hash']
+        self.sell_timestamp = timezone.now()
+        self.sell_reason = reason
+        self.pending_sell = None
+
+        # Calculate profit/loss
+        self.profit_loss = self.sell_amount - self.buy_amount
+        self.profit_loss_percentage = (self.profit_loss / self.buy_amount) * 100
+
+    @classmethod
+    def transition(cls, trade_id: int, from_status: str, to_status: str, **fields) -> Optional['Trade']:
+        """
+        Move a trade and its currency to to_status if the trade is in from_status
+
+        Args:
+            fields: other trade fields to set in the same update
+
+        Returns:
+            The updated trade, None if it is in another status
+        """
+        with transaction.atomic():
+            trade = cls.objects.select_for_update(of=("self",)).select_related("currency").filter(id=trade_id).first()
+            if trade is None or trade.status != from_status:
+                return None
+            trade.status = to_status
+            for name, value in fields.items():
+                setattr(trade, name, value)
+            trade.save(update_fields=["status", *fields])
+            trade.currency.status = to_status
+            Currency.objects.filter(id=trade.currency_id).update(status=to_status)
+        return trade
+
+    @classmethod
+    def open_position(cls, reservation: Optional['ExposureReservation'], **fields) -> 'Trade':
+        """Create a bought trade and count it in the exposure ledger in one transaction"""
+        with transaction.atomic():
+            trade = cls.objects.create(**fields)
+            Exposure.commit(reservation, trade.buy_amount)
+        return trade
+
+    @classmethod
+    async def aopen_position(cls, reservation: Optional['ExposureReservation'], **fields) -> 'Trade':
+        return await sync_to_async(cls.open_position)(reservation, **fields)
+
+    @classmethod
+    def begin_sells(cls, trade_ids) -> list:
+        """BOUGHT -> SELLING for many trades, returns ids of the trades moved"""
+        with transaction.atomic():
+            ids = list(cls.objects.select_for_update().filter(id__in=trade_ids, status='BOUGHT').values_list("id", flat=True))
+            cls.objects.filter(id__in=ids).update(status='SELLING')
+            Currency.objects.filter(trade__id__in=ids).update(status='SELLING')
+        return ids
+
+    @classmethod
+    async def abegin_sell(cls, trade_id: int) -> Optional['Trade']:
+        """BOUGHT -> SELLING, None if the trade is not open"""
+        return await sync_to_async(cls.transition)(trade_id, 'BOUGHT', 'SELLING')
+
+    @classmethod
+    async def aabort_sell(cls, trade_id: int) -> Optional['Trade']:
+        """SELLING -> BOUGHT after a failed sell, so exit rules can fire again"""
+        return await sync_to_async(cls.transition)(trade_id, 'SELLING', 'BOUGHT', pending_sell=None)
+
+    @classmethod
+    async def amark_pending_sell(cls, trade_id: int, order: dict) -> int:
+        """Keep a broadcast swap on a SELLING trade until its receipt settles it"""
+        return await cls.objects.filter(id=trade_id, status='SELLING').aupdate(pending_sell=order)
+
+    def complete_sell(self, order: dict, reason: str) -> bool:
+        """SELLING -> SOLD with the sell result, False if the trade left SELLING meanwhile"""
+        with transaction.atomic():
+            status = Trade.objects.select_for_update().filter(id=self.id).values_list("status", flat=True).first()
+            if status != 'SELLING':
+                return False
+            self.apply_sell(order, reason)
+            self.save()
+            self.currency.status = 'SOLD'
+            Currency.objects.filter(id=self.currency_id).update(status='SOLD')
+            Exposure.close(self.buy_amount)
+        return True
+
+    async def acomplete_sell(self, order: dict, reason: str) -> bool:
+        return await sync_to_async(self.complete_sell)(order, reason)
@@ -0,0 +1,21 @@
+from django.db import models
+
+from .currency import Currency
+
+
+class TransferIndex(models.Model):
+    """Transfer log cursor and holder balances of a currency"""
+    currency = models.OneToOneField(Currency, on_delete=models.CASCADE, related_name="transfer_index")
+    from_block = models.BigIntegerField(help_text="Contract creation block, first indexed block")
+    last_block = models.BigIntegerField(help_text="Last indexed block")
+    transfer_count = models.IntegerField(default=0)
+    holder_count = models.IntegerField(default=0)
+    balances = models.BinaryField(default=b"", help_text="20 byte address and 32 byte signed balance per holder")
+    truncated = models.BooleanField(default=False, help_text="Address limit reached, new holders aren't tracked")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.currency} @ {self.last_block}"
+
+    class Meta:
+        verbose_name_plural = "Transfer indexes"
@@ -0,0 +1,361 @@
+import asyncio
+import logging
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from web3 import AsyncWeb3
+from web3.exceptions import TransactionNotFound
+
+from ..models.config import AutoTradingConfig
+from ..models.provider_configs import BSCConfig
+from ..models.trade import Trade
+from ..tasks.analysis import analyze_transaction_failure
+from .broadcaster import TransactionBroadcaster
+from .bsc_trade import BSCTradingService
+from .deployer_index import DeployerIndex
+from .sell_lease import SellLease
+
+logger = logging.getLogger('trading')
+
+# Multicall3 is deployed at the same address on BSC mainnet and testnet
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"}
+                ],
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"}
+                ],
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+ROUTER_ABI = [
+    {
+        "inputs": [
+            {"name": "amountIn", "type": "uint256"},
+            {"name": "path", "type": "address[]"}
+        ],
+        "name": "getAmountsOut",
+        "outputs": [{"name": "amounts", "type": "uint256[]"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"name": "amountIn", "type": "uint256"},
+            {"name": "amountOutMin", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"}
+        ],
+        "name": "swapExactTokensForETH",
+        "outputs": [{"name": "amounts", "type": "uint256[]"}],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    }
+]
+
+
+class BatchLiquidator:
+    """
+    Sell many open trades at once
+
+    Balances, allowances and quotes for all trades come from two multicalls,
+    every approve and swap is signed upfront with consecutive nonces and the
+    whole batch is broadcast in one burst
+    """
+    config: AutoTradingConfig
+    bsc_config: BSCConfig
+    rpc_nodes: Any
+    w3: AsyncWeb3
+    router_contract: Any
+    multicall: Any
+
+    receipt_timeout = 180
+
+    def __init__(self):
+        self.current_rpc_index = 0
+        self.token_abi = BSCTradingService._load_token_abi()
+
+    async def get_configs(self):
+        self.config = await AutoTradingConfig.get_config()
+        self.bsc_config = await BSCConfig.get_config()
+        self.rpc_nodes = self.bsc_config.rpc_nodes.split(" ")
+        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(self.rpc_nodes[self.current_rpc_index]))
+        self.router_contract = self.w3.eth.contract(
+            address=self.w3.to_checksum_address(self.bsc_config.router_address),
+            abi=ROUTER_ABI
+        )
+        self.multicall = self.w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+
+    async def _multicall(self, calls: List[Tuple[str, str, List[str]]]) -> List[Optional[tuple]]:
+        """
+        Run read calls in one eth_call
+
+        Args:
+            calls: (target, calldata, output types) per call
+
+        Returns:
+            Decoded outputs per call, None for failed calls
+        """
+        if not calls:
+            return []
+        results = await self.multicall.functions.aggregate3(
+            [(target, True, data) for target, data, _ in calls]
+        ).call()
+
+        decoded = []
+        for (success, data), (_, _, output_types) in zip(results, calls):
+            decoded.append(self.w3.codec.decode(output_types, data) if success and data else None)
+        return decoded
+
+    async def quote(self, trades: List[Trade]) -> List[Dict]:
+        """Get balance, router allowance and expected output for every trade"""
+        wallet_address = self.w3.to_checksum_address(self.bsc_config.wallet.address)
+        spend_address = self.w3.to_checksum_address(self.bsc_config.wallet.currency_to_spend_address)
+        router_address = self.router_contract.address
+
+        quotes = []
+        calls = []
+        for trade in trades:
+            token = self.w3.to_checksum_address(trade.currency.address)
+            token_contract = self.w3.eth.contract(address=token, abi=self.token_abi)
+            calls.append((token, token_contract.encode_abi("balanceOf", args=[wallet_address]), ["uint256"]))
+            calls.append((token, token_contract.encode_abi("allowance", args=[wallet_address, router_address]), ["uint256"]))
+            quotes.append({'trade': trade, 'token': token, 'path': [token, spend_address], 'tokens_out': 0})
+
+        results = await self._multicall(calls)
+        for i, quote in enumerate(quotes):
+            balance, allowance = results[2 * i], results[2 * i + 1]
+            quote['balance'] = balance[0] if balance else 0
+            quote['allowance'] = allowance[0] if allowance else 0
+
+        sellable = [quote for quote in quotes if quote['balance']]
+        amounts = await self._multicall([
+            (router_address, self.router_contract.encode_abi("getAmountsOut", args=[quote['balance'], quote['path']]), ["uint256[]"])
+            for quote in sellable
+        ])
+        for quote, result in zip(sellable, amounts):
+            quote['tokens_out'] = result[0][-1] if result else 0
+
+        return quotes
+
+    def _sign(self, tx: Dict) -> str:
+        signed = self.w3.eth.account.sign_transaction(tx, self.bsc_config.wallet.private_key)
+        return self.w3.to_hex(signed.raw_transaction)
+
+    async def liquidate(self, trade_ids: Optional[List[int]] = None, reason: str = 'MANUAL') -> Dict:
+        """
+        Sell all open trades, or only trade_ids, in one batch
+
+        Returns:
+            dict: sold trades, failed and skipped trade ids
+        """
+        await self.get_configs()
+        trades = Trade.objects.bought()
+        if trade_ids:
+            trades = trades.filter(id__in=trade_ids)
+        trades = [trade async for trade in trades]
+        summary = {'sold': [], 'failed': [], 'skipped': [], 'pending': []}
+
+        # Trades already being sold elsewhere are left to that sell
+        leases = {}
+        for trade in trades:
+            lease = SellLease(trade.id)
+            if await lease.acquire():
+                leases[trade.id] = lease
+            else:
+                summary['skipped'].append(trade.id)
+        claimed = set()
+        try:
+            claimed = set(await sync_to_async(Trade.begin_sells)(list(leases)))
+            trades = [trade for trade in trades if trade.id in claimed]
+            summary['skipped'] += [trade_id for trade_id in leases if trade_id not in claimed]
+            if trades:
+                await self._liquidate(trades, reason, summary)
+        finally:
+            # Trades whose swap never reached the chain are open again, broadcast ones stay SELLING
+            for trade_id in claimed - {trade.id for trade in summary['sold']} - set(summary['pending']):
+                await Trade.aabort_sell(trade_id)
+            for lease in leases.values():
+                await lease.release()
+
+        logger.info(
+            f"Batch liquidation done: {len(summary['sold'])} sold, {len(summary['failed'])} failed, "
+            f"{len(summary['skipped'])} skipped, {len(summary['pending'])} pending"
+        )
+        return summary
+
+    async def _liquidate(self, trades: List[Trade], reason: str, summary: Dict):
+        """Sell trades already moved to SELLING, filling summary"""
+        quotes = await self.quote(trades)
+
+        wallet_address = self.w3.to_checksum_address(self.bsc_config.wallet.address)
+        chain_id = int(self.bsc_config.token_analyze_url_id)
+        gas_price = await self.w3.eth.gas_price
+        nonce = await self.w3.eth.get_transaction_count(wallet_address, 'pending')
+        deadline = int(time.time()) + 300  # 5 minutes
+
+        # Sign everything upfront, approve of a token always gets the nonce right before its swap
+        signed = []
+        for quote in quotes:
+            if not quote['balance'] or not quote['tokens_out']:
+                logger.warning(f"Trade {quote['trade'].id} has nothing to sell or no quote, skipping")
+                summary['skipped'].append(quote['trade'].id)
+                continue
+
+            if quote['allowance'] < quote['balance']:
+                token_contract = self.w3.eth.contract(address=quote['token'], abi=self.token_abi)
+                approve_tx = await token_contract.functions.approve(
+                    self.router_contract.address,
+                    2 ** 256 - 1
+                ).build_transaction({
+                    'chainId': chain_id,
+                    'from': wallet_address,
+                    'gas': 100000,
+                    'gasPrice': gas_price,
+                    'nonce': nonce
+                })
+                signed.append(('approve', quote, self._sign(approve_tx)))
+                nonce += 1
+
+            quote['min_tokens_out'] = int(quote['tokens_out'] * 0.95)  # 5% slippage
+            quote['nonce'] = nonce
+            swap_tx = await self.router_contract.functions.swapExactTokensForETH(
+                quote['balance'],
+                quote['min_tokens_out'],
+                quote['path'],
+                wallet_address,
+                deadline
+            ).build_transaction({
+                'chainId': chain_id,
+                'from': wallet_address,
+                'gas': 250000,
+                'gasPrice': gas_price,
+                'nonce': nonce
+            })
+            signed.append(('swap', quote, self._sign(swap_tx)))
+            nonce += 1
+
+        relays = self.bsc_config.private_relay_urls.split(" ") if self.bsc_config.private_relay_urls else []
+        broadcaster = TransactionBroadcaster(self.rpc_nodes + relays)
+
+        # Nonces are consecutive, every transaction after a rejected one would wait behind the gap.
+        # Send in nonce order and stop at the first rejection, nothing after it reaches the mempool
+        pending = []
+        for index, (kind, quote, raw_transaction) in enumerate(signed):
+            try:
+                tx_hash = await broadcaster.broadcast(raw_transaction)
+            except Exception as e:
+                unsent = sorted({unsent_quote['trade'].id for _, unsent_quote, _ in signed[index:]})
+                logger.error(f"Batch sell broadcast stopped at trade {quote['trade'].id}: {e}, not sent: {unsent}")
+                summary['failed'] += unsent
+                break
+            if kind != 'swap':
+                continue
+
+            order = {
+                'transaction_hash': self.w3.to_hex(tx_hash),
+                'nonce': quote['nonce'],
+                'expected_out': str(self.w3.from_wei(quote['tokens_out'], "ether")),
+                'sell_price': str(Decimal(quote['balance']) / Decimal(quote['tokens_out'])),
+                'reason': reason
+            }
+            # Recorded before waiting, the swap can be mined even if this process dies
+            await Trade.amark_pending_sell(quote['trade'].id, order)
+            summary['pending'].append(quote['trade'].id)
+            pending.append((quote, order))
+        logger.info(f"Batch liquidation broadcast {len(pending)} swaps")
+
+        receipts = await asyncio.gather(
+            *(
+                self.w3.eth.wait_for_transaction_receipt(order['transaction_hash'], timeout=self.receipt_timeout)
+                for _, order in pending
+            ),
+            return_exceptions=True
+        )
+
+        for (quote, order), receipt in zip(pending, receipts):
+            trade = quote['trade']
+            if isinstance(receipt, Exception):
+                # Not confirmed in time but may still be mined, settle_pending() finishes it from the receipt
+                logger.warning(f"Batch sell of trade {trade.id} not confirmed yet: {receipt}")
+                continue
+
+            summary['pending'].remove(trade.id)
+            if not receipt['status']:
+                logger.error(f"Batch sell failed for trade {trade.id}: reverted")
+                analyze_transaction_failure.send(order['transaction_hash'])
+                summary['failed'].append(trade.id)
+                continue
+
+            await trade.acomplete_sell(order, reason)
+            await DeployerIndex.record_sell(trade)
+            summary['sold'].append(trade)
+
+    async def settle_pending(self) -> Dict:
+        """
+        Finish SELLING trades whose swap was broadcast but not confirmed
+
+        A mined swap completes the trade, a reverted one or one whose nonce was
+        taken by another transaction moves it back to BOUGHT, the rest wait
+
+        Returns:
+            dict: sold trades, failed and still pending trade ids
+        """
+        await self.get_configs()
+        wallet_address = self.w3.to_checksum_address(self.bsc_config.wallet.address)
+        # Read before the receipts, a swap mined in between has a nonce at or above it
+        mined_nonce = await self.w3.eth.get_transaction_count(wallet_address, 'latest')
+        summary = {'sold': [], 'failed': [], 'pending': []}
+
+        trades = Trade.objects.filter(status='SELLING').exclude(pending_sell=None).select_related('currency')
+        async for trade in trades:
+            order = trade.pending_sell
+            try:
+                receipt = await self.w3.eth.get_transaction_receipt(order['transaction_hash'])
+            except TransactionNotFound:
+                receipt = None
+
+            if receipt is None:
+                if order['nonce'] < mined_nonce:
+                    logger.error(f"Sell of trade {trade.id} was dropped, nonce {order['nonce']} used by another transaction")
+                    await Trade.aabort_sell(trade.id)
+                    summary['failed'].append(trade.id)
+                else:
+                    summary['pending'].append(trade.id)
+                continue
+
+            if not receipt['status']:
+                logger.error(f"Sell of trade {trade.id} reverted")
+                analyze_transaction_failure.send(order['transaction_hash'])
+                await Trade.aabort_sell(trade.id)
+                summary['failed'].append(trade.id)
+                continue
+
+            if await trade.acomplete_sell(order, order['reason']):
+                await DeployerIndex.record_sell(trade)
+                summary['sold'].append(trade)
+        return summary
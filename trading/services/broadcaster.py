@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List
+
+import httpx
+from hexbytes import HexBytes
+from web3 import Web3
+
+logger = logging.getLogger('trading')
+
+# Errors meaning the node already has the transaction, i.e. it was accepted elsewhere
+ALREADY_KNOWN_ERRORS = ("already known", "known transaction", "alreadyknown")
+
+
+class EndpointStats:
+    """Acceptance latency of an RPC endpoint, smoothed with an exponential moving average"""
+
+    alpha = 0.2
+
+    def __init__(self):
+        self.latency: float | None = None
+        self.accepted = 0
+        self.rejected = 0
+
+    def record(self, latency: float, accepted: bool):
+        if accepted:
+            self.accepted += 1
+            self.latency = latency if self.latency is None else (
+                self.alpha * latency + (1 - self.alpha) * self.latency
+            )
+        else:
+            self.rejected += 1
+
+    def as_dict(self) -> Dict:
+        return {
+            'latency_ms': round(self.latency * 1000, 2) if self.latency is not None else None,
+            'accepted': self.accepted,
+            'rejected': self.rejected
+        }
+
+
+class TransactionBroadcaster:
+    """
+    Submit one signed transaction to every configured endpoint at once
+
+    The first endpoint to accept it wins, the others keep running in the background
+    so their latency is still recorded for later routing decisions
+    """
+
+    # Shared by all broadcasters of the process
+    stats: Dict[str, EndpointStats] = {}
+    _background: set = set()
+
+    def __init__(self, endpoints: Iterable[str], timeout: float = 10.0):
+        self.endpoints = list(dict.fromkeys(url for url in endpoints if url))
+        self.timeout = timeout
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict]:
+        return {url: stats.as_dict() for url, stats in cls.stats.items()}
+
+    @classmethod
+    def ranked_endpoints(cls, endpoints: Iterable[str]) -> List[str]:
+        """Order endpoints by recorded acceptance latency, unknown ones last"""
+        def key(url):
+            stats = cls.stats.get(url)
+            return stats.latency if stats and stats.latency is not None else float("inf")
+        return sorted(endpoints, key=key)
+
+    async def _send(self, client: httpx.AsyncClient, url: str, raw_transaction: str) -> HexBytes:
+        started = time.perf_counter()
+        accepted = False
+        try:
+            response = await client.post(url, json={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "eth_sendRawTransaction",
+                "params": [raw_transaction]
+            })
+            data = response.json()
+            if "error" in data:
+                message = str(data["error"].get("message", data["error"]))
+                if any(error in message.lower() for error in ALREADY_KNOWN_ERRORS):
+                    accepted = True
+                    return HexBytes(Web3.keccak(hexstr=raw_transaction))
+                raise Exception(message)
+
+            accepted = True
+            return HexBytes(data["result"])
+        finally:
+            latency = time.perf_counter() - started
+            self.stats.setdefault(url, EndpointStats()).record(latency, accepted)
+            logger.debug(f"Broadcast to {url}: accepted={accepted} in {latency * 1000:.1f} ms")
+
+    @staticmethod
+    async def _close_when_done(client: httpx.AsyncClient, tasks: List[asyncio.Task]):
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await client.aclose()
+
+    async def broadcast(self, raw_transaction: str | bytes) -> HexBytes:
+        """
+        Send the transaction to all endpoints and return the first accepted hash
+
+        Raises:
+            Exception if every endpoint rejected the transaction
+        """
+        if not self.endpoints:
+            raise Exception("No endpoints configured for broadcast")
+        if isinstance(raw_transaction, (bytes, bytearray)):
+            raw_transaction = Web3.to_hex(raw_transaction)
+
+        client = httpx.AsyncClient(timeout=self.timeout)
+        tasks = [
+            asyncio.create_task(self._send(client, url, raw_transaction))
+            for url in self.ranked_endpoints(self.endpoints)
+        ]
+        # Keep a reference so the background task isn't garbage collected
+        closer = asyncio.create_task(self._close_when_done(client, tasks))
+        self._background.add(closer)
+        closer.add_done_callback(self._background.discard)
+
+        errors = []
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                tx_hash = await next_done
+                logger.info(f"Transaction {Web3.to_hex(tx_hash)} accepted")
+                return tx_hash
+            except Exception as e:
+                errors.append(str(e))
+
+        raise Exception(f"Transaction rejected by all endpoints: {errors}")
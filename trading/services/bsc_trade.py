@@ -7,9 +7,13 @@ from decimal import Decimal
 from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
 import logging
-from typing import List, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List
 import time
-from .transaction_analyzer import TransactionAnalyzer
+import asyncio
+from .route_finder import RouteFinder
+from .broadcaster import TransactionBroadcaster
+from .swap_simulator import SwapSimulator
+from ..tasks.analysis import analyze_transaction_failure
 
 import httpx
 
@@ -21,6 +25,9 @@ logger = logging.getLogger('trading')
 
 
 class BSCTradingService:
+    # Shared by all trading services of the process, so pairs stay cached between trades
+    route_finder = RouteFinder()
+
     config: AutoTradingConfig
     bsc_config: BSCConfig
     rpc_nodes: Any
@@ -32,7 +39,6 @@ class BSCTradingService:
     known_tokens: Any
 
     def __init__(self, token_address: str):
-        self.analyzer = TransactionAnalyzer()
         self.token_address = token_address
         self.current_rpc_index = 0
         self.bsc = BscScan(settings.BSCSCAN_API_KEY)
@@ -236,6 +242,16 @@ class BSCTradingService:
                 "payable": False,
                 "stateMutability": "nonpayable",
                 "type": "function"
+            },
+            {
+                "constant": True,
+                "inputs": [
+                    {"name": "_owner", "type": "address"},
+                    {"name": "_spender", "type": "address"}
+                ],
+                "name": "allowance",
+                "outputs": [{"name": "", "type": "uint256"}],
+                "type": "function"
             }
         ]
 
@@ -393,6 +409,74 @@ class BSCTradingService:
             raise e
             raise Exception(f"Failed to calculate tokens out: {str(e)}")
 
+    async def find_route(self, token_in: str, token_out: str, amount_in: int, gas_price: int = 0) -> Dict:
+        """
+        Find the best swap path between token_in and token_out through known tokens
+
+        Falls back to the direct path when pairs can't be loaded
+        """
+        token_in = self.w3.to_checksum_address(token_in)
+        token_out = self.w3.to_checksum_address(token_out)
+        route = None
+        try:
+            intermediates = set(self.known_tokens.values()) | {token_in, token_out}
+            intermediates.discard(self.w3.to_checksum_address(self.token_address))
+            await self.route_finder.load_pairs(
+                self.w3,
+                self.bsc_config.factory_address,
+                self.token_address,
+                intermediates
+            )
+            route = self.route_finder.best_route(
+                token_in,
+                token_out,
+                amount_in,
+                gas_price=gas_price,
+                native_token=self.known_tokens.get("WBNB")
+            )
+        except Exception as e:
+            logger.warning(f"Error finding route {token_in} - {token_out}: {e}")
+
+        if not route:
+            return {'path': [token_in, token_out], 'amounts': [amount_in], 'amount_out': None}
+        logger.info(f"Route found: {route}")
+        return route
+
+    async def calculate_route_out(self, route: Dict) -> Dict:
+        """Expected output of a multi-hop route computed from cached reserves"""
+        sell_token_info = await self.get_token_info(route['path'][0])
+        get_token_info = await self.get_token_info(route['path'][-1])
+        tokens_out = route['amount_out']
+
+        execution_price = route['amounts'][0] / tokens_out
+        execution_price_formatted = execution_price * (10 ** get_token_info['decimals']) / (
+                    10 ** sell_token_info['decimals'])
+
+        return {
+            'path': route['path'],
+            'tokens_out': tokens_out,
+            'tokens_out_formatted': tokens_out / (10 ** get_token_info['decimals']),
+            'sell_token_info': sell_token_info,
+            'get_token_info': get_token_info,
+            'prices': {
+                'execution_price': execution_price_formatted
+            }
+        }
+
+    async def quote(self, token_in: str, token_out: str, amount_in: int, gas_price: int = 0) -> Dict:
+        """Pick the best route and calculate expected output for it"""
+        route = await self.find_route(token_in, token_out, amount_in, gas_price)
+        if len(route['path']) == 2:
+            expected_out = await self.calculate_tokens_out(
+                token_in,
+                token_out,
+                amount_in,
+                self.bsc_config.wallet.address
+            )
+            expected_out['path'] = route['path']
+            return expected_out
+        return await self.calculate_route_out(route)
+
     async def buy(self, amount: Decimal) -> Dict[str, Any]:
         await self.get_configs()
         """
@@ -405,18 +489,18 @@ class BSCTradingService:
             dict: Transaction details
         """
 
-        path = [self.w3.to_checksum_address(self.bsc_config.wallet.currency_to_spend_address),
-                self.w3.to_checksum_address(self.token_address)]
         deadline = int(time.time()) + 300  # 5 minutes
         wallet_address = self.w3.to_checksum_address(self.bsc_config.wallet.address)
         nonce = await self.w3.eth.get_transaction_count(wallet_address)
+        gas_price = await self.w3.eth.gas_price
         amount_in_wei = self.w3.to_wei(amount, "ether")
-        expected_out = await self.calculate_tokens_out(
+        expected_out = await self.quote(
             self.bsc_config.wallet.currency_to_spend_address,
             self.token_address,
             amount_in_wei,
-            self.bsc_config.wallet.address
+            gas_price
         )
+        path = expected_out['path']
         min_tokens = int(expected_out.get("tokens_out") * 0.95)
 
         tx = await self.router_contract.functions.swapExactETHForTokens(
@@ -429,15 +513,43 @@ class BSCTradingService:
             'from': wallet_address,
             'value': amount_in_wei,
             'gas': 250000,
-            'gasPrice': await self.w3.eth.gas_price,
+            'gasPrice': gas_price,
             'nonce': nonce
         })
 
+        # Dry-run the swap and a sell of the bought amount before spending gas
+        simulator = SwapSimulator(self.w3, self.token_abi)
+        buy_simulation, sell_simulation = await asyncio.gather(
+            simulator.simulate(tx),
+            simulator.check_sellable(
+                self.router_contract,
+                self.token_address,
+                list(reversed(path)),
+                wallet_address,
+                min_tokens,
+                deadline
+            )
+        )
+        if not buy_simulation['success']:
+            raise Exception(f"Buy simulation failed ({buy_simulation['risk']}): {buy_simulation['revert_reason']}")
+        if sell_simulation.get('inconclusive'):
+            logger.warning(f"Sell simulation of {self.token_address} skipped: {sell_simulation['revert_reason']}")
+        elif not sell_simulation['success']:
+            raise Exception(f"Token can't be sold ({sell_simulation['risk']}): {sell_simulation['revert_reason']}")
+
         # Sign and send transaction
         signed_tx = self.w3.eth.account.sign_transaction(tx, self.bsc_config.wallet.private_key)
-        swap_tx_hash = await self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        swap_tx_hash = await self.broadcast_transaction(signed_tx.raw_transaction)
 
         receipt = await self.w3.eth.wait_for_transaction_receipt(swap_tx_hash)
+        if not receipt['status']:
+            analyze_transaction_failure.send(self.w3.to_hex(swap_tx_hash))
+        elif self.config.presign_exits:
+            # Pre-signed sells need the router approved, the periodic refresh doesn't send transactions
+            try:
+                await self.ensure_allowance(await self.get_token_balance(self.token_address), gas_price)
+            except Exception as e:
+                logger.warning(f"Error approving {self.token_address} for pre-signed sells: {e}")
 
         return  {
             'transaction_hash': swap_tx_hash.hex(),
@@ -449,35 +561,65 @@ class BSCTradingService:
             "init_price": expected_out.get("prices", {}).get("execution_price", "0.0")
         }
 
-    async def sell(self, amount: Decimal | None = None) -> Dict[str, Any]:
+    async def sell(
+            self,
+            amount: Decimal | None = None,
+            on_broadcast: Callable[[Dict[str, Any]], Awaitable[None]] | None = None
+    ) -> Dict[str, Any]:
         await self.get_configs()
         """
         Sell tokens using PancakeSwap through BSC
 
         Args:
             amount: Amount of tokens to sell
+            on_broadcast: Called with the hash, nonce and quote of the swap once it
+                is sent, before waiting for its receipt
 
         Returns:
             dict: Transaction details
         """
-        analyzer = TransactionAnalyzer()
-        path = [self.w3.to_checksum_address(self.token_address),
-                self.w3.to_checksum_address(self.bsc_config.wallet.currency_to_spend_address)]
         deadline = int(time.time()) + 300  # 5 minutes
         wallet_address = self.w3.to_checksum_address(self.bsc_config.wallet.address)
         nonce = await self.w3.eth.get_transaction_count(wallet_address)
+        gas_price = await self.w3.eth.gas_price
         if not amount:
             amount_in = await self.get_token_balance(self.token_address)
         else:
             amount_in = int(self.w3.to_wei(amount, "ether"))
-        expected_out = await self.calculate_tokens_out(
+        expected_out = await self.quote(
             self.token_address,
             self.bsc_config.wallet.currency_to_spend_address,
             amount_in,
-            self.bsc_config.wallet.address
+            gas_price
         )
+        path = expected_out['path']
         min_tokens = int(expected_out.get("tokens_out") * 0.95)  # 5% slippage
 
+        tx = await self.router_contract.functions.swapExactTokensForETH(
+            amount_in,
+            min_tokens,
+            path,
+            wallet_address,
+            deadline
+        ).build_transaction({
+            'chainId': int(self.bsc_config.token_analyze_url_id),
+            'from': wallet_address,
+            'gas': 250000,
+            'gasPrice': gas_price,
+            'nonce': nonce+1
+        })
+
+        # Dry-run the swap as if approve was already mined
+        simulator = SwapSimulator(self.w3, self.token_abi)
+        override = await simulator.token_override(
+            self.token_address,
+            wallet_address,
+            self.bsc_config.router_address
+        )
+        simulation = await simulator.simulate(tx, override)
+        if not simulation['success']:
+            raise Exception(f"Sell simulation failed ({simulation['risk']}): {simulation['revert_reason']}")
+
         # Approve token spending
         approve_txn = await self.token_contract.functions.approve(
             self.w3.to_checksum_address(self.bsc_config.router_address),
@@ -486,7 +628,7 @@ class BSCTradingService:
             'from': self.w3.to_checksum_address(self.bsc_config.wallet.address),
             'nonce': nonce,
             'gas': 250000,
-            'gasPrice': await self.w3.eth.gas_price
+            'gasPrice': gas_price
         })
 
         # Sign and send approval
@@ -494,42 +636,154 @@ class BSCTradingService:
             approve_txn,
             self.bsc_config.wallet.private_key
         )
-        approve_tx_hash = await self.w3.eth.send_raw_transaction(
-            signed_approve.raw_transaction
-        )
+        approve_tx_hash = await self.broadcast_transaction(signed_approve.raw_transaction)
         approve_tx_receipt = await self.w3.eth.wait_for_transaction_receipt(approve_tx_hash)
-        approve_tx_analysis = await analyzer.analyze_failed_transaction(approve_tx_hash, approve_tx_receipt)
-        logger.info(f"Analyze approve receipt: \n{approve_tx_analysis}")
+        if not approve_tx_receipt['status']:
+            analyze_transaction_failure.send(self.w3.to_hex(approve_tx_hash))
+
+        signed_tx = self.w3.eth.account.sign_transaction(tx, self.bsc_config.wallet.private_key)
+        swap_tx_hash = await self.broadcast_transaction(signed_tx.raw_transaction)
+        if on_broadcast:
+            await on_broadcast({
+                'transaction_hash': self.w3.to_hex(swap_tx_hash),
+                'nonce': nonce + 1,
+                'expected_out': str(self.w3.from_wei(expected_out.get("tokens_out"), "ether")),
+                'sell_price': str(expected_out.get("prices", {}).get("execution_price", "0.0"))
+            })
+        receipt = await self.w3.eth.wait_for_transaction_receipt(swap_tx_hash)
+        if not receipt['status']:
+            analyze_transaction_failure.send(self.w3.to_hex(swap_tx_hash))
+        return {
+            'transaction_hash': swap_tx_hash.hex(),
+            'status': receipt['status'],
+            'gas_used': receipt['gasUsed'],
+            'amount_in': str(amount),
+            'min_tokens_out': min_tokens,
+            'expected_out': self.w3.from_wei(expected_out.get("tokens_out"), "ether"),
+            'sell_price': expected_out.get("prices", {}).get("execution_price", "0.0")
+        }
+
+    async def ensure_allowance(self, amount: int, gas_price: int | None = None) -> bool:
+        """
+        Approve the router for the token if the current allowance doesn't cover amount
+
+        Returns:
+            True if an approve transaction was sent
+        """
+        wallet_address = self.w3.to_checksum_address(self.bsc_config.wallet.address)
+        router_address = self.w3.to_checksum_address(self.bsc_config.router_address)
+        allowance = await self.token_contract.functions.allowance(wallet_address, router_address).call()
+        if allowance >= amount:
+            return False
+
+        approve_txn = await self.token_contract.functions.approve(
+            router_address,
+            2 ** 256 - 1
+        ).build_transaction({
+            'chainId': int(self.bsc_config.token_analyze_url_id),
+            'from': wallet_address,
+            'nonce': await self.w3.eth.get_transaction_count(wallet_address, 'pending'),
+            'gas': 250000,
+            'gasPrice': gas_price or await self.w3.eth.gas_price
+        })
+        signed_approve = self.w3.eth.account.sign_transaction(approve_txn, self.bsc_config.wallet.private_key)
+        approve_tx_hash = await self.broadcast_transaction(signed_approve.raw_transaction)
+        receipt = await self.w3.eth.wait_for_transaction_receipt(approve_tx_hash)
+        if not receipt['status']:
+            raise Exception(f"Approve transaction failed: {approve_tx_hash.hex()}")
+        return True
+
+    async def presign_sell(self, deadline_seconds: int = 600, slippage_percent: Decimal = Decimal(50)) -> Dict[str, Any]:
+        await self.get_configs()
+        """
+        Build and sign a sell of the whole token balance without broadcasting it
+
+        Router allowance is approved at buy time, so the signed swap stays valid until
+        its nonce is used, its deadline passes or the price moves past min_tokens_out
+
+        Returns:
+            dict: Signed transaction and the quote it was built from
+        """
+        wallet_address = self.w3.to_checksum_address(self.bsc_config.wallet.address)
+        gas_price = await self.w3.eth.gas_price
+        amount_in = await self.get_token_balance(self.token_address)
+        if not amount_in:
+            raise Exception(f"No {self.token_address} balance to sell")
+
+        router_address = self.w3.to_checksum_address(self.bsc_config.router_address)
+        if await self.token_contract.functions.allowance(wallet_address, router_address).call() < amount_in:
+            raise Exception(f"Router allowance of {self.token_address} doesn't cover the balance")
+        nonce = await self.w3.eth.get_transaction_count(wallet_address, 'pending')
+
+        expected_out = await self.quote(
+            self.token_address,
+            self.bsc_config.wallet.currency_to_spend_address,
+            amount_in,
+            gas_price
+        )
+        min_tokens = int(expected_out.get("tokens_out") * (100 - Decimal(slippage_percent)) / 100)
+        deadline = int(time.time()) + deadline_seconds
 
         tx = await self.router_contract.functions.swapExactTokensForETH(
             amount_in,
             min_tokens,
-            path,
+            expected_out['path'],
             wallet_address,
             deadline
         ).build_transaction({
             'chainId': int(self.bsc_config.token_analyze_url_id),
             'from': wallet_address,
             'gas': 250000,
-            'gasPrice': await self.w3.eth.gas_price,
-            'nonce': nonce+1
+            'gasPrice': gas_price,
+            'nonce': nonce
         })
-
         signed_tx = self.w3.eth.account.sign_transaction(tx, self.bsc_config.wallet.private_key)
-        swap_tx_hash = await self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-        receipt = await self.w3.eth.wait_for_transaction_receipt(swap_tx_hash)
-        tx_analysis = await analyzer.analyze_failed_transaction(swap_tx_hash, receipt)
-        logger.info(f"Analyze receipt: \n{tx_analysis}")
+
         return {
-            'transaction_hash': swap_tx_hash.hex(),
-            'status': receipt['status'],
-            'gas_used': receipt['gasUsed'],
-            'amount_in': str(amount),
+            'raw_transaction': self.w3.to_hex(signed_tx.raw_transaction),
+            'transaction_hash': self.w3.to_hex(signed_tx.hash),
+            'nonce': nonce,
+            'deadline': deadline,
+            'amount_in': amount_in,
             'min_tokens_out': min_tokens,
-            'expected_out': self.w3.from_wei(expected_out.get("tokens_out"), "ether"),
+            'tokens_out': expected_out.get("tokens_out"),
             'sell_price': expected_out.get("prices", {}).get("execution_price", "0.0")
         }
 
+    async def send_raw_transaction(
+            self,
+            raw_transaction: str,
+            on_broadcast: Callable[[Dict[str, Any]], Awaitable[None]] | None = None
+    ) -> Dict[str, Any]:
+        """
+        Broadcast an already signed transaction and wait for its receipt
+
+        Only the BSC config is loaded, so this is the whole emergency sell path.
+        on_broadcast is called with the transaction hash before waiting
+        """
+        if getattr(self, 'w3', None) is None:
+            self.bsc_config = await BSCConfig.get_config()
+            self.rpc_nodes = self.bsc_config.rpc_nodes.split(" ")
+            self.w3 = self._initialize_web3()
+
+        tx_hash = await self.broadcast_transaction(raw_transaction)
+        if on_broadcast:
+            await on_broadcast({'transaction_hash': self.w3.to_hex(tx_hash)})
+        receipt = await self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        if not receipt['status']:
+            analyze_transaction_failure.send(self.w3.to_hex(tx_hash))
+        return {
+            'transaction_hash': tx_hash.hex(),
+            'status': receipt['status'],
+            'gas_used': receipt['gasUsed']
+        }
+
+    async def broadcast_transaction(self, raw_transaction: str | bytes):
+        """Send a signed transaction to all RPC nodes and private relays at once"""
+        relays = self.bsc_config.private_relay_urls.split(" ") if self.bsc_config.private_relay_urls else []
+        broadcaster = TransactionBroadcaster(self.rpc_nodes + relays)
+        return await broadcaster.broadcast(raw_transaction)
+
     async def get_token_balance(self, token_address: str) -> int:
         token_contract = self.w3.eth.contract(
             address=self.w3.to_checksum_address(token_address),
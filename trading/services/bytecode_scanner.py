@@ -0,0 +1,146 @@
+import logging
+from typing import Dict, Optional, Set
+
+from web3 import AsyncWeb3, Web3
+
+from ..models.currency import Currency
+from ..models.provider_configs import BSCConfig
+
+logger = logging.getLogger('trading')
+
+SELFDESTRUCT = 0xff
+DELEGATECALL = 0xf4
+PUSH1 = 0x60
+PUSH3 = 0x62
+PUSH4 = 0x63
+PUSH32 = 0x7f
+
+
+def _selector(signature: str) -> int:
+    return int.from_bytes(Web3.keccak(text=signature)[:4], "big")
+
+
+# Functions that let the owner block holders, stop trading or change taxes
+RISKY_SELECTORS = {
+    _selector(signature): risk
+    for risk, signatures in {
+        "blacklist": [
+            "blacklist(address)", "addToBlacklist(address)", "setBlacklist(address,bool)",
+            "blacklistAddress(address,bool)", "addBots(address[])", "setBots(address[])",
+            "setBot(address,bool)", "addBot(address)"
+        ],
+        "pause": ["pause()", "setTradingEnabled(bool)", "enableTrading(bool)", "setTradingStatus(bool)"],
+        "set_fee": [
+            "setFee(uint256)", "setFees(uint256,uint256)", "setTaxFee(uint256)", "setSellFee(uint256)",
+            "setBuyFee(uint256)", "setTaxFeePercent(uint256)", "updateFees(uint256,uint256)"
+        ],
+    }.items()
+    for signature in signatures
+}
+
+# Found in plenty of legitimate tokens, reported without rejecting
+WARNING_SELECTORS = {
+    _selector("mint(address,uint256)"): "owner_mint",
+    _selector("mint(uint256)"): "owner_mint",
+    _selector("setMaxTxAmount(uint256)"): "max_tx_modifiable",
+}
+
+
+class BytecodeScanner:
+    """
+    Reject obvious scam tokens from their runtime bytecode alone
+
+    Code is fetched once with eth_getCode and scan results are cached by code
+    hash, so clones of an already scanned contract cost a single RPC call.
+    Clones of currencies rejected for security reasons are rejected as well,
+    standard template tokens rejected for their market share the code of
+    legitimate ones.
+    """
+
+    # Shared by all scanners of the process
+    _scans: Dict[str, Dict] = {}
+    _w3: Optional[AsyncWeb3] = None
+    _w3_endpoint: Optional[str] = None
+
+    @classmethod
+    def get_w3(cls, endpoint: str) -> AsyncWeb3:
+        """Client of the process, rebuilt only when the RPC endpoint changes"""
+        if cls._w3 is None or cls._w3_endpoint != endpoint:
+            cls._w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(endpoint))
+            cls._w3_endpoint = endpoint
+        return cls._w3
+
+    @staticmethod
+    def instructions(code: bytes):
+        """Yield (opcode, push data) for every instruction, skipping push data"""
+        i = 0
+        while i < len(code):
+            opcode = code[i]
+            if PUSH1 <= opcode <= PUSH32:
+                size = opcode - PUSH1 + 1
+                yield opcode, code[i + 1:i + 1 + size]
+                i += 1 + size
+            else:
+                yield opcode, b""
+                i += 1
+
+    @staticmethod
+    def strip_metadata(code: bytes) -> bytes:
+        """Drop the CBOR metadata solc appends, its bytes aren't instructions"""
+        if len(code) < 2:
+            return code
+        metadata_length = int.from_bytes(code[-2:], "big")
+        if metadata_length + 2 < len(code) and code[-metadata_length - 2] in (0xa1, 0xa2, 0xa3):
+            return code[:-metadata_length - 2]
+        return code
+
+    @classmethod
+    def analyze_code(cls, code: bytes) -> Dict:
+        """Find risky opcodes and function selectors in runtime bytecode"""
+        code = cls.strip_metadata(code)
+        opcodes: Set[int] = set()
+        selectors: Set[int] = set()
+        for opcode, data in cls.instructions(code):
+            opcodes.add(opcode)
+            # Selectors with a leading zero byte are pushed with PUSH3
+            if opcode in (PUSH3, PUSH4):
+                selectors.add(int.from_bytes(data, "big"))
+
+        risks = sorted({risk for selector, risk in RISKY_SELECTORS.items() if selector in selectors})
+        warnings = sorted({risk for selector, risk in WARNING_SELECTORS.items() if selector in selectors})
+        if SELFDESTRUCT in opcodes:
+            risks.append("selfdestruct")
+        if DELEGATECALL in opcodes:
+            risks.append("delegatecall")
+
+        return {'safe': not risks, 'risks': risks, 'warnings': warnings}
+
+    async def scan(self, token_address: str) -> Dict:
+        """
+        Scan token bytecode
+
+        Returns:
+            dict with safe flag, risks causing rejection, warnings and code hash
+        """
+        bsc_config = await BSCConfig.get_config()
+        w3 = self.get_w3(bsc_config.rpc_nodes.split(" ")[0])
+        code = bytes(await w3.eth.get_code(w3.to_checksum_address(token_address)))
+        if not code:
+            return {'safe': False, 'risks': ["no_code"], 'warnings': [], 'code_hash': None}
+
+        code_hash = w3.to_hex(w3.keccak(code))
+        if code_hash not in self._scans:
+            self._scans[code_hash] = self.analyze_code(code)
+        result = {**self._scans[code_hash], 'code_hash': code_hash}
+
+        clone_of = await Currency.objects.filter(
+            code_hash=code_hash,
+            status='REJECTED',
+            rejection_category='SECURITY'
+        ).exclude(address=token_address).values_list('address', flat=True).afirst()
+        if clone_of:
+            result['risks'] = result['risks'] + [f"clone_of_rejected:{clone_of}"]
+            result['safe'] = False
+
+        logger.debug(f"Bytecode scan of {token_address}: {result}")
+        return result
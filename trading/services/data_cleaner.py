@@ -0,0 +1,125 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from ..models.config import AutoTradingConfig
+from ..models.currency import Currency
+from ..models.price_candle import PriceCandle
+from ..models.trade import Trade
+
+logger = logging.getLogger('trading')
+
+
+class DataCleaner:
+    """
+    Delete old trades and currencies in small primary key ordered chunks
+
+    Every chunk is its own short statement, so locks are held briefly and
+    monitoring queries keep running between chunks. A run stops when its
+    time budget is spent, the next run picks up where it stopped
+    """
+
+    # Pause between chunks, gives other queries a turn
+    chunk_pause = 0.05
+
+    config: AutoTradingConfig
+
+    def __init__(self, archive: Optional[bool] = None, time_budget: Optional[float] = None):
+        self.archive = archive
+        self.time_budget = time_budget
+        self.run_id = timezone.now().strftime("%Y%m%d%H%M%S")
+
+    async def get_configs(self):
+        self.config = await AutoTradingConfig.get_config()
+        if self.archive is None:
+            self.archive = self.config.archive_old_data
+        if self.time_budget is None:
+            self.time_budget = self.config.cleanup_time_budget_seconds
+
+    def querysets(self) -> Dict[str, QuerySet]:
+        """Expired rows per table, trades first so currencies rarely cascade to them"""
+        cutoff = timezone.now() - timedelta(days=self.config.retention_days)
+        return {
+            'trades': Trade.objects.filter(status='SOLD', sell_timestamp__lt=cutoff),
+            'currencies': Currency.objects.filter(
+                status__in=['SOLD', 'REJECTED', 'ERROR'],
+                updated_at__lt=cutoff
+            ),
+            'price_candles': PriceCandle.objects.filter(
+                minute__lt=timezone.now() - timedelta(days=self.config.price_candle_retention_days)
+            ),
+        }
+
+    def archive_path(self, name: str) -> str:
+        return os.path.join(settings.ARCHIVE_ROOT, f"{name}-{self.run_id}.jsonl.gz")
+
+    def write_archive(self, name: str, rows: List[Dict]):
+        os.makedirs(settings.ARCHIVE_ROOT, exist_ok=True)
+        with gzip.open(self.archive_path(name), "at", encoding="utf-8") as file:
+            for row in rows:
+                file.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+
+    async def delete_chunk(self, name: str, queryset: QuerySet) -> int:
+        """Archive and delete the next chunk, returns the number of rows it had"""
+        chunk = queryset.order_by("pk")[:self.config.cleanup_chunk_size]
+        if self.archive:
+            rows = [row async for row in chunk.values()]
+            if not rows:
+                return 0
+            ids = [row["id"] for row in rows]
+            if queryset.model is Currency:
+                # Trades of these currencies go with them through the cascade
+                trades = [row async for row in Trade.objects.filter(currency_id__in=ids).values()]
+                if trades:
+                    await asyncio.to_thread(self.write_archive, 'trades', trades)
+            await asyncio.to_thread(self.write_archive, name, rows)
+        else:
+            ids = [pk async for pk in chunk.values_list("pk", flat=True)]
+            if not ids:
+                return 0
+        await queryset.model.objects.filter(pk__in=ids).adelete()
+        return len(ids)
+
+    async def run(self) -> Dict[str, Dict]:
+        """
+        Returns:
+            Deleted rows, seconds spent and rows per second per table, and
+            whether the time budget ran out before everything was deleted
+        """
+        await self.get_configs()
+        started = time.perf_counter()
+        deadline = started + self.time_budget
+        report = {}
+        for name, queryset in self.querysets().items():
+            table_started = time.perf_counter()
+            deleted = 0
+            finished = False
+            while time.perf_counter() < deadline:
+                count = await self.delete_chunk(name, queryset)
+                deleted += count
+                if count < self.config.cleanup_chunk_size:
+                    finished = True
+                    break
+                await asyncio.sleep(self.chunk_pause)
+            seconds = time.perf_counter() - table_started
+            report[name] = {
+                'deleted': deleted,
+                'seconds': seconds,
+                'rows_per_second': deleted / seconds if seconds else 0,
+                'finished': finished
+            }
+            logger.info(
+                f"Cleanup {name}: {deleted} rows in {seconds:.1f} s "
+                f"({report[name]['rows_per_second']:.0f} rows/s){'' if finished else ', budget spent'}"
+            )
+        return report
@@ -0,0 +1,131 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import Lower
+
+from ..models.currency import Currency
+from ..models.deployer import Deployer
+from ..models.token_security import TokenSecurity
+from ..models.trade import Trade
+
+logger = logging.getLogger('trading')
+
+# Outcome -> Deployer counter it increments, 'rejected' is a rejection for security reasons
+OUTCOME_FIELDS = {
+    'rejected': 'rejected_count',
+    'loss': 'loss_count',
+    'rug': 'rug_count',
+    'profit': 'profit_count',
+}
+
+
+class DeployerIndex:
+    """
+    Outcomes of past tokens per deployer wallet
+
+    Counters are kept on the Deployer row, so checking a new listing is a
+    single lookup by the unique address
+    """
+
+    @staticmethod
+    async def link(currency: Currency, addresses: Iterable[Optional[str]]) -> List[Deployer]:
+        """Record addresses as deployers of a currency, counting the token once per deployer"""
+        deployers = []
+        for address in {address.lower() for address in addresses if address}:
+            deployer, _ = await Deployer.objects.aget_or_create(address=address)
+            if not await currency.deployers.filter(pk=deployer.pk).aexists():
+                await currency.deployers.aadd(deployer)
+                await Deployer.objects.filter(pk=deployer.pk).aupdate(tokens_count=F('tokens_count') + 1)
+                deployer.tokens_count += 1
+            deployers.append(deployer)
+        return deployers
+
+    @staticmethod
+    async def creator(token_address: str) -> Optional[str]:
+        """Contract creator from the stored GoPlus data, never calls the API"""
+        security = await TokenSecurity.objects.filter(token_address=token_address.lower()).afirst()
+        return security.static_data.get("creator_address") if security else None
+
+    @staticmethod
+    async def lookup(addresses: Iterable[Optional[str]]) -> List[Deployer]:
+        return [
+            deployer async for deployer in Deployer.objects.filter(
+                address__in=[address.lower() for address in addresses if address]
+            )
+        ]
+
+    @staticmethod
+    async def record(currency: Currency, outcome: str):
+        """Count an outcome for every deployer of a currency"""
+        field = OUTCOME_FIELDS[outcome]
+        updated = await Deployer.objects.filter(currencies=currency).aupdate(**{field: F(field) + 1})
+        logger.debug(f"Recorded {outcome} of {currency.symbol} for {updated} deployers")
+
+    @classmethod
+    async def record_sell(cls, trade: Trade):
+        if trade.sell_reason == 'RUG_DETECTED':
+            outcome = 'rug'
+        elif trade.profit_loss is not None and trade.profit_loss < 0:
+            outcome = 'loss'
+        else:
+            outcome = 'profit'
+        await cls.record(trade.currency, outcome)
+
+    @staticmethod
+    def history(deployers: List[Deployer]) -> Dict:
+        """
+        Earlier tokens of the deployers of one currency
+
+        Counters of linked deployers already include that currency, so it is
+        subtracted from tokens
+        """
+        tokens = sum(max(deployer.tokens_count - 1, 0) for deployer in deployers)
+        rejected = sum(deployer.rejected_count for deployer in deployers)
+        return {
+            'tokens': tokens,
+            'bad': sum(deployer.bad_count for deployer in deployers),
+            'rejected_percent': min(rejected / tokens * 100, 100) if tokens else 0,
+            'blocked': any(deployer.blocked for deployer in deployers)
+        }
+
+    @classmethod
+    async def rebuild(cls) -> int:
+        """
+        Link contract creators of stored GoPlus data and recount all outcomes
+
+        Returns:
+            Number of deployers
+        """
+        currencies = {
+            currency.address.lower(): currency async for currency in
+            Currency.objects.annotate(address_lower=Lower("address")).filter(
+                address_lower__in=TokenSecurity.objects.values("token_address")
+            )
+        }
+        async for security in TokenSecurity.objects.filter(token_address__in=list(currencies)):
+            await cls.link(currencies[security.token_address], [security.static_data.get("creator_address")])
+
+        sells = Q(currencies__trade__status='SOLD')
+        async for deployer in Deployer.objects.annotate(
+            tokens=Count('currencies', distinct=True),
+            rejected=Count('currencies', filter=Q(
+                currencies__status='REJECTED',
+                currencies__rejection_category='SECURITY'
+            ), distinct=True),
+            rugs=Count('currencies__trade', filter=sells & Q(currencies__trade__sell_reason='RUG_DETECTED')),
+            losses=Count('currencies__trade', filter=sells & Q(currencies__trade__profit_loss__lt=0) & ~Q(
+                currencies__trade__sell_reason='RUG_DETECTED'
+            )),
+            profits=Count('currencies__trade', filter=sells & Q(currencies__trade__profit_loss__gte=0) & ~Q(
+                currencies__trade__sell_reason='RUG_DETECTED'
+            ))
+        ):
+            await Deployer.objects.filter(pk=deployer.pk).aupdate(
+                tokens_count=deployer.tokens,
+                rejected_count=deployer.rejected,
+                rug_count=deployer.rugs,
+                loss_count=deployer.losses,
+                profit_count=deployer.profits
+            )
+        return await Deployer.objects.acount()
@@ -0,0 +1,159 @@
+import logging
+import time
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from django.utils import timezone
+
+from ..models.config import AutoTradingConfig
+from ..models.trade import Trade
+from .bsc_trade import BSCTradingService
+
+logger = logging.getLogger('trading')
+
+PRESIGNED_FIELDS = [
+    "presigned_sell_tx",
+    "presigned_sell_nonce",
+    "presigned_sell_deadline",
+    "presigned_sell_expected_out",
+    "presigned_sell_price",
+    "presigned_sell_updated_at",
+]
+
+
+class ExitPresigner:
+    """
+    Maintain a ready-to-broadcast sell transaction for open trades
+
+    All signed sells share the wallet's pending nonce, so once any transaction
+    from the wallet is mined the others become invalid and get re-signed
+    """
+
+    # Re-sign when less than this many seconds remain until the deadline
+    deadline_margin = 60
+
+    async def is_stale(self, trade: Trade, trader: BSCTradingService, config: AutoTradingConfig) -> bool:
+        """Check whether the stored transaction can still be broadcast as is"""
+        if not trade.presigned_sell_tx:
+            return True
+
+        if trade.presigned_sell_deadline - time.time() < self.deadline_margin:
+            logger.info(f"Pre-signed sell for trade {trade.id} is close to its deadline")
+            return True
+
+        wallet_address = trader.w3.to_checksum_address(trader.bsc_config.wallet.address)
+        nonce = await trader.w3.eth.get_transaction_count(wallet_address, 'pending')
+        if nonce != trade.presigned_sell_nonce:
+            logger.info(f"Pre-signed sell for trade {trade.id} nonce moved {trade.presigned_sell_nonce} -> {nonce}")
+            return True
+
+        amount_in = await trader.get_token_balance(trader.token_address)
+        expected_out = await trader.quote(
+            trader.token_address,
+            trader.bsc_config.wallet.currency_to_spend_address,
+            amount_in
+        )
+        stored_out = Decimal(trade.presigned_sell_expected_out or 0)
+        if not stored_out:
+            return True
+        change = abs(Decimal(expected_out['tokens_out']) - stored_out) / stored_out * 100
+        if change > config.presign_reserve_threshold_percent:
+            logger.info(f"Pre-signed sell for trade {trade.id} expected output moved {change:.2f}%")
+            return True
+
+        return False
+
+    async def refresh(self, trade: Trade, config: AutoTradingConfig) -> bool:
+        """
+        Re-sign the exit transaction of a trade if it is missing or stale
+
+        Returns:
+            True if a new transaction was stored
+        """
+        trader = BSCTradingService(trade.currency.address)
+        await trader.get_configs()
+        if not await self.is_stale(trade, trader, config):
+            return False
+
+        presigned = await trader.presign_sell(
+            deadline_seconds=config.presign_deadline_seconds,
+            slippage_percent=config.presign_slippage_percent
+        )
+        trade.presigned_sell_tx = presigned['raw_transaction']
+        trade.presigned_sell_nonce = presigned['nonce']
+        trade.presigned_sell_deadline = presigned['deadline']
+        trade.presigned_sell_expected_out = Decimal(presigned['tokens_out'])
+        trade.presigned_sell_price = Decimal(str(presigned['sell_price']))
+        trade.presigned_sell_updated_at = timezone.now()
+        await trade.asave(update_fields=PRESIGNED_FIELDS)
+        logger.info(f"Pre-signed sell for trade {trade.id} refreshed: {presigned['transaction_hash']}")
+        return True
+
+    @staticmethod
+    async def invalidate_nonce(nonce: int) -> int:
+        """Drop every stored transaction signed with the given nonce"""
+        return await Trade.objects.filter(presigned_sell_nonce=nonce).aupdate(**{field: None for field in PRESIGNED_FIELDS})
+
+    async def broadcast(
+            self,
+            trade: Trade,
+            trader: BSCTradingService,
+            on_broadcast: Callable[[Dict[str, Any]], Awaitable[None]] | None = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Send the stored sell transaction of a trade
+
+        Args:
+            on_broadcast: Called like in BSCTradingService.sell once the transaction is sent
+
+        Returns:
+            Order details in the format of BSCTradingService.sell or None if the
+            stored transaction can't be used and a regular sell is needed
+
+        Raises:
+            Exception: if the transaction was sent but its receipt can't be read,
+                a regular sell could then sell the tokens twice
+        """
+        if not trade.presigned_sell_tx or trade.presigned_sell_deadline <= time.time():
+            return None
+
+        nonce = trade.presigned_sell_nonce
+        raw_transaction = trade.presigned_sell_tx
+        expected_out = trade.presigned_sell_expected_out
+        sell_price = trade.presigned_sell_price
+        for field in PRESIGNED_FIELDS:
+            setattr(trade, field, None)
+
+        sent = False
+
+        async def record(order: Dict[str, Any]):
+            nonlocal sent
+            sent = True
+            # The nonce is spent now, no other trade can use its signed transaction
+            await self.invalidate_nonce(nonce)
+            if on_broadcast:
+                order.update(
+                    nonce=nonce,
+                    expected_out=str(Decimal(expected_out) / Decimal('1e18')),
+                    sell_price=str(sell_price)
+                )
+                await on_broadcast(order)
+
+        try:
+            result = await trader.send_raw_transaction(raw_transaction, on_broadcast=record)
+        except Exception as e:
+            if sent:
+                raise
+            logger.warning(f"Pre-signed sell for trade {trade.id} rejected: {e}")
+            await self.invalidate_nonce(nonce)
+            return None
+
+        if not result['status']:
+            logger.warning(f"Pre-signed sell for trade {trade.id} reverted: {result['transaction_hash']}")
+            return None
+
+        result.update({
+            'expected_out': Decimal(expected_out) / Decimal('1e18'),
+            'sell_price': sell_price
+        })
+        return result
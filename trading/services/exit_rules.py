@@ -0,0 +1,109 @@
+import logging
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+
+import redis.asyncio as redis
+from django.conf import settings
+
+from ..models.config import AutoTradingConfig
+from ..models.trade import Trade
+
+logger = logging.getLogger('trading')
+
+INTENT_KEY = "trading:sell_intent:{trade_id}"
+
+
+class ExitRuleEvaluator:
+    """
+    Exit rules of open trades evaluated on prices already in memory
+
+    Called explicitly by the price update paths. A sell intent is claimed with
+    an idempotency key per trade, so a trade seen by several monitors is only
+    sent to execute_sell once while the key lives
+    """
+
+    # Long enough for execute_sell to move the trade out of BOUGHT
+    intent_ttl = 300
+
+    def __init__(self, config: AutoTradingConfig):
+        self.config = config
+
+    @staticmethod
+    def reason(
+            entry_price: Decimal,
+            price: Decimal,
+            peak: Decimal,
+            max_price_drop_percent: Decimal,
+            profit_target_multiplier: Decimal
+    ) -> Optional[str]:
+        """Sell reason for a price, None to keep holding"""
+        peak = max(peak or price, price)
+        drop_from_peak = (peak - price) / peak * 100 if peak else 0
+        if drop_from_peak >= max_price_drop_percent:
+            return 'DROP_FROM_PEAK'
+        if price < entry_price:
+            return 'BELOW_ENTRY'
+        if price >= entry_price * profit_target_multiplier:
+            return 'PROFIT_TARGET'
+        return None
+
+    def evaluate(self, trade: Trade, price: Decimal) -> Optional[str]:
+        return self.reason(
+            trade.entry_price,
+            price,
+            trade.currency.price_peak,
+            self.config.max_price_drop_percent,
+            self.config.profit_target_multiplier
+        )
+
+    def evaluate_many(self, prices: Iterable[Tuple[Trade, Decimal]]) -> List[Tuple[Trade, str]]:
+        """(trade, sell reason) for every trade that hit an exit rule"""
+        exits = []
+        for trade, price in prices:
+            reason = self.evaluate(trade, price)
+            if reason:
+                exits.append((trade, reason))
+        return exits
+
+    async def claim(self, exits: List[Tuple[Trade, str]]) -> List[Tuple[Trade, str]]:
+        """
+        Claim the idempotency key of every exit
+
+        Returns:
+            Exits claimed by this call, exits of trades with a live intent are dropped
+        """
+        if not exits:
+            return []
+        try:
+            client = redis.from_url(settings.REDIS_URL)
+            async with client.pipeline(transaction=False) as pipe:
+                for trade, reason in exits:
+                    pipe.set(INTENT_KEY.format(trade_id=trade.id), reason, nx=True, ex=self.intent_ttl)
+                claimed = await pipe.execute()
+            await client.aclose()
+        except Exception as e:
+            # Better a duplicate sell intent than a missed exit
+            logger.warning(f"Can't claim sell intents, sending all: {e}")
+            return exits
+
+        result = []
+        for (trade, reason), ok in zip(exits, claimed):
+            if ok:
+                result.append((trade, reason))
+            else:
+                logger.debug(f"Sell intent of trade {trade.id} already claimed, skipping {reason}")
+        return result
+
+    async def sell_intents(self, prices: Iterable[Tuple[Trade, Decimal]]) -> List[Tuple[Trade, str]]:
+        """Evaluate exit rules and keep the exits not already being sold"""
+        return await self.claim(self.evaluate_many(prices))
+
+    @staticmethod
+    async def release(trade_id: int):
+        """Drop the intent of a trade whose sell failed, so the rules can fire again"""
+        try:
+            client = redis.from_url(settings.REDIS_URL)
+            await client.delete(INTENT_KEY.format(trade_id=trade_id))
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Can't release sell intent of trade {trade_id}: {e}")
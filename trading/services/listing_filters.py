@@ -0,0 +1,436 @@
+import asyncio
+import logging
+import time
+from decimal import Decimal
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis.asyncio as redis
+from django.conf import settings
+
+from ..models.config import AutoTradingConfig
+from ..models.currency import Currency
+from ..models.deployer import Deployer
+from .bytecode_scanner import BytecodeScanner
+from .deployer_index import DeployerIndex
+from .listing_score import ListingScorer
+from .onchain_analyzer import OnchainAnalyzer
+from .transfer_indexer import TokenLedger, TransferIndexer
+from .pancakeswap import PancakeSwapMonitor
+
+logger = logging.getLogger('trading')
+
+STATS_KEY = "trading:listing_filters"
+
+# (currency status, error message, Currency rejection category)
+Rejection = Tuple[str, str, str]
+
+
+class ListingContext:
+    """
+    Data about a listing shared by all filters
+
+    Every piece of data is fetched at most once, by the first filter that
+    needs it, and fetches still running when the pipeline stops are cancelled
+    """
+
+    def __init__(
+            self,
+            currency: Currency,
+            monitor: PancakeSwapMonitor,
+            config: AutoTradingConfig,
+            deployers: Iterable[str] = ()
+    ):
+        self.currency = currency
+        self.monitor = monitor
+        self.config = config
+        self.deployers = list(deployers)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self, name: str) -> asyncio.Task:
+        if name not in self._tasks:
+            self._tasks[name] = asyncio.create_task(getattr(self, f"fetch_{name}")())
+        return self._tasks[name]
+
+    async def get(self, name: str):
+        return await self.start(name)
+
+    def result(self, name: str):
+        """Fetched data, None if it wasn't fetched or failed"""
+        task = self._tasks.get(name)
+        if not task or not task.done() or task.cancelled() or task.exception():
+            return None
+        return task.result()
+
+    def cancel(self):
+        for task in self._tasks.values():
+            task.cancel()
+
+    async def fetch_deployers(self) -> List[Deployer]:
+        # Liquidity adder of the listing and the contract creator GoPlus reported, both from the DB
+        creator = await DeployerIndex.creator(self.currency.address)
+        return await DeployerIndex.link(self.currency, self.deployers + [creator])
+
+    async def fetch_bytecode(self) -> Optional[Dict]:
+        try:
+            return await BytecodeScanner().scan(self.currency.address)
+        except Exception as e:
+            logger.warning(f"Bytecode scan of {self.currency.symbol} failed: {e}")
+            return None
+
+    async def fetch_cached_security(self) -> Optional[Dict]:
+        return await self.monitor.cached_token_contract(self.currency.address)
+
+    async def fetch_security(self) -> Dict:
+        return await self.monitor.analyze_token_contract(self.currency.address)
+
+    async def fetch_ledger(self) -> TokenLedger:
+        return await TransferIndexer().sync(self.currency)
+
+    async def fetch_liquidity(self) -> Optional[Decimal]:
+        try:
+            return await OnchainAnalyzer().pool_liquidity_usd(self.currency.address)
+        except Exception as e:
+            logger.warning(f"On-chain liquidity of {self.currency.symbol} failed: {e}")
+            return None
+
+    async def fetch_transfers(self) -> Optional[int]:
+        try:
+            return (await self.get("ledger")).transfer_count
+        except Exception as e:
+            logger.warning(f"Transfer index of {self.currency.symbol} failed, using BscScan: {e}")
+            return await self.monitor.get_token_transfers_count(self.currency.address)
+
+    async def fetch_score(self) -> Decimal:
+        # Runs after the remote filters, so every input of the feature vector is fetched
+        await self.get("security")
+        for name in ("ledger", "liquidity", "transfers"):
+            try:
+                await self.get(name)
+            except Exception:
+                pass
+        score = await ListingScorer().score(self.currency.address, self.analysis(), self.currency)
+        return Decimal(str(round(score, 4)))
+
+    def analysis(self) -> Optional[Dict]:
+        """Security analysis with the transfers count, as stored in Currency.analyze_data"""
+        security = self.result("security") or self.result("cached_security")
+        if security is None:
+            return None
+        analysis = dict(security)
+        # On-chain values are current as of the latest block, indexers lag behind
+        liquidity = self.result("liquidity")
+        if liquidity is not None:
+            analysis['liquidity'] = liquidity
+        ledger = self.result("ledger")
+        if ledger is not None:
+            exclude = (self.currency.pool_address,) if self.currency.pool_address else ()
+            analysis['holder_count'] = ledger.holder_count
+            analysis['top10_holders_percent'] = ledger.concentration(10, exclude=exclude)
+        transactions_count = self.result("transfers")
+        if transactions_count is not None:
+            analysis.update({"transactions_count": transactions_count, "total_transfers": transactions_count})
+        score = self.result("score")
+        if score is not None:
+            analysis['score'] = score
+        return analysis
+
+
+class ListingFilter:
+    """
+    A single listing check
+
+    Filters run in stages of increasing cost, filters of the same stage run
+    concurrently. requires names the ListingContext data the check reads.
+    """
+    name = ""
+    cost = 0
+    requires: Tuple[str, ...] = ()
+
+    SECURITY = 'SECURITY'
+    MARKET = 'MARKET'
+
+    async def check(self, ctx: ListingContext) -> Optional[Rejection]:
+        raise NotImplementedError
+
+
+class DeployerFilter(ListingFilter):
+    name = "deployer"
+    cost = -1
+    requires = ("deployers",)
+
+    async def check(self, ctx):
+        history = DeployerIndex.history(await ctx.get("deployers"))
+        if history['blocked']:
+            return 'REJECTED', 'Deployer is blocked', self.SECURITY
+        limit = ctx.config.max_deployer_bad_tokens
+        if limit and history['bad'] >= limit:
+            return 'REJECTED', f"Deployer has {history['bad']} rejected, lost or rugged tokens", self.SECURITY
+        return None
+
+
+class BytecodeFilter(ListingFilter):
+    name = "bytecode"
+    cost = 0
+    requires = ("bytecode",)
+
+    async def check(self, ctx):
+        scan = await ctx.get("bytecode")
+        if scan and not scan['safe']:
+            return 'REJECTED', f"Bytecode scan: {', '.join(scan['risks'])}", self.SECURITY
+        return None
+
+
+class CachedSecurityFilter(ListingFilter):
+    """Security and liquidity checks on GoPlus data already cached, passes when nothing is cached"""
+    name = "cached_security"
+    cost = 0
+    requires = ("cached_security",)
+
+    async def check(self, ctx):
+        security = await ctx.get("cached_security")
+        if security is None:
+            return None
+        if not ctx.monitor._is_token_safe(security):
+            return 'REJECTED', 'Failed security checks', self.SECURITY
+        liquidity = security.get('liquidity')
+        if liquidity is not None and Decimal(str(liquidity)) < ctx.config.min_liquidity_usd:
+            return 'REJECTED', 'Insufficient liquidity', self.MARKET
+        return None
+
+
+class TransfersFilter(ListingFilter):
+    name = "transfers"
+    cost = 1
+    requires = ("transfers",)
+
+    async def check(self, ctx):
+        transactions_count = await ctx.get("transfers")
+        if not transactions_count:
+            return 'MANUAL', f'Transactions count is {transactions_count}', self.MARKET
+        if not ctx.config.max_transactions_count > transactions_count > ctx.config.min_transactions_count:
+            return 'REJECTED', f'Transactions count is {transactions_count}', self.MARKET
+        return None
+
+
+class SecurityFilter(ListingFilter):
+    name = "security"
+    cost = 1
+    requires = ("security",)
+
+    async def check(self, ctx):
+        if not ctx.monitor._is_token_safe(await ctx.get("security")):
+            return 'REJECTED', 'Failed security checks', self.SECURITY
+        return None
+
+
+class LiquidityFilter(ListingFilter):
+    name = "liquidity"
+    cost = 1
+    requires = ("liquidity",)
+
+    async def check(self, ctx):
+        liquidity = await ctx.get("liquidity")
+        if liquidity is None:
+            # Fall back to the liquidity GoPlus reports, failed analyses are left to SecurityFilter
+            liquidity = (await ctx.get("security")).get('liquidity')
+        if liquidity is not None and Decimal(str(liquidity)) < ctx.config.min_liquidity_usd:
+            return 'REJECTED', 'Insufficient liquidity', self.MARKET
+        return None
+
+
+class ScoreFilter(ListingFilter):
+    name = "score"
+    cost = 2
+    requires = ("score",)
+
+    async def check(self, ctx):
+        score = await ctx.get("score")
+        if ctx.config.min_listing_score is not None and score < ctx.config.min_listing_score:
+            return 'REJECTED', f'Listing score {score:.2f} is below {ctx.config.min_listing_score}', self.MARKET
+        return None
+
+
+DEFAULT_FILTERS = [DeployerFilter(), BytecodeFilter(), CachedSecurityFilter(), TransfersFilter(), SecurityFilter(), LiquidityFilter(), ScoreFilter()]
+
+
+class ListingFilterPipeline:
+    """
+    Run listing filters cheapest stage first and stop at the first rejection
+
+    Per-filter runs, rejections and latency are accumulated in a Redis hash so
+    they can be compared across workers, see the listing_filter_stats command
+    """
+
+    def __init__(self, monitor: PancakeSwapMonitor, config: AutoTradingConfig, filters: List[ListingFilter] = None):
+        self.monitor = monitor
+        self.config = config
+        self.filters = sorted(filters or DEFAULT_FILTERS, key=lambda listing_filter: listing_filter.cost)
+
+    @staticmethod
+    async def _run_filter(listing_filter: ListingFilter, ctx: ListingContext, timings: Dict) -> Tuple[ListingFilter, Optional[Rejection]]:
+        started = time.perf_counter()
+        rejection = await listing_filter.check(ctx)
+        timings[listing_filter.name] = (time.perf_counter() - started, rejection is not None)
+        return listing_filter, rejection
+
+    async def run(
+            self,
+            currency: Currency,
+            deployers: Iterable[str] = (),
+            min_cost: Optional[int] = None,
+            max_cost: Optional[int] = None
+    ) -> Dict:
+        """
+        Check a listing
+
+        Args:
+            currency: the new currency
+            deployers: addresses that created the token or its pair
+            min_cost: skip filters cheaper than this
+            max_cost: skip filters more expensive than this
+
+        Returns:
+            dict with rejection (status, reason, category) or None, the failed filter name,
+            the security analysis and the bytecode scan, whichever were fetched
+        """
+        ctx = ListingContext(currency, self.monitor, self.config, deployers)
+        filters = [
+            listing_filter for listing_filter in self.filters
+            if (min_cost is None or listing_filter.cost >= min_cost)
+            and (max_cost is None or listing_filter.cost <= max_cost)
+        ]
+        timings: Dict[str, Tuple[float, bool]] = {}
+        rejection = None
+        failed_filter = None
+        try:
+            for _, stage in groupby(filters, key=lambda listing_filter: listing_filter.cost):
+                stage = list(stage)
+                # Start all fetches of the stage together, filters sharing data await the same task
+                for listing_filter in stage:
+                    for name in listing_filter.requires:
+                        ctx.start(name)
+                tasks = [asyncio.create_task(self._run_filter(listing_filter, ctx, timings)) for listing_filter in stage]
+                try:
+                    for next_done in asyncio.as_completed(tasks):
+                        listing_filter, rejection = await next_done
+                        if rejection:
+                            failed_filter = listing_filter.name
+                            break
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                if rejection:
+                    break
+        finally:
+            ctx.cancel()
+            await self.record_stats(timings)
+
+        return {
+            'rejection': rejection,
+            'filter': failed_filter,
+            'analysis': ctx.analysis(),
+            'bytecode': ctx.result("bytecode")
+        }
+
+    @staticmethod
+    async def record_stats(timings: Dict[str, Tuple[float, bool]]):
+        if not timings:
+            return
+        logger.debug("Listing filters: " + ", ".join(
+            f"{name} {latency * 1000:.0f} ms{' rejected' if rejected else ''}"
+            for name, (latency, rejected) in timings.items()
+        ))
+        try:
+            client = redis.from_url(settings.REDIS_URL)
+            async with client.pipeline(transaction=False) as pipe:
+                for name, (latency, rejected) in timings.items():
+                    pipe.hincrby(STATS_KEY, f"{name}:runs", 1)
+                    pipe.hincrby(STATS_KEY, f"{name}:rejections", int(rejected))
+                    pipe.hincrbyfloat(STATS_KEY, f"{name}:latency", latency)
+                await pipe.execute()
+            await client.aclose()
+        except Exception as e:
+            logger.debug(f"Can't record listing filter stats: {e}")
+
+    @staticmethod
+    async def get_stats() -> Dict[str, Dict]:
+        """Runs, rejection rate and mean latency per filter"""
+        client = redis.from_url(settings.REDIS_URL)
+        raw = await client.hgetall(STATS_KEY)
+        await client.aclose()
+
+        values: Dict[str, Dict[str, float]] = {}
+        for key, value in raw.items():
+            name, field = key.decode().rsplit(":", 1)
+            values.setdefault(name, {})[field] = float(value)
+
+        stats = {}
+        for name, value in values.items():
+            runs = int(value.get("runs", 0))
+            stats[name] = {
+                'runs': runs,
+                'rejections': int(value.get("rejections", 0)),
+                'rejection_rate': value.get("rejections", 0) / runs * 100 if runs else 0,
+                'mean_latency_ms': value.get("latency", 0) / runs * 1000 if runs else 0
+            }
+        return stats
+
+    @staticmethod
+    async def reset_stats():
+        client = redis.from_url(settings.REDIS_URL)
+        await client.delete(STATS_KEY)
+        await client.aclose()
+
+
+class ListingAdmission:
+    """
+    Decide on a new listing from local data only
+
+    Runs the filters up to ADMISSION_COST: deployer reputation, bytecode scan
+    and GoPlus data already cached by monitor_new_listings. Listings passing
+    them with cached security data are bought right away once they also pass
+    BUY_FILTERS, the rest wait for the remote filters in the deep analysis stage.
+    """
+
+    ADMISSION_COST = 0
+    # Gate every buy, the remaining remote filters of a listing bought at admission run after the buy
+    BUY_FILTERS = [TransfersFilter(), ScoreFilter()]
+
+    BUY = "BUY"
+    REJECT = "REJECT"
+    DEFER = "DEFER"
+
+    def __init__(self, monitor: PancakeSwapMonitor, config: AutoTradingConfig):
+        self.monitor = monitor
+        self.config = config
+        self.pipeline = ListingFilterPipeline(monitor, config)
+
+    async def admit(self, currency: Currency, deployers: Iterable[str] = ()) -> Dict:
+        """
+        Returns:
+            pipeline result of the local filters with the decision
+        """
+        started = time.perf_counter()
+        result = await self.pipeline.run(currency, deployers, max_cost=self.ADMISSION_COST)
+        if result['rejection']:
+            result['decision'] = self.REJECT
+        elif self.config.deep_analysis_policy == 'UNCERTAIN' and result['analysis'] is not None:
+            checks = await ListingFilterPipeline(self.monitor, self.config, self.BUY_FILTERS).run(currency, deployers)
+            result.update(
+                rejection=checks['rejection'],
+                filter=checks['filter'],
+                analysis=checks['analysis'] or result['analysis'],
+                decision=self.REJECT if checks['rejection'] else self.BUY
+            )
+        else:
+            result['decision'] = self.DEFER
+        logger.info(
+            f"Admission of {currency.symbol}: {result['decision']} "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return result
+
+    async def analyze(self, currency: Currency, deployers: Iterable[str] = ()) -> Dict:
+        """Run the remote filters skipped by admission"""
+        return await self.pipeline.run(currency, deployers, min_cost=self.ADMISSION_COST + 1)
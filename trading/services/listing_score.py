@@ -0,0 +1,160 @@
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.config import AutoTradingConfig
+from ..models.currency import Currency
+from ..models.deployer import Deployer
+from ..models.listing_features import ListingFeatures
+from .deployer_index import DeployerIndex
+
+logger = logging.getLogger('trading')
+
+# GoPlus flags, missing values count as set like in PancakeSwapMonitor._is_token_safe
+RISK_FLAGS = (
+    "is_honeypot",
+    "can_take_back_ownership",
+    "owner_change_balance",
+    "selfdestruct",
+    "trading_cooldown",
+    "personal_slippage_modifiable",
+    "transfer_pausable",
+    "cannot_buy",
+    "external_call",
+    "slippage_modifiable",
+    "is_anti_whale",
+    "anti_whale_modifiable",
+    "is_whitelisted",
+    "is_blacklisted",
+    "is_proxy",
+    "cannot_sell_all",
+)
+
+# Column order of every stored vector, append only and bump FEATURE_VERSION
+FEATURES = (
+    "not_open_source",
+    *RISK_FLAGS,
+    "buy_tax",
+    "sell_tax",
+    "log_liquidity",
+    "log_transfers",
+    "log_holders",
+    "top10_holders_percent",
+    "deployer_tokens",
+    "deployer_rejected_percent",
+)
+FEATURE_VERSION = 1
+
+DEFAULT_WEIGHTS = {
+    "not_open_source": -10.0,
+    **{flag: -10.0 for flag in RISK_FLAGS},
+    "buy_tax": -0.5,
+    "sell_tax": -0.5,
+    "log_liquidity": 2.0,
+    "log_transfers": 0.5,
+    "log_holders": 1.0,
+    "top10_holders_percent": -0.05,
+    "deployer_tokens": -0.1,
+    "deployer_rejected_percent": -0.05,
+}
+
+
+def _flag(value) -> float:
+    return 1.0 if value is None else float(bool(value))
+
+
+def _number(value, default: float = 0.0) -> float:
+    try:
+        return float(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _log(value) -> float:
+    return math.log10(1 + max(_number(value), 0.0))
+
+
+def build_features(analysis: Dict, deployer_history: Optional[Dict] = None) -> np.ndarray:
+    """Feature vector of a listing from its analysis dict as stored in Currency.analyze_data"""
+    deployer_history = deployer_history or {}
+    values = {
+        "not_open_source": 1.0 - _flag(analysis.get("is_open_source", False)),
+        **{flag: _flag(analysis.get(flag)) for flag in RISK_FLAGS},
+        "buy_tax": _number(analysis.get("buy_tax"), 100.0),
+        "sell_tax": _number(analysis.get("sell_tax"), 100.0),
+        "log_liquidity": _log(analysis.get("liquidity")),
+        "log_transfers": _log(analysis.get("transactions_count")),
+        "log_holders": _log(analysis.get("holder_count")),
+        "top10_holders_percent": _number(analysis.get("top10_holders_percent"), 100.0),
+        "deployer_tokens": _number(deployer_history.get("tokens")),
+        "deployer_rejected_percent": _number(deployer_history.get("rejected_percent")),
+    }
+    return np.array([values[name] for name in FEATURES], dtype=np.float64)
+
+
+class LinearScoreModel:
+    """Weighted sum of features, weights missing from the mapping are zero"""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, bias: float = 0.0):
+        weights = weights or DEFAULT_WEIGHTS
+        self.weights = np.array([float(weights.get(name, 0.0)) for name in FEATURES], dtype=np.float64)
+        self.bias = bias
+
+    def score(self, matrix: np.ndarray) -> np.ndarray:
+        """Scores of every row of a (listings x features) matrix"""
+        return np.atleast_2d(matrix) @ self.weights + self.bias
+
+
+class ListingScorer:
+    """Build, store and score listing feature vectors"""
+
+    def __init__(self, model: Optional[LinearScoreModel] = None):
+        self.model = model
+
+    async def get_model(self) -> LinearScoreModel:
+        if self.model is None:
+            config = await AutoTradingConfig.get_config()
+            weights = config.listing_score_weights or {}
+            self.model = LinearScoreModel({**DEFAULT_WEIGHTS, **weights}, float(weights.get("bias", 0.0)))
+        return self.model
+
+    @staticmethod
+    async def deployer_history(currency: Optional[Currency]) -> Dict:
+        """Tokens of the same deployers seen before and the share of them that were rejected"""
+        if currency is None:
+            return {}
+        deployers = [deployer async for deployer in Deployer.objects.filter(currencies=currency)]
+        if not deployers:
+            return {}
+        return DeployerIndex.history(deployers)
+
+    async def score(self, token_address: str, analysis: Dict, currency: Optional[Currency] = None) -> float:
+        """Build the feature vector of a listing, store it and return its score"""
+        vector = build_features(analysis, await self.deployer_history(currency))
+        score = float((await self.get_model()).score(vector)[0])
+        await ListingFeatures.objects.aupdate_or_create(
+            token_address=token_address.lower(),
+            defaults={
+                'currency': currency,
+                'version': FEATURE_VERSION,
+                'vector': vector.tobytes(),
+                'score': score
+            }
+        )
+        return score
+
+    @staticmethod
+    def load_matrix(rows: Iterable[ListingFeatures]) -> Tuple[List[str], np.ndarray]:
+        """Stack stored vectors of the current layout into a (listings x features) matrix"""
+        addresses = []
+        vectors = []
+        for row in rows:
+            if row.version != FEATURE_VERSION:
+                continue
+            addresses.append(row.token_address)
+            vectors.append(np.frombuffer(bytes(row.vector), dtype=np.float64))
+        if not vectors:
+            return addresses, np.empty((0, len(FEATURES)))
+        return addresses, np.vstack(vectors)
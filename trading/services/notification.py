@@ -147,12 +147,7 @@ class NotificationService:
     async def notify_all_users(self, message: str):
         """Send message to all active users"""
         try:
-            users = TelegramUser.objects.filter(
-                is_active=True,
-                notification_enabled=True
-            )
-            
-            async for user in users:
+            async for user in TelegramUser.objects.notifiable():
                 try:
                     await self.bot.send_message(
                         chat_id=user.telegram_id,
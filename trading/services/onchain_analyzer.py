@@ -0,0 +1,97 @@
+import logging
+from decimal import Decimal
+from typing import Dict, Optional
+
+from web3 import AsyncWeb3
+
+from ..models.currency import Currency
+from ..models.provider_configs import BSCConfig
+from .route_finder import RouteFinder
+from .transfer_indexer import TokenLedger, TransferIndexer
+
+logger = logging.getLogger('trading')
+
+STABLECOINS = ("USDT", "BUSD")
+
+
+class OnchainAnalyzer:
+    """
+    Pool liquidity and holder count computed from chain data only
+
+    Liquidity is priced from cached pair reserves with WBNB valued by the
+    WBNB/stablecoin pool, holders come from the TransferIndexer balances
+    """
+
+    # Shared by all analyzers of the process
+    route_finder = RouteFinder()
+
+    bsc_config: BSCConfig
+    w3: AsyncWeb3
+    known_tokens: Dict[str, str]
+
+    async def get_configs(self):
+        self.bsc_config = await BSCConfig.get_config()
+        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(self.bsc_config.rpc_nodes.split(" ")[0]))
+        self.known_tokens = {
+            name: self.w3.to_checksum_address(address)
+            for name, address in (item.split(",") for item in self.bsc_config.known_tokens.split(" "))
+        }
+
+    def _usd_value(self, token: str, amount: int) -> Optional[Decimal]:
+        """USD value of amount wei of a known token, known tokens on BSC have 18 decimals"""
+        value = Decimal(amount) / Decimal(10 ** 18)
+        if any(self.known_tokens.get(name) == token for name in STABLECOINS):
+            return value
+        if token == self.known_tokens.get("WBNB"):
+            bnb_price = self.bnb_usd_price()
+            return value * bnb_price if bnb_price else None
+        return None
+
+    def bnb_usd_price(self) -> Optional[Decimal]:
+        """WBNB price from the cached WBNB/stablecoin reserves"""
+        wbnb = self.known_tokens.get("WBNB")
+        for name in STABLECOINS:
+            reserves = self.route_finder.get_reserves(wbnb, self.known_tokens.get(name))
+            if reserves and reserves[0]:
+                return Decimal(reserves[1]) / Decimal(reserves[0])
+        return None
+
+    async def pool_liquidity_usd(self, token_address: str) -> Decimal:
+        """Total USD liquidity of token pairs with known tokens"""
+        await self.get_configs()
+        token = self.w3.to_checksum_address(token_address)
+        await self.route_finder.load_pairs(
+            self.w3,
+            self.bsc_config.factory_address,
+            token,
+            self.known_tokens.values()
+        )
+
+        liquidity = Decimal('0')
+        for known_token in self.known_tokens.values():
+            reserves = self.route_finder.get_reserves(known_token, token)
+            if not reserves:
+                continue
+            value = self._usd_value(known_token, reserves[0])
+            if value is not None:
+                # Both sides of a constant product pool hold equal value
+                liquidity += value * 2
+        return liquidity
+
+    async def holder_count(self, token_address: str) -> int:
+        """Number of addresses holding a non-zero balance, from the Transfer index"""
+        currency = await Currency.objects.aget(address=token_address)
+        ledger = await TransferIndexer().sync(currency)
+        return ledger.holder_count
+
+    async def analyze(self, currency: Currency, ledger: Optional[TokenLedger] = None) -> Dict:
+        """Liquidity, holders and top 10 holders share of a currency"""
+        if ledger is None:
+            ledger = await TransferIndexer().sync(currency)
+        liquidity = await self.pool_liquidity_usd(currency.address)
+        exclude = (currency.pool_address,) if currency.pool_address else ()
+        return {
+            'liquidity': liquidity,
+            'holder_count': ledger.holder_count,
+            'top10_holders_percent': ledger.concentration(10, exclude=exclude)
+        }
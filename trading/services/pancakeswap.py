@@ -12,6 +12,8 @@ import httpx
 
 from ..models.provider_configs import BSCConfig
 from ..models.config import AutoTradingConfig
+from .onchain_analyzer import OnchainAnalyzer
+from .token_security import TokenSecurityService
 
 logger = logging.getLogger('trading')
 
@@ -34,9 +36,14 @@ class PancakeSwapMonitor:
 
     def __init__(self):
         self.current_rpc_index = 0
+        self.w3 = None
+        self.w3_endpoint = None
+        self.router_abi = []
+        self.router_abi_address = None
 
         self.token_abi = self._load_token_abi()
         self.ps = PancakeSwapAPI()
+        self.security = TokenSecurityService()
         self.factory_abi = [
             # Get Pair
             {
@@ -144,15 +151,21 @@ class PancakeSwapMonitor:
 
     def _initialize_web3(self) -> AsyncWeb3:
         """Initialize AsyncWeb3 with current RPC node"""
-        return AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(self.rpc_nodes[self.current_rpc_index]))
+        self.w3_endpoint = self.rpc_nodes[self.current_rpc_index]
+        return AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(self.w3_endpoint))
 
     async def get_configs(self):
         self.config = await AutoTradingConfig.get_config()
         self.bsc_config = await BSCConfig.get_config()
         self.rpc_nodes = self.bsc_config.rpc_nodes.split(" ")
         self.known_tokens = self._load_known_tokens()
-        self.w3 = self._initialize_web3()
-        self.router_abi = await self._load_router_abi()
+        # A worker keeps one monitor, web3 and the router ABI are only rebuilt when the config changes
+        self.current_rpc_index %= len(self.rpc_nodes)
+        if self.w3 is None or self.w3_endpoint != self.rpc_nodes[self.current_rpc_index]:
+            self.w3 = self._initialize_web3()
+        if not self.router_abi or self.router_abi_address != self.bsc_config.router_address:
+            self.router_abi = await self._load_router_abi()
+            self.router_abi_address = self.bsc_config.router_address
         self.router = self.w3.eth.contract(
             address=AsyncWeb3.to_checksum_address(self.bsc_config.router_address),
             abi=self.router_abi
@@ -278,6 +291,7 @@ class PancakeSwapMonitor:
                         'initial_price': f"{initial_price:.8f}",
                         'pool_address': pool_address,
                         'transaction_hash': tx['hash'],
+                        'deployer': tx.get('from'),
                         'decimals': token_info.get('decimals', 18),
                         'total_supply': token_info.get('total_supply', 0)
                     })
@@ -927,78 +941,90 @@ class PancakeSwapMonitor:
                 logger.error(f"Error getting token transfers count: {e}")
                 return None
 
-    async def analyze_token_contract(self, token_address: str) -> Dict:
+    def _parse_token_security(self, token_data: Dict) -> Dict:
+        """Convert a raw GoPlus token_security result into analysis fields"""
+        return {
+            'is_open_source': token_data.get("is_open_source") == "1" if token_data.get(
+                "is_open_source") is not None else None,
+            'is_honeypot': token_data.get("is_honeypot") == "1" if token_data.get(
+                "is_honeypot") is not None else None,
+            'cannot_buy': token_data.get("cannot_buy") == "1" if token_data.get(
+                "cannot_buy") is not None else None,
+            'can_take_back_ownership': token_data.get("can_take_back_ownership") == "1" if token_data.get(
+                "can_take_back_ownership") is not None else None,
+            'owner_change_balance': token_data.get("owner_change_balance") == "1" if token_data.get(
+                "owner_change_balance") is not None else None,
+            'selfdestruct': token_data.get("selfdestruct") == "1" if token_data.get(
+                "selfdestruct") is not None else None,
+            'external_call': token_data.get("external_call") == "1" if token_data.get(
+                "external_call") is not None else None,
+            'trading_cooldown': token_data.get("trading_cooldown") == "1" if token_data.get(
+                "trading_cooldown") is not None else None,
+            'personal_slippage_modifiable': token_data.get(
+                "personal_slippage_modifiable") == "1" if token_data.get(
+                "personal_slippage_modifiable") is not None else None,
+            'slippage_modifiable': token_data.get("slippage_modifiable") == "1" if token_data.get(
+                "slippage_modifiable") is not None else None,
+            'transfer_pausable': token_data.get("transfer_pausable") == "1" if token_data.get(
+                "transfer_pausable") is not None else None,
+            'is_blacklisted': token_data.get("is_blacklisted") == "1" if token_data.get(
+                "is_blacklisted") is not None else None,
+            'is_anti_whale': token_data.get("is_anti_whale") == "1" if token_data.get(
+                "is_anti_whale") is not None else None,
+            'anti_whale_modifiable': token_data.get("anti_whale_modifiable") == "1" if token_data.get(
+                "anti_whale_modifiable") is not None else None,
+            'is_whitelisted': token_data.get("is_whitelisted") == "1" if token_data.get(
+                "is_whitelisted") is not None else None,
+            'is_proxy': token_data.get("is_proxy") == "1" if token_data.get("is_proxy") is not None else None,
+            'cannot_sell_all': token_data.get("cannot_sell_all") == "1" if token_data.get(
+                "cannot_sell_all") is not None else None,
+            'buy_tax': token_data.get("buy_tax", float(0)),
+            'sell_tax': token_data.get("sell_tax", float(0)),
+            'total_supply': token_data.get("total_supply", "0"),
+            'holder_count': token_data.get("holder_count", "0"),
+            'DEX': token_data.get("dex", [{}])[0].get("name"),
+            'liquidity': self._get_pool_liquidity(token_data.get("dex", [{}]))
+        }
+
+    async def analyze_token_contracts(self, token_addresses: List[str]) -> Dict[str, Dict]:
+        """Analyze security of several token contracts, keyed by lowercase address"""
         await self.get_configs()
-        """Analyze token contract security"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://api.gopluslabs.io/api/v1/token_security/{self.bsc_config.token_analyze_url_id}",
-                    params={
-                        "contract_addresses": token_address
-                    }
-                )
-
-                data = response.json()
+            results = await self.security.get_many(token_addresses, self.bsc_config.token_analyze_url_id)
+        except Exception as e:
+            logger.error(f"Error analyzing contracts: {e}")
+            return {
+                address.lower(): {'is_open_source': False, 'is_honeypot': True, 'error': str(e)}
+                for address in token_addresses
+            }
 
-            if data["code"] == 1 and token_address.lower() in data["result"]:
-                token_data = data["result"][token_address.lower()]
-                return {
-                    'is_open_source': token_data.get("is_open_source") == "1" if token_data.get(
-                        "is_open_source") is not None else None,
-                    'is_honeypot': token_data.get("is_honeypot") == "1" if token_data.get(
-                        "is_honeypot") is not None else None,
-                    'cannot_buy': token_data.get("cannot_buy") == "1" if token_data.get(
-                        "cannot_buy") is not None else None,
-                    'can_take_back_ownership': token_data.get("can_take_back_ownership") == "1" if token_data.get(
-                        "can_take_back_ownership") is not None else None,
-                    'owner_change_balance': token_data.get("owner_change_balance") == "1" if token_data.get(
-                        "owner_change_balance") is not None else None,
-                    'selfdestruct': token_data.get("selfdestruct") == "1" if token_data.get(
-                        "selfdestruct") is not None else None,
-                    'external_call': token_data.get("external_call") == "1" if token_data.get(
-                        "external_call") is not None else None,
-                    'trading_cooldown': token_data.get("trading_cooldown") == "1" if token_data.get(
-                        "trading_cooldown") is not None else None,
-                    'personal_slippage_modifiable': token_data.get(
-                        "personal_slippage_modifiable") == "1" if token_data.get(
-                        "personal_slippage_modifiable") is not None else None,
-                    'slippage_modifiable': token_data.get("slippage_modifiable") == "1" if token_data.get(
-                        "slippage_modifiable") is not None else None,
-                    'transfer_pausable': token_data.get("transfer_pausable") == "1" if token_data.get(
-                        "transfer_pausable") is not None else None,
-                    'is_blacklisted': token_data.get("is_blacklisted") == "1" if token_data.get(
-                        "is_blacklisted") is not None else None,
-                    'is_anti_whale': token_data.get("is_anti_whale") == "1" if token_data.get(
-                        "is_anti_whale") is not None else None,
-                    'anti_whale_modifiable': token_data.get("anti_whale_modifiable") == "1" if token_data.get(
-                        "anti_whale_modifiable") is not None else None,
-                    'is_whitelisted': token_data.get("is_whitelisted") == "1" if token_data.get(
-                        "is_whitelisted") is not None else None,
-                    'is_proxy': token_data.get("is_proxy") == "1" if token_data.get("is_proxy") is not None else None,
-                    'cannot_sell_all': token_data.get("cannot_sell_all") == "1" if token_data.get(
-                        "cannot_sell_all") is not None else None,
-                    'buy_tax': token_data.get("buy_tax", float(0)),
-                    'sell_tax': token_data.get("sell_tax", float(0)),
-                    'total_supply': token_data.get("total_supply", "0"),
-                    'holder_count': token_data.get("holder_count", "0"),
-                    'DEX': token_data.get("dex", [{}])[0].get("name"),
-                    'liquidity': self._get_pool_liquidity(token_data.get("dex", [{}]))
+        analyses = {}
+        for address, token_data in results.items():
+            if not token_data:
+                analyses[address] = {
+                    'is_open_source': False,
+                    'is_honeypot': True,
+                    'error': 'Unable to analyze contract'
                 }
+                continue
+            try:
+                analyses[address] = self._parse_token_security(token_data)
+            except Exception as e:
+                logger.error(f"Error analyzing contract {address}: {e}")
+                analyses[address] = {'is_open_source': False, 'is_honeypot': True, 'error': str(e)}
+        return analyses
 
-            return {
-                'is_open_source': False,
-                'is_honeypot': True,
-                'error': 'Unable to analyze contract'
-            }
+    async def cached_token_contract(self, token_address: str) -> Optional[Dict]:
+        """Token security analysis from fresh cached GoPlus data only, None if not cached"""
+        await self.get_configs()
+        cached = await self.security.get_cached([token_address], self.bsc_config.token_analyze_url_id)
+        token_data = cached.get(token_address.lower())
+        return self._parse_token_security(token_data) if token_data else None
 
-        except Exception as e:
-            logger.error(f"Error analyzing contract: {e}")
-            return {
-                'is_open_source': False,
-                'is_honeypot': True,
-                'error': str(e)
-            }
+    async def analyze_token_contract(self, token_address: str) -> Dict:
+        """Analyze token contract security"""
+        analyses = await self.analyze_token_contracts([token_address])
+        return analyses[token_address.lower()]
 
     @staticmethod
     def _get_pool_liquidity(dex_data: List[Dict]) -> Decimal:
@@ -1017,26 +1043,9 @@ class PancakeSwapMonitor:
             return Decimal('0')
 
     async def get_holder_count(self, token_address: str) -> int:
-        await self.get_configs()
         """Get number of token holders"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    self.bsc_config.main_api_url,
-                    params={
-                        "module": "token",
-                        "action": "tokenholderlist",
-                        "contractaddress": token_address,
-                        "apikey": settings.BSCSCAN_API_KEY,
-                        "page": "1",
-                        "offset": "1"
-                    }
-                )
-
-                data = response.json()
-            if data["status"] == "1":
-                return int(data.get("result", [{"count": "0"}])[0]["count"])
-            return 0
+            return await OnchainAnalyzer().holder_count(token_address)
 
         except Exception as e:
             logger.error(f"Error getting holder count: {e}")
@@ -1195,7 +1204,7 @@ class PancakeSwapMonitor:
             if data["status"] != "1":
                 return []
 
-            liquidity_events = []
+            candidates = []
             for tx in data["result"]:
                 try:
                     if not self._is_liquidity_addition(tx):
@@ -1227,17 +1236,25 @@ class PancakeSwapMonitor:
                     if not await self._verify_lp_token(pool_address):
                         continue
 
-                    # Get token data with found pool
-                    token_data = await self._get_token_data(new_token, pool_address, tx)
-                    if not token_data:
-                        continue
-
-                    liquidity_events.append(token_data)
+                    candidates.append((new_token, pool_address, tx))
 
                 except Exception as e:
                     logger.debug(f"Error processing tx {tx.get('hash')}: {e}")
                     continue
 
+            # Load security of all tokens in batched requests, _get_token_data then reads the cache
+            await self.analyze_token_contracts([new_token for new_token, _, _ in candidates])
+
+            liquidity_events = []
+            for new_token, pool_address, tx in candidates:
+                try:
+                    # Get token data with found pool
+                    token_data = await self._get_token_data(new_token, pool_address, tx)
+                    if token_data:
+                        liquidity_events.append(token_data)
+                except Exception as e:
+                    logger.debug(f"Error processing tx {tx.get('hash')}: {e}")
+
             return liquidity_events
 
         except Exception as e:
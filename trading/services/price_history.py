@@ -0,0 +1,177 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from django.utils import timezone
+
+from ..models.config import AutoTradingConfig
+from ..models.price_candle import PriceCandle
+from ..models.price_tick import PriceTick
+from ..models.trade import Trade
+
+logger = logging.getLogger('trading')
+
+
+def _minute(timestamp: datetime) -> datetime:
+    return timestamp.replace(second=0, microsecond=0)
+
+
+class PriceHistory:
+    """
+    Per currency price path from raw ticks and one minute candles
+
+    Recent prices stay as raw ticks, older ones are folded into candles
+    a few minutes at a time. Windows always cover whole minutes, so a
+    candle is built from all of its ticks at once
+    """
+
+    # Minutes of ticks folded per statement
+    window_minutes = 10
+    delete_chunk_size = 1000
+
+    config: AutoTradingConfig
+
+    async def get_configs(self):
+        self.config = await AutoTradingConfig.get_config()
+
+    @staticmethod
+    def build_candles(ticks: List[PriceTick]) -> Dict[Tuple[int, datetime], PriceCandle]:
+        """Candles by (currency id, minute) from ticks ordered by timestamp"""
+        candles = {}
+        for tick in ticks:
+            key = (tick.currency_id, _minute(tick.timestamp))
+            candle = candles.get(key)
+            if candle is None:
+                candles[key] = PriceCandle(
+                    currency_id=tick.currency_id,
+                    minute=key[1],
+                    open=tick.price,
+                    high=tick.price,
+                    low=tick.price,
+                    close=tick.price,
+                    ticks=1
+                )
+            else:
+                candle.high = max(candle.high, tick.price)
+                candle.low = min(candle.low, tick.price)
+                candle.close = tick.price
+                candle.ticks += 1
+        return candles
+
+    async def _merge_existing(self, candles: Dict[Tuple[int, datetime], PriceCandle]):
+        """Fold candles already stored for the same minutes into the new ones"""
+        minutes = {minute for _, minute in candles}
+        existing = PriceCandle.objects.filter(
+            currency_id__in={currency_id for currency_id, _ in candles},
+            minute__gte=min(minutes),
+            minute__lte=max(minutes)
+        )
+        async for stored in existing:
+            candle = candles.get((stored.currency_id, stored.minute))
+            if candle is None:
+                continue
+            candle.open = stored.open
+            candle.high = max(candle.high, stored.high)
+            candle.low = min(candle.low, stored.low)
+            candle.ticks += stored.ticks
+
+    async def downsample(self) -> Dict:
+        """
+        Replace ticks older than price_tick_retention_hours with candles
+
+        Returns:
+            dict: folded ticks and written candles
+        """
+        await self.get_configs()
+        cutoff = _minute(timezone.now() - timedelta(hours=self.config.price_tick_retention_hours))
+        summary = {'ticks': 0, 'candles': 0}
+
+        while True:
+            oldest = await PriceTick.objects.filter(timestamp__lt=cutoff).order_by("timestamp").afirst()
+            if oldest is None:
+                break
+            window_end = min(_minute(oldest.timestamp) + timedelta(minutes=self.window_minutes), cutoff)
+            ticks = [
+                tick async for tick in PriceTick.objects.filter(timestamp__lt=window_end).order_by("timestamp", "pk")
+            ]
+            candles = self.build_candles(ticks)
+            await self._merge_existing(candles)
+            await PriceCandle.objects.abulk_create(
+                candles.values(),
+                update_conflicts=True,
+                unique_fields=["currency", "minute"],
+                update_fields=["open", "high", "low", "close", "ticks"]
+            )
+
+            ids = [tick.pk for tick in ticks]
+            for i in range(0, len(ids), self.delete_chunk_size):
+                await PriceTick.objects.filter(pk__in=ids[i:i + self.delete_chunk_size]).adelete()
+            summary['ticks'] += len(ticks)
+            summary['candles'] += len(candles)
+
+        logger.info(f"Downsampled {summary['ticks']} price ticks into {summary['candles']} candles")
+        return summary
+
+    @staticmethod
+    def path_stats(trade: Trade, points: List[Tuple[datetime, Decimal, Decimal]]) -> Dict:
+        """
+        Max drawdown and time to peak of a trade
+
+        Args:
+            points: (timestamp, high, low) ordered by timestamp, raw ticks have high == low
+
+        Returns:
+            dict: max_drawdown_percent from the running peak and time_to_peak
+            from the buy, the peak starts at the entry price
+        """
+        peak, peak_at = trade.entry_price, trade.buy_timestamp
+        max_drawdown = Decimal(0)
+        for timestamp, high, low in points:
+            # Within a candle the low may come before the high, measure against the peak so far
+            if peak:
+                max_drawdown = max(max_drawdown, (peak - low) / peak * 100)
+            if high > peak:
+                peak, peak_at = high, timestamp
+        return {
+            'max_drawdown_percent': max_drawdown,
+            'peak_price': peak,
+            'time_to_peak': peak_at - trade.buy_timestamp
+        }
+
+    async def trade_paths(self, trades: List[Trade]) -> Dict[int, Dict]:
+        """
+        path_stats of many closed trades from two queries
+
+        Returns:
+            path_stats by trade id, trades without recorded prices are left out
+        """
+        trades = [trade for trade in trades if trade.sell_timestamp]
+        if not trades:
+            return {}
+        currency_ids = {trade.currency_id for trade in trades}
+        start = min(trade.buy_timestamp for trade in trades)
+        end = max(trade.sell_timestamp for trade in trades)
+
+        points = defaultdict(list)
+        candles = PriceCandle.objects.filter(
+            currency_id__in=currency_ids, minute__gte=_minute(start), minute__lte=end
+        ).values_list("currency_id", "minute", "high", "low")
+        async for currency_id, minute, high, low in candles:
+            points[currency_id].append((minute, high, low))
+        ticks = PriceTick.objects.filter(
+            currency_id__in=currency_ids, timestamp__gte=start, timestamp__lte=end
+        ).values_list("currency_id", "timestamp", "price")
+        async for currency_id, timestamp, price in ticks:
+            points[currency_id].append((timestamp, price, price))
+
+        stats = {}
+        for trade in trades:
+            path = sorted(
+                point for point in points.get(trade.currency_id, [])
+                if _minute(trade.buy_timestamp) <= point[0] <= trade.sell_timestamp
+            )
+            if path:
+                stats[trade.id] = self.path_stats(trade, path)
+        return stats
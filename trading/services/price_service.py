@@ -15,7 +15,7 @@ logger = logging.getLogger('trading')
 
 
 class PriceService:
-    def __init__(self):
+    def __init__(self, monitor: Optional[PancakeSwapMonitor] = None):
         self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(settings.BSC_RPC_URL))
 
         # PancakeSwap pair ABI minimal for price checks
@@ -50,7 +50,7 @@ class PriceService:
                 "type": "function"
             }
         ]
-        self.monitor = PancakeSwapMonitor()
+        self.monitor = monitor or PancakeSwapMonitor()
 
     async def _get_pair_address(self, token_a: str, token_b: str) -> Optional[Address]:
         await self.monitor.get_configs()
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from web3 import AsyncWeb3
+
+logger = logging.getLogger('trading')
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Same constant product fee as BSCTradingService.calculate_tokens_out
+FEE_NUMERATOR = 998
+FEE_DENOMINATOR = 1000
+
+# Rough gas usage of a router swap: fixed part plus every additional pair hop
+BASE_SWAP_GAS = 110000
+HOP_GAS = 60000
+
+PAIR_ABI = [
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "getReserves",
+        "outputs": [
+            {"name": "_reserve0", "type": "uint112"},
+            {"name": "_reserve1", "type": "uint112"},
+            {"name": "_blockTimestampLast", "type": "uint32"}
+        ],
+        "type": "function"
+    },
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "token0",
+        "outputs": [{"name": "", "type": "address"}],
+        "type": "function"
+    }
+]
+
+FACTORY_ABI = [
+    {
+        "constant": True,
+        "inputs": [
+            {"name": "tokenA", "type": "address"},
+            {"name": "tokenB", "type": "address"}
+        ],
+        "name": "getPair",
+        "outputs": [{"name": "pair", "type": "address"}],
+        "type": "function"
+    }
+]
+
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int) -> int:
+    """Output of a single constant product hop"""
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    amount_in_with_fee = amount_in * FEE_NUMERATOR
+    return (amount_in_with_fee * reserve_out) // (reserve_in * FEE_DENOMINATOR + amount_in_with_fee)
+
+
+class RouteFinder:
+    """
+    Pick the best 1- or 2-hop swap path over a graph of cached PancakeSwap pairs.
+
+    Reserves are kept in memory per direction so evaluating a route is a couple of
+    dict lookups and integer operations, cheap enough to run for every order.
+    Pairs of the max_tokens most recently quoted tokens are kept, older ones are evicted.
+    """
+
+    def __init__(
+            self,
+            pair_ttl: float = 15.0,
+            missing_pair_ttl: float = 300.0,
+            max_tokens: int = 500,
+            base_swap_gas: int = BASE_SWAP_GAS,
+            hop_gas: int = HOP_GAS
+    ):
+        self.pair_ttl = pair_ttl
+        self.missing_pair_ttl = missing_pair_ttl
+        self.max_tokens = max_tokens
+        self.base_swap_gas = base_swap_gas
+        self.hop_gas = hop_gas
+        # (token_in, token_out) -> (reserve_in, reserve_out)
+        self._reserves: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self._neighbours: Dict[str, set] = {}
+        # Pair address and token0 never change, so they are fetched only once
+        self._pair_meta: Dict[frozenset, Tuple[str, str]] = {}
+        # A missing pair can be created later, so it is looked up again after missing_pair_ttl
+        self._missing_since: Dict[frozenset, float] = {}
+        self._updated_at: Dict[frozenset, float] = {}
+        # Quoted tokens, least recently used first
+        self._tokens: OrderedDict = OrderedDict()
+
+    def set_pair(self, token_a: str, token_b: str, reserve_a: int, reserve_b: int):
+        """Store reserves of a pair in both directions"""
+        self._reserves[(token_a, token_b)] = (reserve_a, reserve_b)
+        self._reserves[(token_b, token_a)] = (reserve_b, reserve_a)
+        self._neighbours.setdefault(token_a, set()).add(token_b)
+        self._neighbours.setdefault(token_b, set()).add(token_a)
+        self._updated_at[frozenset((token_a, token_b))] = time.monotonic()
+
+    def get_reserves(self, token_in: str, token_out: str) -> Optional[Tuple[int, int]]:
+        return self._reserves.get((token_in, token_out))
+
+    def is_fresh(self, token_a: str, token_b: str) -> bool:
+        updated_at = self._updated_at.get(frozenset((token_a, token_b)))
+        return updated_at is not None and time.monotonic() - updated_at < self.pair_ttl
+
+    def _drop_token(self, token: str):
+        """Forget every pair of token"""
+        for other in self._neighbours.pop(token, set()):
+            self._reserves.pop((token, other), None)
+            self._reserves.pop((other, token), None)
+            neighbours = self._neighbours.get(other)
+            if neighbours is not None:
+                neighbours.discard(token)
+        for cache in (self._pair_meta, self._missing_since, self._updated_at):
+            for key in [key for key in cache if token in key]:
+                del cache[key]
+
+    def _touch(self, token: str):
+        """Mark token as recently quoted and evict the least recently quoted ones over max_tokens"""
+        self._tokens[token] = None
+        self._tokens.move_to_end(token)
+        while len(self._tokens) > self.max_tokens:
+            evicted, _ = self._tokens.popitem(last=False)
+            self._drop_token(evicted)
+
+    async def load_pairs(self, w3: AsyncWeb3, factory_address: str, token: str, known_tokens: Iterable[str]):
+        """Refresh stale pairs between token and known tokens and among known tokens"""
+        known = [w3.to_checksum_address(address) for address in known_tokens]
+        token = w3.to_checksum_address(token)
+        if token not in known:
+            self._touch(token)
+        candidates = [(token, address) for address in known if address != token]
+        candidates += [(a, b) for i, a in enumerate(known) for b in known[i + 1:]]
+
+        stale = [(a, b) for a, b in candidates if not self.is_fresh(a, b)]
+        if not stale:
+            return
+
+        factory = w3.eth.contract(address=w3.to_checksum_address(factory_address), abi=FACTORY_ABI)
+        await asyncio.gather(*(self._load_pair(w3, factory, a, b) for a, b in stale))
+
+    async def _load_pair(self, w3: AsyncWeb3, factory: Any, token_a: str, token_b: str):
+        key = frozenset((token_a, token_b))
+        try:
+            missing_since = self._missing_since.get(key)
+            if missing_since is not None and time.monotonic() - missing_since < self.missing_pair_ttl:
+                self._updated_at[key] = time.monotonic()
+                return
+
+            if key not in self._pair_meta:
+                pair_address = await factory.functions.getPair(token_a, token_b).call()
+                if pair_address == ZERO_ADDRESS:
+                    self._missing_since[key] = self._updated_at[key] = time.monotonic()
+                    return
+                self._missing_since.pop(key, None)
+                pair = w3.eth.contract(address=pair_address, abi=PAIR_ABI)
+                self._pair_meta[key] = (pair_address, await pair.functions.token0().call())
+
+            meta = self._pair_meta[key]
+
+            pair_address, token0 = meta
+            pair = w3.eth.contract(address=pair_address, abi=PAIR_ABI)
+            reserves = await pair.functions.getReserves().call()
+            if token0 == token_a:
+                self.set_pair(token_a, token_b, reserves[0], reserves[1])
+            else:
+                self.set_pair(token_a, token_b, reserves[1], reserves[0])
+
+        except Exception as e:
+            logger.warning(f"Error loading pair {token_a} - {token_b}: {e}")
+
+    def _gas_in_token(self, gas_cost_wei: int, token_out: str, native_token: Optional[str]) -> int:
+        """Convert native gas cost into token_out units using the spot price"""
+        if not gas_cost_wei or not native_token:
+            return 0
+        if token_out == native_token:
+            return gas_cost_wei
+        reserves = self._reserves.get((native_token, token_out))
+        if not reserves or not reserves[0]:
+            return 0
+        return gas_cost_wei * reserves[1] // reserves[0]
+
+    def best_route(
+            self,
+            token_in: str,
+            token_out: str,
+            amount_in: int,
+            gas_price: int = 0,
+            native_token: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Evaluate the direct path and every 2-hop path through a cached neighbour
+
+        Pairs whose reserves are older than pair_ttl, e.g. because their reload
+        failed, are left out
+
+        Args:
+            token_in: Checksum address of the token to spend
+            token_out: Checksum address of the token to receive
+            amount_in: Amount of token_in in wei
+            gas_price: Gas price in wei, 0 to ignore gas
+            native_token: Checksum address of WBNB, used to price gas in token_out
+
+        Returns:
+            dict with path, amounts, gas cost and net output or None if no route exists
+        """
+        reserves = self._reserves
+        updated_at = self._updated_at
+        oldest = time.monotonic() - self.pair_ttl
+        routes: List[Tuple[List[str], List[int]]] = []
+
+        def fresh(token_a: str, token_b: str) -> bool:
+            return updated_at.get(frozenset((token_a, token_b)), oldest) > oldest
+
+        direct = reserves.get((token_in, token_out))
+        if direct and fresh(token_in, token_out):
+            routes.append(([token_in, token_out], [amount_in, get_amount_out(amount_in, *direct)]))
+
+        for middle in self._neighbours.get(token_in, ()):
+            if middle == token_out:
+                continue
+            second = reserves.get((middle, token_out))
+            if not second or not fresh(token_in, middle) or not fresh(middle, token_out):
+                continue
+            middle_out = get_amount_out(amount_in, *reserves[(token_in, middle)])
+            routes.append(([token_in, middle, token_out], [amount_in, middle_out, get_amount_out(middle_out, *second)]))
+
+        best = None
+        for path, amounts in routes:
+            gas = self.base_swap_gas + self.hop_gas * (len(path) - 2)
+            gas_cost = self._gas_in_token(gas * gas_price, token_out, native_token)
+            net_out = amounts[-1] - gas_cost
+            if best is None or net_out > best['net_out']:
+                best = {
+                    'path': path,
+                    'amounts': amounts,
+                    'amount_out': amounts[-1],
+                    'gas': gas,
+                    'gas_cost': gas_cost,
+                    'net_out': net_out
+                }
+
+        return best
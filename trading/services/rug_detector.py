@@ -0,0 +1,329 @@
+import asyncio
+import logging
+from decimal import Decimal
+from itertools import groupby
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import httpx
+from django.conf import settings
+from hexbytes import HexBytes
+from web3 import AsyncWeb3, Web3
+
+from ..models.config import AutoTradingConfig
+from ..models.provider_configs import BSCConfig
+from ..models.trade import Trade
+
+logger = logging.getLogger('trading')
+
+BURN_TOPIC = Web3.to_hex(Web3.keccak(text="Burn(address,uint256,uint256,address)"))
+MINT_TOPIC = Web3.to_hex(Web3.keccak(text="Mint(address,uint256,uint256)"))
+SYNC_TOPIC = Web3.to_hex(Web3.keccak(text="Sync(uint112,uint112)"))
+TRANSFER_TOPIC = Web3.to_hex(Web3.keccak(text="Transfer(address,address,uint256)"))
+
+TOKEN_ABI = [
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "totalSupply",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "type": "function"
+    },
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "owner",
+        "outputs": [{"name": "", "type": "address"}],
+        "type": "function"
+    }
+]
+
+
+def _topic_address(topic) -> str:
+    return "0x" + HexBytes(topic)[-20:].hex()
+
+
+def _words(data) -> List[int]:
+    data = HexBytes(data)
+    return [int.from_bytes(data[i:i + 32], "big") for i in range(0, len(data), 32)]
+
+
+class WatchedPosition:
+    """An open trade and the addresses whose events can rug it"""
+
+    def __init__(self, trade_id: int, token: str, pair: str, deployers: Iterable[str], total_supply: int):
+        self.trade_id = trade_id
+        self.token = token.lower()
+        self.pair = pair.lower()
+        self.deployers: Set[str] = {address.lower() for address in deployers if address and int(address, 16)}
+        self.total_supply = total_supply
+        self.triggered = False
+
+
+class RugDetector:
+    """
+    Find liquidity removals and deployer dumps in pair and token logs
+
+    Works on logs only, so live watching and historical replay share it.
+    Liquidity removed by a Burn is measured against the pair reserves right
+    before it, rebuilt from the Sync the pair emits just before the Burn.
+    Deployer transfers into the pair in a transaction that mints liquidity
+    add liquidity and are not counted as dumps.
+    """
+
+    def __init__(self, liquidity_removal_percent: Decimal, deployer_transfer_percent: Decimal):
+        self.liquidity_removal_percent = Decimal(liquidity_removal_percent)
+        self.deployer_transfer_percent = Decimal(deployer_transfer_percent)
+        self.positions: Dict[str, WatchedPosition] = {}
+        self.by_token: Dict[str, WatchedPosition] = {}
+
+    def watch(self, position: WatchedPosition):
+        self.positions[position.pair] = position
+        self.by_token[position.token] = position
+
+    def unwatch(self, trade_id: int):
+        for position in [p for p in self.positions.values() if p.trade_id == trade_id]:
+            self.positions.pop(position.pair, None)
+            self.by_token.pop(position.token, None)
+
+    @property
+    def pairs(self) -> List[str]:
+        return [Web3.to_checksum_address(pair) for pair in self.positions]
+
+    @property
+    def tokens(self) -> List[str]:
+        return [Web3.to_checksum_address(token) for token in self.by_token]
+
+    @property
+    def deployers(self) -> List[str]:
+        return sorted({deployer for position in self.positions.values() for deployer in position.deployers})
+
+    def process_block(self, block_number: int, logs: List[Dict]) -> List[Dict]:
+        """
+        Check logs of one block, ordered by log index
+
+        Returns:
+            Alerts for positions that hit a threshold, at most one per position
+        """
+        remaining: Dict[str, Decimal] = {}
+        reserves: Dict[str, int] = {}
+        transferred: Dict[str, int] = {}
+        # Deployer transfers into the pair by (token, transaction), and (pair, transaction) of every Mint
+        to_pair: Dict[tuple, int] = {}
+        minted: Set[tuple] = set()
+
+        for log in logs:
+            address = log["address"].lower()
+            topic = Web3.to_hex(HexBytes(log["topics"][0]))
+
+            if topic == SYNC_TOPIC and address in self.positions:
+                reserves[address] = _words(log["data"])[0]
+            elif topic == MINT_TOPIC and address in self.positions:
+                minted.add((address, log.get("transactionHash")))
+            elif topic == BURN_TOPIC and address in reserves:
+                # The pair emits Sync with the reserves left right before Burn
+                amount = _words(log["data"])[0]
+                reserve_after = reserves[address]
+                if amount + reserve_after:
+                    removed = Decimal(amount) / Decimal(amount + reserve_after)
+                    remaining[address] = remaining.get(address, Decimal(1)) * (1 - removed)
+            elif topic == TRANSFER_TOPIC and address in self.by_token and len(log["topics"]) == 3:
+                position = self.by_token[address]
+                if _topic_address(log["topics"][1]) not in position.deployers:
+                    continue
+                amount = _words(log["data"])[0]
+                if _topic_address(log["topics"][2]) == position.pair:
+                    # Mint comes after the transfer, decided once the whole block is read
+                    key = (address, log.get("transactionHash"))
+                    to_pair[key] = to_pair.get(key, 0) + amount
+                else:
+                    transferred[address] = transferred.get(address, 0) + amount
+
+        for (token, transaction), amount in to_pair.items():
+            if (self.by_token[token].pair, transaction) not in minted:
+                transferred[token] = transferred.get(token, 0) + amount
+
+        alerts = []
+        for pair, left in remaining.items():
+            position = self.positions[pair]
+            percent = (1 - left) * 100
+            if percent >= self.liquidity_removal_percent and not position.triggered:
+                position.triggered = True
+                alerts.append({
+                    'trade_id': position.trade_id,
+                    'block_number': block_number,
+                    'reason': 'liquidity_removed',
+                    'percent': percent
+                })
+
+        for token, amount in transferred.items():
+            position = self.by_token[token]
+            if not position.total_supply:
+                continue
+            percent = Decimal(amount) / Decimal(position.total_supply) * 100
+            if percent >= self.deployer_transfer_percent and not position.triggered:
+                position.triggered = True
+                alerts.append({
+                    'trade_id': position.trade_id,
+                    'block_number': block_number,
+                    'reason': 'deployer_transfer',
+                    'percent': percent
+                })
+
+        return alerts
+
+    def process_logs(self, logs: List[Dict]) -> List[Dict]:
+        """Check logs of several blocks"""
+        logs = sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+        alerts = []
+        for block_number, block_logs in groupby(logs, key=lambda log: log["blockNumber"]):
+            alerts += self.process_block(block_number, list(block_logs))
+        return alerts
+
+
+class RugWatcher:
+    """
+    Follow pair and token logs of all open trades block by block
+
+    Every new block range costs two eth_getLogs calls regardless of the
+    number of positions: Burn and Sync of all pairs, and Transfers of all
+    tokens sent by their deployers or owners
+    """
+
+    poll_interval = 1.0
+    # Open trades are reloaded every this many polls
+    refresh_polls = 15
+    max_blocks_per_poll = 100
+
+    bsc_config: BSCConfig
+    w3: AsyncWeb3
+    detector: RugDetector
+
+    def __init__(self, on_alert: Callable[[Dict], Awaitable[None]]):
+        self.on_alert = on_alert
+        self._deployers: Dict[str, List[str]] = {}
+        self._total_supply: Dict[str, int] = {}
+
+    async def get_configs(self):
+        config = await AutoTradingConfig.get_config()
+        self.bsc_config = await BSCConfig.get_config()
+        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(self.bsc_config.rpc_nodes.split(" ")[0]))
+        self.detector = RugDetector(config.rug_liquidity_removal_percent, config.rug_deployer_transfer_percent)
+
+    async def deployers(self, token_address: str) -> List[str]:
+        """Contract creator from BscScan and current owner() of a token"""
+        if token_address in self._deployers:
+            return self._deployers[token_address]
+
+        addresses = []
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(
+                    self.bsc_config.main_api_url,
+                    params={
+                        "module": "contract",
+                        "action": "getcontractcreation",
+                        "contractaddresses": token_address,
+                        "apikey": settings.BSCSCAN_API_KEY
+                    }
+                )
+                data = response.json()
+            if data["status"] == "1":
+                addresses.append(data["result"][0]["contractCreator"])
+        except Exception as e:
+            logger.warning(f"Can't get creator of {token_address}: {e}")
+
+        token = self.w3.eth.contract(address=self.w3.to_checksum_address(token_address), abi=TOKEN_ABI)
+        try:
+            addresses.append(await token.functions.owner().call())
+        except Exception as e:
+            logger.debug(f"Token {token_address} has no owner(): {e}")
+
+        self._deployers[token_address] = addresses
+        return addresses
+
+    async def position(self, trade: Trade) -> Optional[WatchedPosition]:
+        if not trade.currency.pool_address:
+            return None
+        token_address = trade.currency.address
+        if token_address not in self._total_supply:
+            token = self.w3.eth.contract(address=self.w3.to_checksum_address(token_address), abi=TOKEN_ABI)
+            self._total_supply[token_address] = await token.functions.totalSupply().call()
+        return WatchedPosition(
+            trade.id,
+            token_address,
+            trade.currency.pool_address,
+            await self.deployers(token_address),
+            self._total_supply[token_address]
+        )
+
+    async def refresh_positions(self):
+        """
+        Start watching new open trades and stop watching closed ones
+
+        A triggered trade that is still open had its emergency sell fail or not
+        start yet, it is re-armed so the next alert sends execute_sell again,
+        which is idempotent for a sell already in flight
+        """
+        open_trades = {trade.id: trade async for trade in Trade.objects.bought()}
+        watched = {position.trade_id for position in self.detector.positions.values()}
+
+        for trade_id in watched - open_trades.keys():
+            self.detector.unwatch(trade_id)
+        for position in self.detector.positions.values():
+            if position.triggered and position.trade_id in open_trades:
+                logger.warning(f"Trade {position.trade_id} is still open after a rug alert, watching it again")
+                position.triggered = False
+
+        new_trades = [trade for trade_id, trade in open_trades.items() if trade_id not in watched]
+        positions = await asyncio.gather(*(self.position(trade) for trade in new_trades), return_exceptions=True)
+        for trade, position in zip(new_trades, positions):
+            if isinstance(position, Exception):
+                logger.error(f"Can't watch trade {trade.id}: {position}")
+            elif position:
+                self.detector.watch(position)
+
+    async def fetch_logs(self, from_block: int, to_block: int) -> List[Dict]:
+        requests = []
+        if self.detector.pairs:
+            requests.append(self.w3.eth.get_logs({
+                "address": self.detector.pairs,
+                "topics": [[BURN_TOPIC, SYNC_TOPIC, MINT_TOPIC]],
+                "fromBlock": from_block,
+                "toBlock": to_block
+            }))
+        if self.detector.tokens and self.detector.deployers:
+            requests.append(self.w3.eth.get_logs({
+                "address": self.detector.tokens,
+                "topics": [TRANSFER_TOPIC, [
+                    "0x" + "0" * 24 + address[2:] for address in self.detector.deployers
+                ]],
+                "fromBlock": from_block,
+                "toBlock": to_block
+            }))
+        results = await asyncio.gather(*requests)
+        return [log for logs in results for log in logs]
+
+    async def run(self):
+        await self.get_configs()
+        cursor = await self.w3.eth.block_number
+        polls = 0
+        while True:
+            try:
+                if polls % self.refresh_polls == 0:
+                    await self.refresh_positions()
+                polls += 1
+
+                latest = await self.w3.eth.block_number
+                if latest > cursor and self.detector.positions:
+                    to_block = min(latest, cursor + self.max_blocks_per_poll)
+                    alerts = self.detector.process_logs(await self.fetch_logs(cursor + 1, to_block))
+                    cursor = to_block
+                    for alert in alerts:
+                        logger.warning(f"Rug alert: {alert}")
+                        await self.on_alert(alert)
+                elif latest > cursor:
+                    cursor = latest
+            except Exception as e:
+                logger.error(f"Error watching open trades: {e}")
+
+            await asyncio.sleep(self.poll_interval)
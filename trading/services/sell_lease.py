@@ -0,0 +1,55 @@
+import logging
+from typing import Optional
+
+import redis.asyncio as redis
+from django.conf import settings
+from redis.asyncio.lock import Lock
+
+logger = logging.getLogger('trading')
+
+LEASE_KEY = "trading:sell_lease:{trade_id}"
+
+
+class SellLease:
+    """
+    Redis lease held by the worker selling a trade
+
+    Duplicate sell messages fail to acquire it and are dropped before any
+    database or chain access. The lease expires on its own if the worker
+    dies, the database status still keeps the trade from a second swap
+    """
+
+    ttl = 300
+
+    def __init__(self, trade_id: int):
+        self.trade_id = trade_id
+        self._client: Optional[redis.Redis] = None
+        self._lock: Optional[Lock] = None
+
+    async def acquire(self) -> bool:
+        try:
+            self._client = redis.from_url(settings.REDIS_URL)
+            self._lock = self._client.lock(LEASE_KEY.format(trade_id=self.trade_id), timeout=self.ttl)
+            acquired = await self._lock.acquire(blocking=False)
+        except Exception as e:
+            # The status transition still guards the trade
+            logger.warning(f"Can't acquire sell lease of trade {self.trade_id}: {e}")
+            self._lock = None
+            return True
+        if not acquired:
+            await self._close()
+        return acquired
+
+    async def release(self):
+        try:
+            if self._lock is not None and await self._lock.owned():
+                await self._lock.release()
+        except Exception as e:
+            logger.warning(f"Can't release sell lease of trade {self.trade_id}: {e}")
+        finally:
+            await self._close()
+
+    async def _close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,159 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from eth_abi import encode
+from web3 import AsyncWeb3
+
+logger = logging.getLogger('trading')
+
+# Value written to probed storage slots, large enough to never be a real balance
+PROBE_VALUE = 0x5AFE5AFE5AFE5AFE5AFE5AFE5AFE5AFE
+MAX_UINT256 = 2 ** 256 - 1
+
+
+class SwapSimulator:
+    """
+    Dry-run swap transactions with eth_call before they are broadcast
+
+    Token balance and allowance can be overridden in the call state, so a sell
+    can be simulated before approve is mined or before the tokens are bought.
+    Storage slots of the balance and allowance mappings are found by probing
+    once per token and kept for the process lifetime.
+    """
+
+    max_slot = 20
+
+    _balance_slots: Dict[str, Optional[int]] = {}
+    _allowance_slots: Dict[str, Optional[int]] = {}
+
+    def __init__(self, w3: AsyncWeb3, token_abi: List):
+        self.w3 = w3
+        self.token_abi = token_abi
+
+    @staticmethod
+    def _to_word(value: int) -> str:
+        return "0x" + format(value, "064x")
+
+    def _balance_key(self, holder: str, slot: int) -> str:
+        return self.w3.to_hex(self.w3.keccak(encode(["address", "uint256"], [holder, slot])))
+
+    def _allowance_key(self, owner: str, spender: str, slot: int) -> str:
+        inner = self.w3.keccak(encode(["address", "uint256"], [owner, slot]))
+        return self.w3.to_hex(self.w3.keccak(encode(["address", "bytes32"], [spender, inner])))
+
+    async def _find_slot(self, token: str, call, key_for_slot) -> Optional[int]:
+        for slot in range(self.max_slot):
+            override = {token: {"stateDiff": {key_for_slot(slot): self._to_word(PROBE_VALUE)}}}
+            try:
+                if await call.call(state_override=override) == PROBE_VALUE:
+                    return slot
+            except Exception as e:
+                logger.debug(f"Slot probe {slot} failed for {token}: {e}")
+                continue
+        return None
+
+    async def token_override(self, token: str, owner: str, spender: str, balance: Optional[int] = None) -> Dict:
+        """
+        Build a state override granting owner a balance and an unlimited allowance for spender
+
+        Mappings that can't be located are left untouched
+        """
+        token = self.w3.to_checksum_address(token)
+        owner = self.w3.to_checksum_address(owner)
+        spender = self.w3.to_checksum_address(spender)
+        contract = self.w3.eth.contract(address=token, abi=self.token_abi)
+        state_diff = {}
+
+        if balance is not None:
+            if token not in self._balance_slots:
+                self._balance_slots[token] = await self._find_slot(
+                    token,
+                    contract.functions.balanceOf(owner),
+                    lambda slot: self._balance_key(owner, slot)
+                )
+            slot = self._balance_slots[token]
+            if slot is not None:
+                state_diff[self._balance_key(owner, slot)] = self._to_word(balance)
+
+        if token not in self._allowance_slots:
+            self._allowance_slots[token] = await self._find_slot(
+                token,
+                contract.functions.allowance(owner, spender),
+                lambda slot: self._allowance_key(owner, spender, slot)
+            )
+        slot = self._allowance_slots[token]
+        if slot is not None:
+            state_diff[self._allowance_key(owner, spender, slot)] = self._to_word(MAX_UINT256)
+
+        return {token: {"stateDiff": state_diff}} if state_diff else {}
+
+    @staticmethod
+    def _parse_revert(error_msg: str) -> str:
+        revert_msg = re.search(r"'(.*?)'", error_msg)
+        if "revert" in error_msg.lower() and revert_msg:
+            return revert_msg.group(1)
+        return error_msg
+
+    @staticmethod
+    def classify(reason: str) -> str:
+        """Map a revert reason to the risk it most likely means"""
+        upper = reason.upper()
+        if "INSUFFICIENT_OUTPUT_AMOUNT" in upper:
+            return "slippage"
+        if "TRANSFER_FAILED" in upper or upper.endswith(": K") or "TRANSFER_FROM_FAILED" in upper:
+            return "transfer_tax"
+        if "EXPIRED" in upper:
+            return "expired"
+        return "revert"
+
+    async def simulate(self, tx: Dict[str, Any], state_override: Optional[Dict] = None) -> Dict:
+        """
+        Execute the transaction with eth_call against the latest block
+
+        Returns:
+            dict with success flag, router amounts on success or revert reason and risk on failure
+        """
+        call = {key: tx[key] for key in ("from", "to", "data", "value", "gas") if key in tx}
+        try:
+            result = await self.w3.eth.call(call, "latest", state_override or None)
+            amounts = list(self.w3.codec.decode(["uint256[]"], result)[0]) if result else []
+            return {"success": True, "amounts": amounts}
+        except Exception as e:
+            reason = self._parse_revert(str(e))
+            return {"success": False, "revert_reason": reason, "risk": self.classify(reason)}
+
+    async def check_sellable(
+            self,
+            router_contract: Any,
+            token: str,
+            path: List[str],
+            wallet_address: str,
+            amount: int,
+            deadline: int
+    ) -> Dict:
+        """
+        Simulate selling amount of token before it is held, a revert means honeypot or transfer tax
+
+        Returns:
+            simulate() result, or an inconclusive one when the balance or allowance
+            storage slot can't be found (computed balances, non-solc layouts), a sell
+            without them reverts for any token
+        """
+        data = router_contract.encode_abi(
+            "swapExactTokensForETH",
+            args=[amount, 0, path, wallet_address, deadline]
+        )
+        override = await self.token_override(token, wallet_address, router_contract.address, balance=amount)
+        checksum_token = self.w3.to_checksum_address(token)
+        if self._balance_slots.get(checksum_token) is None or self._allowance_slots.get(checksum_token) is None:
+            return {
+                "success": False,
+                "inconclusive": True,
+                "revert_reason": "balance or allowance storage slot not found",
+                "risk": "unknown"
+            }
+        return await self.simulate(
+            {"from": wallet_address, "to": router_contract.address, "data": data, "gas": 500000},
+            override
+        )
@@ -4,7 +4,6 @@ from asgiref.sync import sync_to_async
 from typing import Optional, Tuple
 
 from django.contrib.auth.models import User
-from django.core.exceptions import ObjectDoesNotExist
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (CallbackQueryHandler, CommandHandler, ContextTypes,
                           ConversationHandler, MessageHandler, filters)
@@ -50,12 +49,7 @@ class TelegramAuthService:
         Get telegram user by telegram_id
         """
         try:
-            user = await TelegramUser.objects.select_related("user").aget(
-                telegram_id=telegram_id
-            )
-            return user
-        except ObjectDoesNotExist:
-            return None
+            return await TelegramUser.objects.aby_telegram_id(telegram_id)
         except Exception as e:
             logger.error(f"Error getting telegram user {telegram_id}: {e.__traceback__}")
             return None
@@ -17,6 +17,7 @@ from telegram.ext import (
 
 from ..models.config import AutoTradingConfig
 from ..models.currency import Currency
+from ..models.exposure import Exposure
 from ..models.trade import Trade
 from .telegram_auth import TelegramAuthService
 from .notification import NotificationService
@@ -141,7 +142,7 @@ class TradingBot:
             return
 
         config = await AutoTradingConfig.get_config()
-        active_trades = await Trade.objects.filter(status='BOUGHT').acount()
+        active_trades = await Trade.objects.open().acount()
 
         status_text = (
             "🤖 Bot Status\n\n"
@@ -161,9 +162,7 @@ class TradingBot:
             await update.message.reply_text("Please register first with /register")
             return
 
-        trades = Trade.objects.filter(
-            status='BOUGHT'
-        ).select_related('currency')
+        trades = Trade.objects.bought()
 
         if not await trades.aexists():
             await update.message.reply_text("No active trades")
@@ -196,17 +195,27 @@ class TradingBot:
 
         try:
             currency_symbol = context.args[0]
-            currency = await Currency.objects.filter(symbol=currency_symbol).afirst()
+            currency = await Currency.objects.aby_symbol(currency_symbol)
             amount = Decimal(context.args[1])
 
             trader = BSCTradingService(currency.address)# currency.address)
             # Execute buy through auto trader
 
+            # Manual buys share the trading limits with the automatic ones
+            config = await AutoTradingConfig.get_config()
+            reservation = await Exposure.areserve(amount, config.max_active_trades, config.max_invested)
+            if reservation is None:
+                await update.message.reply_text(
+                    f"Trading limits reached: {config.max_active_trades} trades, {config.max_invested} USDT"
+                )
+                return
+
             try:
                 result = await trader.buy(amount=amount)
                 if result['status']:
                     # Create trade record
-                    trade = await Trade.objects.acreate(
+                    trade = await Trade.aopen_position(
+                        reservation,
                         currency=currency,
                         quantity=Decimal(result['expected_out']).quantize(Decimal("1.0000000000")),
                         entry_price=Decimal(result['init_price']).quantize(Decimal("1.0000000000")),
@@ -215,6 +224,7 @@ class TradingBot:
                         buy_timestamp=timezone.now(),
                         wallet=trader.bsc_config.wallet,
                     )
+                    reservation = None
 
                     # Update currency status
                     currency.status = 'BOUGHT'
@@ -227,6 +237,9 @@ class TradingBot:
             except Exception as e:
                 raise e
                 await update.message.reply_text(f"Buy failed: {e}")
+            finally:
+                if reservation is not None:
+                    await Exposure.arelease(reservation)
 
         except ValueError as e:
             raise e
@@ -252,7 +265,7 @@ class TradingBot:
 
         try:
             currency_symbol = context.args[0]
-            currency = await Currency.objects.filter(symbol=currency_symbol).afirst()
+            currency = await Currency.objects.aby_symbol(currency_symbol)
             if len(context.args) > 1:
                 amount = Decimal(context.args[1])
             else:
@@ -297,7 +310,7 @@ class TradingBot:
 
         try:
             currency_code = context.args[0]
-            currency = Currency.objects().filter(symbol=currency_code).afirst()
+            currency = await Currency.objects.aby_symbol(currency_code)
 
             trader = BSCTradingService(currency.address)
             balance = await trader.get_token_balance(currency.address)
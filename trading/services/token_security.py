@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import weakref
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+import httpx
+from django.utils import timezone
+
+from ..models.token_security import TokenSecurity
+
+logger = logging.getLogger('trading')
+
+GOPLUS_TOKEN_SECURITY_URL = "https://api.gopluslabs.io/api/v1/token_security/{chain_id}"
+
+# GoPlus fields describing what the contract code can do, they only change with the code
+STATIC_FIELDS = (
+    "is_open_source",
+    "is_proxy",
+    "is_mintable",
+    "can_take_back_ownership",
+    "owner_change_balance",
+    "hidden_owner",
+    "selfdestruct",
+    "external_call",
+    "trading_cooldown",
+    "personal_slippage_modifiable",
+    "slippage_modifiable",
+    "transfer_pausable",
+    "is_blacklisted",
+    "is_anti_whale",
+    "anti_whale_modifiable",
+    "is_whitelisted",
+    "cannot_sell_all",
+    "token_name",
+    "token_symbol",
+    "creator_address",
+)
+
+
+class SecurityLookupBatcher:
+    """
+    Coalesce concurrent security lookups into multi-address GoPlus requests
+
+    Lookups wait up to max_wait seconds for others to join, a batch is sent
+    right away once it holds max_batch tokens. Every caller gets back only
+    the results for its own addresses.
+    """
+
+    def __init__(self, fetch: Callable[[List[str], str], Awaitable[Dict[str, Dict]]],
+                 max_wait: float = 0.05, max_batch: int = 20):
+        self.fetch = fetch
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.lookups = 0
+        self.requests = 0
+        self._pending: Dict[str, Dict[str, asyncio.Future]] = {}
+        self._in_flight: Dict[str, Dict[str, asyncio.Future]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._running: set = set()
+
+    async def lookup(self, addresses: List[str], chain_id: str) -> Dict[str, Optional[Dict]]:
+        loop = asyncio.get_running_loop()
+        pending = self._pending.setdefault(chain_id, {})
+        in_flight = self._in_flight.get(chain_id, {})
+        futures = {}
+        for address in addresses:
+            if address in in_flight:
+                futures[address] = in_flight[address]
+                continue
+            if address not in pending:
+                pending[address] = loop.create_future()
+            futures[address] = pending[address]
+        self.lookups += len(addresses)
+
+        if len(pending) >= self.max_batch:
+            self._flush(chain_id)
+        elif chain_id not in self._timers:
+            self._timers[chain_id] = loop.call_later(self.max_wait, self._flush, chain_id)
+
+        results = await asyncio.gather(*futures.values())
+        return dict(zip(futures, results))
+
+    def _flush(self, chain_id: str):
+        timer = self._timers.pop(chain_id, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(chain_id, None)
+        if not batch:
+            return
+        self._in_flight.setdefault(chain_id, {}).update(batch)
+        # Keep a reference so the task isn't garbage collected
+        task = asyncio.ensure_future(self._run(batch, chain_id))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: Dict[str, asyncio.Future], chain_id: str):
+        self.requests += 1
+        logger.debug(f"GoPlus batch of {len(batch)} tokens, {self.requests} requests for {self.lookups} lookups")
+        try:
+            results = await self.fetch(list(batch), chain_id)
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            in_flight = self._in_flight.get(chain_id, {})
+            for address in batch:
+                in_flight.pop(address, None)
+
+        for address, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(address))
+
+
+class TokenSecurityService:
+    """
+    GoPlus token_security lookups backed by the TokenSecurity table
+
+    Code facts are kept for static_ttl, taxes, holders and the honeypot
+    simulation only for dynamic_ttl. When only the dynamic fields expired,
+    only they are replaced and the stored code facts are kept. Upgradeable
+    proxies can change code at any time, so all of their fields use
+    dynamic_ttl. Missing tokens are
+    requested from GoPlus in batches of batch_size addresses, concurrent
+    lookups of one event loop share a SecurityLookupBatcher.
+    """
+
+    static_ttl = timedelta(days=7)
+    dynamic_ttl = timedelta(minutes=5)
+    batch_size = 20
+    timeout = 30.0
+    batch_wait = 0.05
+
+    # One batcher per event loop, its futures can't be awaited from other loops
+    _batchers = weakref.WeakKeyDictionary()
+
+    def get_batcher(self) -> SecurityLookupBatcher:
+        loop = asyncio.get_running_loop()
+        batcher = self._batchers.get(loop)
+        if batcher is None:
+            batcher = SecurityLookupBatcher(self.fetch, max_wait=self.batch_wait, max_batch=self.batch_size)
+            self._batchers[loop] = batcher
+        return batcher
+
+    @staticmethod
+    def split(token_data: Dict) -> tuple[Dict, Dict]:
+        """Split a GoPlus result into static and dynamic fields"""
+        static_data = {key: value for key, value in token_data.items() if key in STATIC_FIELDS}
+        dynamic_data = {key: value for key, value in token_data.items() if key not in STATIC_FIELDS}
+        return static_data, dynamic_data
+
+    def is_static_fresh(self, entry: TokenSecurity) -> bool:
+        static_ttl = self.dynamic_ttl if entry.static_data.get("is_proxy") == "1" else self.static_ttl
+        return bool(entry.static_updated_at) and timezone.now() - entry.static_updated_at <= static_ttl
+
+    def is_fresh(self, entry: TokenSecurity, static_only: bool = False) -> bool:
+        if not self.is_static_fresh(entry):
+            return False
+        if static_only:
+            return True
+        return bool(entry.dynamic_updated_at) and timezone.now() - entry.dynamic_updated_at <= self.dynamic_ttl
+
+    async def fetch(self, addresses: List[str], chain_id: str) -> Dict[str, Dict]:
+        """
+        Request token_security for addresses from GoPlus
+
+        Returns:
+            Raw GoPlus results by lowercase address, tokens GoPlus doesn't know are absent
+        """
+        results = {}
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            for i in range(0, len(addresses), self.batch_size):
+                batch = addresses[i:i + self.batch_size]
+                response = await client.get(
+                    GOPLUS_TOKEN_SECURITY_URL.format(chain_id=chain_id),
+                    params={"contract_addresses": ",".join(batch)}
+                )
+                data = response.json()
+                if data.get("code") != 1:
+                    logger.warning(f"GoPlus token_security error for {len(batch)} tokens: {data.get('message')}")
+                    continue
+                results.update({address.lower(): token_data for address, token_data in (data.get("result") or {}).items()})
+        return results
+
+    async def get_cached(self, addresses: Iterable[str], chain_id: str, static_only: bool = False) -> Dict[str, Dict]:
+        """Fresh cached GoPlus results by lowercase address, never calls GoPlus"""
+        addresses = list(dict.fromkeys(address.lower() for address in addresses))
+        return {
+            entry.token_address: {**entry.static_data, **entry.dynamic_data}
+            async for entry in TokenSecurity.objects.filter(chain_id=chain_id, token_address__in=addresses)
+            if self.is_fresh(entry, static_only)
+        }
+
+    async def get_many(self, addresses: Iterable[str], chain_id: str, static_only: bool = False) -> Dict[str, Optional[Dict]]:
+        """
+        Get GoPlus token_security results, from cache when fresh
+
+        Args:
+            addresses: Token addresses
+            chain_id: GoPlus chain id
+            static_only: Accept cached entries whose dynamic fields are expired
+
+        Returns:
+            Raw GoPlus results by lowercase address, None for tokens GoPlus doesn't know
+        """
+        addresses = list(dict.fromkeys(address.lower() for address in addresses))
+        cached = {
+            entry.token_address: entry
+            async for entry in TokenSecurity.objects.filter(chain_id=chain_id, token_address__in=addresses)
+        }
+
+        results = {}
+        missing = []
+        for address in addresses:
+            entry = cached.get(address)
+            if entry and self.is_fresh(entry, static_only):
+                results[address] = {**entry.static_data, **entry.dynamic_data}
+            else:
+                missing.append(address)
+
+        if missing:
+            logger.debug(f"Token security cache: {len(results)} hits, {len(missing)} misses")
+            fetched = await self.get_batcher().lookup(missing, chain_id)
+            now = timezone.now()
+            entries, dynamic_entries = [], []
+            for address in missing:
+                token_data = fetched.get(address)
+                results[address] = token_data
+                if not token_data:
+                    continue
+                static_data, dynamic_data = self.split(token_data)
+                entry = cached.get(address)
+                if entry and self.is_static_fresh(entry):
+                    # Keep the stored code facts and their age, only the dynamic fields expired
+                    entry.dynamic_data, entry.dynamic_updated_at = dynamic_data, now
+                    dynamic_entries.append(entry)
+                    results[address] = {**entry.static_data, **dynamic_data}
+                    continue
+                entries.append(TokenSecurity(
+                    token_address=address,
+                    chain_id=chain_id,
+                    static_data=static_data,
+                    static_updated_at=now,
+                    dynamic_data=dynamic_data,
+                    dynamic_updated_at=now
+                ))
+            if entries:
+                await TokenSecurity.objects.abulk_create(
+                    entries,
+                    update_conflicts=True,
+                    unique_fields=["token_address", "chain_id"],
+                    update_fields=["static_data", "static_updated_at", "dynamic_data", "dynamic_updated_at"]
+                )
+            if dynamic_entries:
+                await TokenSecurity.objects.abulk_update(dynamic_entries, ["dynamic_data", "dynamic_updated_at"])
+
+        return results
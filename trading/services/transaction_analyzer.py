@@ -36,12 +36,14 @@ class TransactionAnalyzer:
         self.w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
         self.account = Account.from_key(self.bsc_config.wallet.private_key)
 
-    async def analyze_failed_transaction(self, tx_hash, tx_receipt: TxReceipt) -> Dict:
+    async def analyze_failed_transaction(self, tx_hash, tx_receipt: Optional[TxReceipt] = None) -> Dict:
         await self.get_configs()
         """
         Analyze a failed transaction and return detailed information
         """
         try:
+            if tx_receipt is None:
+                tx_receipt = await self.w3.eth.get_transaction_receipt(tx_hash)
             tx = await self.w3.eth.get_transaction(tx_hash)
             # Get transaction and receipt
             # Basic transaction info
@@ -0,0 +1,238 @@
+import asyncio
+import heapq
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from web3 import AsyncWeb3
+
+from ..models.currency import Currency
+from ..models.provider_configs import BSCConfig
+from ..models.transfer_index import TransferIndex
+
+logger = logging.getLogger('trading')
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ZERO_ADDRESS = bytes(20)
+RECORD_SIZE = 52  # 20 byte address + 32 byte signed balance
+
+# Listings whose transfers are followed by index_transfers while they are recent, held currencies always are
+LISTING_STATUSES = ('NEW', 'ANALYZING')
+
+
+class TokenLedger:
+    """
+    Balances of one token as parallel lists with an address -> slot mapping
+
+    Slots of addresses whose balance drops to zero are reused, so memory is
+    bounded by the number of current holders, capped at max_addresses.
+    Holder and transfer counts are maintained on every transfer.
+    """
+
+    def __init__(self, max_addresses: int):
+        self.max_addresses = max_addresses
+        self.slots: Dict[bytes, int] = {}
+        self.addresses: List[Optional[bytes]] = []
+        self.balances: List[int] = []
+        self.free: List[int] = []
+        self.holder_count = 0
+        self.transfer_count = 0
+        self.truncated = False
+
+    def _add(self, address: bytes, value: int):
+        slot = self.slots.get(address)
+        if slot is None:
+            if not value:
+                return
+            if len(self.slots) >= self.max_addresses:
+                self.truncated = True
+                return
+            if self.free:
+                slot = self.free.pop()
+                self.addresses[slot] = address
+                self.balances[slot] = 0
+            else:
+                slot = len(self.balances)
+                self.addresses.append(address)
+                self.balances.append(0)
+            self.slots[address] = slot
+
+        before = self.balances[slot]
+        after = before + value
+        self.balances[slot] = after
+        if address != ZERO_ADDRESS:
+            self.holder_count += (after > 0) - (before > 0)
+        if not after:
+            del self.slots[address]
+            self.addresses[slot] = None
+            self.free.append(slot)
+
+    def apply(self, sender: bytes, receiver: bytes, value: int):
+        self.transfer_count += 1
+        self._add(sender, -value)
+        self._add(receiver, value)
+
+    def top_holders(self, k: int = 10) -> List[Tuple[str, int]]:
+        """The k largest holders as (address, balance)"""
+        slots = heapq.nlargest(k, self.slots.values(), key=self.balances.__getitem__)
+        return [
+            ("0x" + self.addresses[slot].hex(), self.balances[slot])
+            for slot in slots
+            if self.balances[slot] > 0 and self.addresses[slot] != ZERO_ADDRESS
+        ]
+
+    def concentration(self, k: int = 10, exclude: Tuple[str, ...] = ()) -> Decimal:
+        """Percent of held supply owned by the k largest holders, pools and burn addresses can be excluded"""
+        excluded = {bytes.fromhex(address[2:].lower()) for address in exclude}
+        held = sum(
+            balance for address, balance in zip(self.addresses, self.balances)
+            if address is not None and address != ZERO_ADDRESS and address not in excluded and balance > 0
+        )
+        if not held:
+            return Decimal('0')
+        top = [
+            balance for address, balance in self.top_holders(k + len(excluded))
+            if bytes.fromhex(address[2:]) not in excluded
+        ][:k]
+        return Decimal(sum(top)) / Decimal(held) * 100
+
+    def dump(self) -> bytes:
+        return b"".join(
+            address + self.balances[slot].to_bytes(32, "big", signed=True)
+            for address, slot in self.slots.items()
+        )
+
+    @classmethod
+    def load(cls, index: TransferIndex, max_addresses: int) -> "TokenLedger":
+        ledger = cls(max_addresses)
+        data = bytes(index.balances or b"")
+        for offset in range(0, len(data), RECORD_SIZE):
+            address = data[offset:offset + 20]
+            ledger.slots[address] = len(ledger.balances)
+            ledger.addresses.append(address)
+            ledger.balances.append(int.from_bytes(data[offset + 20:offset + RECORD_SIZE], "big", signed=True))
+        ledger.holder_count = index.holder_count
+        ledger.transfer_count = index.transfer_count
+        ledger.truncated = index.truncated
+        return ledger
+
+
+class TransferIndexer:
+    """
+    Follow Transfer logs of currencies from their creation block
+
+    The cursor and balances are stored in TransferIndex, so every sync only
+    reads logs of blocks mined since the previous one
+    """
+
+    max_addresses = 100000
+    log_chunk_blocks = 5000
+    # Limits one sync so a long backlog is caught up over several runs
+    max_blocks_per_sync = 50000
+    # Used when the creation block can't be found, about a day of BSC blocks
+    lookback_blocks = 28800
+    # Listings that were neither bought nor rejected by then are no longer followed
+    listing_window = timedelta(hours=1)
+    max_concurrent_syncs = 5
+
+    bsc_config: BSCConfig
+    w3: AsyncWeb3
+
+    async def get_configs(self):
+        self.bsc_config = await BSCConfig.get_config()
+        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(self.bsc_config.rpc_nodes.split(" ")[0]))
+
+    async def _creation_block(self, token_address: str, latest: int) -> int:
+        """Block of the contract creation transaction, from BscScan"""
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(
+                    self.bsc_config.main_api_url,
+                    params={
+                        "module": "contract",
+                        "action": "getcontractcreation",
+                        "contractaddresses": token_address,
+                        "apikey": settings.BSCSCAN_API_KEY
+                    }
+                )
+                data = response.json()
+            if data["status"] == "1":
+                receipt = await self.w3.eth.get_transaction_receipt(data["result"][0]["txHash"])
+                return receipt["blockNumber"]
+            logger.warning(f"Can't get creation block of {token_address}: {data.get('message')}")
+        except Exception as e:
+            logger.warning(f"Can't get creation block of {token_address}: {e}")
+        return max(latest - self.lookback_blocks, 0)
+
+    async def sync(self, currency: Currency) -> TokenLedger:
+        """Index transfers of a currency up to the latest block and return its balances"""
+        if not hasattr(self, 'w3'):
+            await self.get_configs()
+        latest = await self.w3.eth.block_number
+
+        index = await TransferIndex.objects.filter(currency=currency).afirst()
+        if index is None:
+            from_block = await self._creation_block(currency.address, latest)
+            index, _ = await TransferIndex.objects.aget_or_create(
+                currency=currency,
+                defaults={'from_block': from_block, 'last_block': from_block - 1}
+            )
+
+        ledger = TokenLedger.load(index, self.max_addresses)
+        cursor = index.last_block
+        token = self.w3.to_checksum_address(currency.address)
+        end = min(latest, cursor + self.max_blocks_per_sync)
+
+        for chunk_start in range(cursor + 1, end + 1, self.log_chunk_blocks):
+            chunk_end = min(chunk_start + self.log_chunk_blocks - 1, end)
+            logs = await self.w3.eth.get_logs({
+                "address": token,
+                "topics": [TRANSFER_TOPIC],
+                "fromBlock": chunk_start,
+                "toBlock": chunk_end
+            })
+            for log in logs:
+                # ERC-20 Transfer has indexed from and to, other layouts are skipped
+                if len(log["topics"]) != 3:
+                    continue
+                ledger.apply(
+                    bytes(log["topics"][1])[-20:],
+                    bytes(log["topics"][2])[-20:],
+                    int.from_bytes(bytes(log["data"]), "big") if log["data"] else 0
+                )
+            cursor = chunk_end
+
+        if cursor != index.last_block:
+            # Only the sync that still sees the old cursor stores its result
+            await TransferIndex.objects.filter(pk=index.pk, last_block=index.last_block).aupdate(
+                last_block=cursor,
+                transfer_count=ledger.transfer_count,
+                holder_count=ledger.holder_count,
+                balances=ledger.dump(),
+                truncated=ledger.truncated
+            )
+        return ledger
+
+    async def sync_active(self) -> int:
+        """Index held currencies and listings created within listing_window, a few at a time"""
+        recent = Q(status__in=LISTING_STATUSES, created_at__gte=timezone.now() - self.listing_window)
+        currencies = [currency async for currency in Currency.objects.filter(recent | Q(status='BOUGHT'))]
+        semaphore = asyncio.Semaphore(self.max_concurrent_syncs)
+        # One client for all syncs of the run
+        await self.get_configs()
+
+        async def sync_one(currency: Currency) -> bool:
+            async with semaphore:
+                try:
+                    await self.sync(currency)
+                    return True
+                except Exception as e:
+                    logger.error(f"Error indexing transfers of {currency.symbol}: {e}")
+                    return False
+
+        return sum(await asyncio.gather(*(sync_one(currency) for currency in currencies)))
@@ -0,0 +1,61 @@
+import logging
+from typing import Optional
+
+from .notification import NotificationService
+from .pancakeswap import PancakeSwapMonitor
+from .price_service import PriceService
+
+logger = logging.getLogger('trading')
+
+
+class WorkerServices:
+    """
+    Services shared by all actors of a worker process
+
+    Built once when the worker boots instead of on every message, so ABIs,
+    web3 clients and the Telegram bot are reused. All async actors of a
+    worker run on the one AsyncIO middleware event loop, which is also the
+    loop their HTTP sessions belong to
+    """
+
+    def __init__(self):
+        self.monitor = PancakeSwapMonitor()
+        self.price_service = PriceService(self.monitor)
+        self.notification = NotificationService()
+
+    async def close(self):
+        """Close HTTP sessions of the services"""
+        for w3 in (self.monitor.w3, self.price_service.w3):
+            if w3 is None:
+                continue
+            try:
+                # web3 7 HTTP providers have no public close, their aiohttp sessions are in the session cache
+                session_cache = w3.provider._request_session_manager.session_cache
+                for _, session in session_cache.items():
+                    if not session.closed:
+                        await session.close()
+                session_cache.clear()
+            except Exception as e:
+                logger.warning(f"Error closing web3 provider: {e}")
+        try:
+            await self.notification.bot.shutdown()
+        except Exception as e:
+            logger.warning(f"Error closing Telegram bot: {e}")
+
+
+_services: Optional[WorkerServices] = None
+
+
+def worker_services() -> WorkerServices:
+    """Services of this process, built on first use outside of workers"""
+    global _services
+    if _services is None:
+        _services = WorkerServices()
+    return _services
+
+
+async def close_worker_services():
+    global _services
+    if _services is not None:
+        services, _services = _services, None
+        await services.close()
@@ -0,0 +1,22 @@
+import json
+import logging
+
+import dramatiq
+from django.core.serializers.json import DjangoJSONEncoder
+
+from ..services.transaction_analyzer import TransactionAnalyzer
+
+
+logger = logging.getLogger('trading')
+
+
+@dramatiq.actor(queue_name="maintenance", max_retries=3)
+async def analyze_transaction_failure(tx_hash: str):
+    """Post-mortem analysis of a mined transaction that reverted"""
+    try:
+        analyzer = TransactionAnalyzer()
+        analysis = await analyzer.analyze_failed_transaction(tx_hash)
+        logger.warning(f"Failed transaction {tx_hash} analysis: \n{json.dumps(analysis, indent=2, cls=DjangoJSONEncoder)}")
+
+    except Exception as e:
+        logger.error(f"Error analyzing transaction {tx_hash}: {e}")
@@ -1,20 +1,30 @@
+import asyncio
 import json
 import logging
 from datetime import timedelta
 from decimal import Decimal
 
 import dramatiq
-from django.core.serializers.json import DjangoJSONEncoder
-from django.db.models import Sum
 from django.utils import timezone
 
 from ..models.config import AutoTradingConfig
 from ..models.currency import Currency
-from ..models.trade import Trade
+from ..models.exposure import Exposure
+from ..models.price_tick import PriceTick
+from ..models.token_analysis import TokenAnalysis
+from ..models.trade import OPEN_STATUSES, Trade
+from ..services.batch_liquidator import BatchLiquidator
 from ..services.bsc_trade import BSCTradingService
+from ..services.data_cleaner import DataCleaner
+from ..services.deployer_index import DeployerIndex
+from ..services.listing_filters import ListingAdmission
+from ..services.exit_presigner import ExitPresigner
+from ..services.exit_rules import ExitRuleEvaluator
 from ..services.notification import NotificationService
-from ..services.pancakeswap import PancakeSwapMonitor
-from ..services.price_service import PriceService
+from ..services.price_history import PriceHistory
+from ..services.sell_lease import SellLease
+from ..services.transfer_indexer import TransferIndexer
+from ..services.worker_services import worker_services
 
 
 logger = logging.getLogger('trading')
@@ -28,13 +38,17 @@ async def monitor_new_listings(session=None):
         if not config.trading_enabled:
             return
 
-        monitor = PancakeSwapMonitor()
+        monitor = worker_services().monitor
 
         listings = await monitor.get_new_listings()
 
         listings_json_formatted = json.dumps(listings, indent=2)
         logger.info(f"Try to monitor new listings: {listings_json_formatted}")
 
+        # One batched GoPlus request, process_new_listing then reads the cached results
+        if listings:
+            await monitor.analyze_token_contracts([listing['token_address'] for listing in listings])
+
         for listing in listings:
             process_new_listing.send(listing)
 
@@ -51,67 +65,104 @@ async def monitor_active_trades():
         if not config.trading_enabled:
             return
 
-        price_service = PriceService()
+        price_service = worker_services().price_service
 
-        async for trade in Trade.objects.filter(status='BOUGHT').select_related('currency'):
+        trades = []
+        async for trade in Trade.objects.bought():
             current_price = await price_service.get_token_price(trade.currency.address)
-            if not current_price:
-                continue
-
-            # Update currency price and peak
-            currency = trade.currency
-            currency.current_price = current_price
-            if current_price > currency.price_peak:
-                currency.price_peak = current_price
-            await currency.asave()
+            if current_price:
+                trades.append((trade, current_price))
 
-            # Check sell conditions
-            drop_from_peak = ((currency.price_peak - current_price) / currency.price_peak) * 100
-            profit = ((current_price - trade.entry_price) / trade.entry_price) * 100
+        # Update prices and peaks of all currencies at once and keep them as ticks
+        prices = {trade.currency_id: current_price for trade, current_price in trades}
+        await Currency.objects.arecord_prices(prices)
+        await PriceTick.arecord(prices)
 
-            if drop_from_peak >= config.max_price_drop_percent:
-                execute_sell.send(trade.id, 'DROP_FROM_PEAK')
-            elif current_price < trade.entry_price:
-                execute_sell.send(trade.id, 'BELOW_ENTRY')
-            elif profit >= ((config.profit_target_multiplier - 1) * 100):
-                execute_sell.send(trade.id, 'PROFIT_TARGET')
+        for trade, current_price in trades:
+            trade.currency.apply_price(current_price)
+
+        # Check sell conditions
+        for trade, reason in await ExitRuleEvaluator(config).sell_intents(trades):
+            execute_sell.send(trade.id, reason)
 
     except Exception as e:
         logger.error(f"Error monitoring trades: {e}")
 
 
 @dramatiq.actor(queue_name="maintenance")
-async def cleanup_old_data():
-    """Cleanup old data"""
+async def reconcile_exposure():
+    """Correct the exposure ledger from open trades"""
     try:
-        cutoff_date = timezone.now() - timedelta(days=30)
-
-        # Clean old trades
-        await Trade.objects.filter(
-            status='SOLD',
-            sell_timestamp__lt=cutoff_date
-        ).adelete()
+        exposure = await Exposure.areconcile()
+        logger.debug(f"Exposure reconciled: {exposure}")
+    except Exception as e:
+        logger.error(f"Error reconciling exposure: {e}")
 
-        # Clean old currencies
-        await Currency.objects.filter(
-            status__in=['SOLD', 'REJECTED', 'ERROR'],
-            updated_at__lt=cutoff_date
-        ).adelete()
 
-        logger.info("Old data cleanup completed")
+@dramatiq.actor(queue_name="maintenance", time_limit=30 * 60 * 1000)
+async def cleanup_old_data():
+    """Cleanup old data in chunks within the configured time budget"""
+    try:
+        report = await DataCleaner().run()
+        logger.info(f"Old data cleanup completed: {report}")
 
     except Exception as e:
         logger.error(f"Error cleaning up old data: {e}")
 
 
+@dramatiq.actor(queue_name="maintenance")
+async def downsample_price_ticks():
+    """Fold old price ticks into one minute candles"""
+    try:
+        await PriceHistory().downsample()
+    except Exception as e:
+        logger.error(f"Error downsampling price ticks: {e}")
+
+
+async def _store_listing_result(currency: Currency, result: dict):
+    """Keep the code hash and analysis fetched by listing filters on the currency"""
+    analysis = result['analysis']
+    if result['bytecode']:
+        currency.code_hash = result['bytecode']['code_hash']
+    if analysis:
+        currency.analyze_data = analysis
+        await TokenAnalysis.astore(currency, analysis)
+        logger.info(f"Token {currency.symbol} analysis: {analysis}")
+    elif result['bytecode'] and not currency.analyze_data:
+        currency.analyze_data = result['bytecode']
+
+
+async def _reject_listing(currency: Currency, result: dict, notification: NotificationService):
+    currency.status, currency.error_message, currency.rejection_category = result['rejection']
+    await currency.asave()
+    # Market and limit rejections say nothing about the deployer
+    if currency.status == 'REJECTED' and currency.rejection_category == 'SECURITY':
+        await DeployerIndex.record(currency, 'rejected')
+    await notification.notify_listing_rejected(currency, result['analysis'])
+
+
+async def _accept_listing(currency: Currency, result: dict, notification: NotificationService, config: AutoTradingConfig):
+    # Notify users
+    await notification.notify_potential_trade_found(currency, result['analysis'])
+
+    # Auto-buy if enabled
+    if config.trading_enabled and await _can_execute_trade():
+        execute_buy.send(currency.id)
+
+
 @dramatiq.actor(queue_name="trading", max_retries=3)
 async def process_new_listing(listing_data: dict):
-    """Process new token listing"""
+    """
+    Admit a new token listing
+
+    Only local checks run here, listings they can't clear are handed to
+    deep_analyze_listing and bought listings are analyzed there afterwards
+    """
     try:
         listing_data_json = json.dumps(listing_data, indent=2)
         logger.info(f"Trying to process listing: {listing_data_json}")
-        monitor = PancakeSwapMonitor()
-        notification = NotificationService()
+        monitor = worker_services().monitor
+        notification = worker_services().notification
         config = await AutoTradingConfig.get_config()
         initial_price = Decimal(listing_data['initial_price'])
         currency, created = await Currency.objects.aget_or_create(
@@ -129,56 +180,24 @@ async def process_new_listing(listing_data: dict):
         if not created:
             return
 
-        # Security analysis
-        analysis = await monitor.analyze_token_contract(currency.address)
-        currency.analyze_data = json.dumps(analysis, indent=2, cls=DjangoJSONEncoder)
-        await currency.asave(update_fields=["analyze_data"])
+        deployers = [listing_data.get('deployer')]
+        admission = ListingAdmission(monitor, config)
+        result = await admission.admit(currency, deployers)
+        await _store_listing_result(currency, result)
 
-        logger.info(f"Token {currency.symbol} analysis: {analysis}")
-        transactions_count = None
-        try:
-            transactions_count = await monitor.get_token_transfers_count(currency.address)
-            analysis.update({"transactions_count": transactions_count})
-        except Exception as e:
-            raise e
-            logger.warning(f" Can't get token txs count{e}")
-
-        if transactions_count:
-            analysis.update({"total_transfers": transactions_count})
-            if not config.max_transactions_count > transactions_count > config.min_transactions_count:
-                currency.status = 'REJECTED'
-                currency.error_message = f'Transactions count is {transactions_count}'
-                await currency.asave()
-                await notification.notify_listing_rejected(currency, analysis)
-                return
-        else:
-            currency.status = 'MANUAL'
-            currency.error_message = f'Transactions count is {transactions_count}'
-            await currency.asave()
-            await notification.notify_listing_rejected(currency, analysis)
+        if result['decision'] == ListingAdmission.REJECT:
+            await _reject_listing(currency, result, notification)
             return
 
-        if not monitor._is_token_safe(analysis):
-            currency.status = 'REJECTED'
-            currency.error_message = 'Failed security checks'
-            await currency.asave()
-            await notification.notify_listing_rejected(currency, analysis)
-            return
-
-        # Liquidity check
-        if analysis['liquidity'] < config.min_liquidity_usd:
-            currency.status = 'REJECTED'
-            currency.error_message = 'Insufficient liquidity'
-            await currency.asave()
-            await notification.notify_listing_rejected(currency, analysis)
+        if result['decision'] == ListingAdmission.DEFER:
+            currency.status = 'ANALYZING'
+            await currency.asave(update_fields=["status", "code_hash", "analyze_data"])
+            deep_analyze_listing.send(currency.id, deployers, True)
             return
 
-        # Notify users
-        await notification.notify_potential_trade_found(currency, analysis)
-
-        # Auto-buy if enabled
-        if config.trading_enabled and await _can_execute_trade():
-            execute_buy.send(currency.id)
+        await currency.asave(update_fields=["code_hash", "analyze_data"])
+        await _accept_listing(currency, result, notification, config)
+        deep_analyze_listing.send(currency.id, deployers, False)
 
     except Exception as e:
         raise e
@@ -189,36 +208,160 @@ async def process_new_listing(listing_data: dict):
             await currency.asave()
 
 
+@dramatiq.actor(queue_name="deep_analysis", max_retries=3, on_retry_exhausted="fail_deep_analysis")
+async def deep_analyze_listing(currency_id: int, deployers: list = None, decide: bool = True):
+    """
+    Run the remote listing filters and store the full analysis
+
+    Args:
+        currency_id: Currency admitted by process_new_listing
+        deployers: addresses that created the token or its pair
+        decide: the listing waits for this analysis to be rejected or bought,
+            otherwise the analysis only enriches a listing decided at admission.
+            Errors are then retried and fail_deep_analysis marks the listing
+            as ERROR once retries are exhausted
+    """
+    notification = worker_services().notification
+    try:
+        config = await AutoTradingConfig.get_config()
+        currency = await Currency.objects.aget(id=currency_id)
+        if decide and currency.status != 'ANALYZING':
+            return
+
+        result = await ListingAdmission(worker_services().monitor, config).analyze(currency, deployers or [])
+        await _store_listing_result(currency, result)
+
+        if not decide:
+            await currency.asave(update_fields=["code_hash", "analyze_data"])
+            if result['rejection']:
+                await _reject_admitted_listing(currency, result, notification)
+            return
+
+        if result['rejection']:
+            await _reject_listing(currency, result, notification)
+            return
+
+        currency.status = 'NEW'
+        await currency.asave(update_fields=["status", "code_hash", "analyze_data"])
+        await _accept_listing(currency, result, notification, config)
+
+    except Exception as e:
+        logger.error(f"Error analyzing listing {currency_id}: {e}")
+        if not decide:
+            await notification.notify_error("Listing Analysis Error", str(e))
+            return
+        await Currency.objects.filter(id=currency_id, status='ANALYZING').aupdate(error_message=str(e))
+        raise
+
+
+async def _reject_admitted_listing(currency: Currency, result: dict, notification: NotificationService):
+    """Drop a pending buy of a listing the deep analysis rejected after admission, or sell it"""
+    status, message, category = result['rejection']
+    logger.warning(f"Deep analysis of admitted {currency.symbol} failed: {message}")
+    # execute_buy skips currencies that are no longer buyable
+    rejected = await Currency.objects.filter(id=currency.id, status='NEW').aupdate(
+        status=status, error_message=message, rejection_category=category
+    )
+    if rejected:
+        currency.status, currency.error_message, currency.rejection_category = status, message, category
+        if status == 'REJECTED' and category == 'SECURITY':
+            await DeployerIndex.record(currency, 'rejected')
+        await notification.notify_listing_rejected(currency, result['analysis'])
+        return
+
+    await Currency.objects.filter(id=currency.id).aupdate(error_message=message, rejection_category=category)
+    if status == 'REJECTED':
+        sell_rejected_listing.send(currency.id)
+
+
+@dramatiq.actor(queue_name="trading", max_retries=0)
+async def sell_rejected_listing(currency_id: int, attempts: int = 10):
+    """Sell open trades of a listing rejected after its buy, waiting for a buy still in progress"""
+    try:
+        currency = await Currency.objects.aget(id=currency_id)
+        trade_ids = [trade.id async for trade in Trade.objects.bought().filter(currency=currency)]
+        if not trade_ids and currency.status == 'BUYING' and attempts > 0:
+            sell_rejected_listing.send_with_options(args=(currency_id, attempts - 1), delay=30 * 1000)
+            return
+        for trade_id in trade_ids:
+            execute_sell.send(trade_id, 'ANALYSIS_REJECTED')
+        if trade_ids:
+            await worker_services().notification.notify_error(
+                f"Selling {currency.symbol}",
+                f"Deep analysis rejected it after the buy: {currency.error_message}"
+            )
+    except Exception as e:
+        logger.error(f"Error selling rejected listing {currency_id}: {e}")
+
+
+@dramatiq.actor(queue_name="deep_analysis", max_retries=0)
+async def fail_deep_analysis(message_data: dict, retry_info: dict):
+    """Mark a listing waiting for deep_analyze_listing as ERROR after its last retry"""
+    currency_id = message_data['args'][0]
+    updated = await Currency.objects.filter(id=currency_id, status='ANALYZING').aupdate(status='ERROR')
+    if updated:
+        currency = await Currency.objects.aget(id=currency_id)
+        logger.error(f"Deep analysis of {currency.symbol} failed after {retry_info['retries']} retries: {currency.error_message}")
+        await worker_services().notification.notify_error(
+            f"Listing Analysis Error for {currency.symbol}",
+            currency.error_message
+        )
+
+
 @dramatiq.actor(queue_name="trading", max_retries=3)
 async def execute_buy(currency_id: int, amount: Decimal = None):
     """
     Execute buy order for currency
     """
-    notification = NotificationService()
+    currency = await Currency.objects.buyable().filter(id=currency_id).afirst()
+    if currency is None:
+        logger.warning(f"Not buying currency {currency_id}: not found or no longer buyable")
+        return
+    await _buy(currency, amount)
+
+
+@dramatiq.actor(queue_name="trading", max_retries=0)
+async def buy_currencies(currency_ids: list, amount: str = None):
+    """
+    Buy several currencies in one job, the buys run concurrently
+
+    Not retried, a retry would buy again the currencies that went through
+    """
+    amount = Decimal(amount) if amount is not None else None
+    currencies = [currency async for currency in Currency.objects.buyable().filter(id__in=currency_ids)]
+    await asyncio.gather(*(_buy(currency, amount) for currency in currencies))
+
+
+async def _buy(currency: Currency, amount: Decimal = None):
+    """Buy currency within the trading limits and open its trade"""
+    notification = worker_services().notification
+    reservation = None
     try:
         # Get services and config
         config = await AutoTradingConfig.get_config()
-        currency = await Currency.objects.aget(id=currency_id)
         bsc_service = BSCTradingService(currency.address)
 
-        # Check if we can trade
-        if not _can_execute_trade():
+        # Use configured amount if not specified
+        if amount is None:
+            amount = Decimal(config.trade_amount)
+
+        # Reserve a slot, concurrent buys can't exceed the limits together
+        reservation = await Exposure.areserve(amount, config.max_active_trades, config.max_invested)
+        if reservation is None:
             logger.warning(f"Cannot execute trade for {currency.symbol} - trading limits reached")
             currency.status = 'REJECTED'
             currency.error_message = 'Trading limits reached'
+            currency.rejection_category = 'LIMITS'
             await currency.asave()
             return
 
-        # Use configured amount if not specified
-        if amount is None:
-            amount = Decimal(config.trade_amount)
-
         # Check USDT balance
         balance = await bsc_service.get_balance_info()
         if balance.get("wallet_balance", 0) < amount:
             logger.warning(f"Insufficient USDT balance for trade: {balance} < {amount}")
             currency.status = 'REJECTED'
             currency.error_message = 'Insufficient balance'
+            currency.rejection_category = 'LIMITS'
             await currency.asave()
             await notification.notify_error(
                 "Insufficient Balance",
@@ -226,16 +369,19 @@ async def execute_buy(currency_id: int, amount: Decimal = None):
             )
             return
 
-        # Update status
+        # Claim the currency, a deep analysis may have rejected it meanwhile
+        if not await Currency.objects.buyable().filter(id=currency.id).aupdate(status='BUYING'):
+            logger.warning(f"Not buying {currency.symbol}: no longer buyable")
+            return
         currency.status = 'BUYING'
-        await currency.asave()
 
         # Execute buy order
         order = await bsc_service.buy(amount)
 
         if order['status']:
             # Create trade record
-            trade = await Trade.objects.acreate(
+            trade = await Trade.aopen_position(
+                reservation,
                 currency=currency,
                 quantity=Decimal(order['expected_out']),
                 entry_price=Decimal(order['init_price']),
@@ -244,6 +390,7 @@ async def execute_buy(currency_id: int, amount: Decimal = None):
                 buy_timestamp=timezone.now(),
                 wallet=bsc_service.bsc_config.wallet,
             )
+            reservation = None
 
             # Update currency status
             currency.status = 'BOUGHT'
@@ -266,106 +413,198 @@ async def execute_buy(currency_id: int, amount: Decimal = None):
     except Exception as e:
         logger.error(f"Error executing buy: {e}")
         await notification.notify_error("Buy Error", str(e))
+    finally:
+        if reservation is not None:
+            await Exposure.arelease(reservation)
 
 
 @dramatiq.actor(queue_name="trading", max_retries=3)
 async def execute_sell(trade_id: int, reason: str):
     """
     Execute sell order for trade
+
+    Only one sell of a trade is in flight: duplicate messages are dropped on
+    the Redis lease, and the trade moves BOUGHT -> SELLING -> SOLD under a row
+    lock, so a message for a trade that is no longer open never reaches the chain.
+    A swap that was broadcast is kept in pending_sell and the trade stays SELLING
+    until settle_pending_sells reads its receipt
     """
+    lease = SellLease(trade_id)
+    if not await lease.acquire():
+        logger.info(f"Sell of trade {trade_id} already in flight, dropping {reason}")
+        return
+
     notification = None
+    trade = None
+    pending = {}
     try:
-        trade = await Trade.objects.select_related("currency").aget(id=trade_id)
-        bsc_service = BSCTradingService(trade.wallet.currency_to_spend_address)
-
-        # Update status
-        trade.currency.status = 'SELLING'
-        await trade.currency.asave()
-
-        notification = NotificationService()
+        trade = await Trade.abegin_sell(trade_id)
+        if trade is None:
+            logger.info(f"Trade {trade_id} is not open, dropping {reason}")
+            return
 
-        # Execute sell order
-        order = await bsc_service.sell(trade.buy_amount)
+        bsc_service = BSCTradingService(trade.currency.address)
+        notification = worker_services().notification
 
-        trade.status = 'SOLD'
-        trade.exit_price = Decimal(order['order']['price'])
-        trade.sell_amount = Decimal(order['order']['cummulativeQuoteQty'])
-        trade.sell_order_id = order['order']['orderId']
-        trade.sell_timestamp = timezone.now()
-        trade.sell_reason = reason
+        async def record_pending(order: dict):
+            # Recorded before waiting, the swap can be mined even if this process dies
+            pending.clear()
+            pending.update(order, reason=reason)
+            await Trade.amark_pending_sell(trade_id, dict(pending))
 
-        # Calculate profit/loss
-        trade.profit_loss = trade.sell_amount - trade.buy_amount
-        trade.profit_loss_percentage = (trade.profit_loss / trade.buy_amount) * 100
-        await trade.asave()
+        # Broadcast the pre-signed exit first, it needs no quoting or signing
+        order = await ExitPresigner().broadcast(trade, bsc_service, on_broadcast=record_pending)
 
-        # Update currency status
-        trade.currency.status = 'SOLD'
-        await trade.currency.asave()
+        # Execute sell order
+        if not order:
+            pending.clear()
+            order = await bsc_service.sell(trade.quantity, on_broadcast=record_pending)
+        if not order['status']:
+            pending.clear()
+            raise Exception(f"Sell transaction {order['transaction_hash']} reverted")
+
+        if not await trade.acomplete_sell(order, reason):
+            logger.error(f"Trade {trade_id} left SELLING while it was sold in {order['transaction_hash']}")
+            return
+        await DeployerIndex.record_sell(trade)
 
         # Notify about successful trade
         await notification.notify_trade_execution(trade, is_buy=False)
-        # else:
-        #     trade.currency.status = 'ERROR'
-        #     trade.currency.error_message = order['error']
-        #     await trade.currency.asave()
-        #     await notification.notify_error(
-        #         f"Sell failed for {trade.currency.symbol}",
-        #         order['error']
-        #     )
 
     except Exception as e:
+        if pending:
+            # Reopening the trade could sell it twice, settle_pending_sells finishes it
+            logger.error(f"Sell of trade {trade_id} sent in {pending['transaction_hash']} but not confirmed: {e}")
+            if notification:
+                await notification.notify_error("Sell Pending", f"{pending['transaction_hash']}: {e}")
+            return
         logger.error(f"Error executing sell: {e}")
+        if trade is not None:
+            await Trade.aabort_sell(trade_id)
+        await ExitRuleEvaluator.release(trade_id)
         if notification:
             await notification.notify_error("Sell Error", str(e))
+    finally:
+        await lease.release()
+
+
+@dramatiq.actor(queue_name="monitoring")
+async def refresh_presigned_exits():
+    """Keep a ready-to-broadcast sell transaction for every open trade"""
+    try:
+        config = await AutoTradingConfig.get_config()
+        if not config.presign_exits:
+            return
+
+        presigner = ExitPresigner()
+        async for trade in Trade.objects.bought():
+            try:
+                await presigner.refresh(trade, config)
+            except Exception as e:
+                logger.error(f"Error pre-signing sell for trade {trade.id}: {e}")
+
+    except Exception as e:
+        logger.error(f"Error refreshing pre-signed exits: {e}")
+
+
+@dramatiq.actor(queue_name="monitoring")
+async def index_transfers():
+    """Follow Transfer logs of currencies being analyzed or held"""
+    try:
+        synced = await TransferIndexer().sync_active()
+        logger.debug(f"Transfer index updated for {synced} currencies")
+    except Exception as e:
+        logger.error(f"Error indexing transfers: {e}")
+
+
+@dramatiq.actor(queue_name="trading", max_retries=0)
+async def liquidate_trades(trade_ids: list = None, reason: str = 'MANUAL'):
+    """
+    Sell all open trades, or only trade_ids, in one batch
+    """
+    notification = worker_services().notification
+    try:
+        summary = await BatchLiquidator().liquidate(trade_ids, reason)
+
+        for trade in summary['sold']:
+            await notification.notify_trade_execution(trade, is_buy=False)
+
+        if summary['failed']:
+            await notification.notify_error(
+                "Batch Sell Error",
+                f"Failed to sell trades: {', '.join(map(str, summary['failed']))}"
+            )
+
+    except Exception as e:
+        logger.error(f"Error liquidating trades: {e}")
+        await notification.notify_error("Batch Sell Error", str(e))
+
+
+@dramatiq.actor(queue_name="trading", max_retries=0)
+async def settle_pending_sells():
+    """Complete or reopen trades whose batch sell was broadcast but not confirmed"""
+    notification = worker_services().notification
+    try:
+        summary = await BatchLiquidator().settle_pending()
+
+        for trade in summary['sold']:
+            await notification.notify_trade_execution(trade, is_buy=False)
+
+        if summary['failed']:
+            await notification.notify_error(
+                "Batch Sell Error",
+                f"Sells not mined, trades open again: {', '.join(map(str, summary['failed']))}"
+            )
+
+    except Exception as e:
+        logger.error(f"Error settling pending sells: {e}")
 
 
 @dramatiq.actor(queue_name="trading", max_retries=0)
 async def monitor_price(trade_id: int):
     """
     Monitor price for trade and execute sell if conditions are met
+
+    Checks again until the trade is closed, so a trade whose exit was already
+    claimed or whose sell failed back to BOUGHT is still watched
     """
+    interval = AutoTradingConfig._meta.get_field('price_check_interval').default
     try:
-        trade = await Trade.objects.select_related('currency').aget(id=trade_id)
-        if trade.status != 'BOUGHT':
+        trade = await Trade.objects.select_related('currency').filter(id=trade_id).afirst()
+        if trade is None or trade.status not in OPEN_STATUSES:
+            interval = None
             return
-            
+
         config = await AutoTradingConfig.get_config()
-        price_service = PriceService()
+        interval = config.price_check_interval
+        # A sell is in flight, check again once it is settled or aborted
+        if trade.status != 'BOUGHT':
+            return
+
+        price_service = worker_services().price_service
         
         # Get current price
         current_price = await price_service.get_token_price(trade.currency.address)
         if not current_price:
             return
             
-        # Update currency price
-        currency = trade.currency
-        currency.current_price = current_price
-        
-        # Update peak price if needed
-        if current_price > currency.price_peak:
-            currency.price_peak = current_price
-        await currency.asave()
+        # Update currency price and peak
+        await trade.currency.arecord_price(current_price)
+        await PriceTick.arecord({trade.currency_id: current_price})
         
         # Check sell conditions
-        drop_from_peak = ((currency.price_peak - current_price) / currency.price_peak) * 100
-        profit = ((current_price - trade.entry_price) / trade.entry_price) * 100
-        
-        if drop_from_peak >= config.max_price_drop_percent:
-            execute_sell.send(trade.id, 'DROP_FROM_PEAK')
-        elif current_price < trade.entry_price:
-            execute_sell.send(trade.id, 'BELOW_ENTRY')
-        elif profit >= ((config.profit_target_multiplier - 1) * 100):
-            execute_sell.send(trade.id, 'PROFIT_TARGET')
-        else:
-            # Schedule next check
-            monitor_price.send_with_options(
-                args=(trade.id, ),
-                delay=timedelta(seconds=config.price_check_interval)
-            )
-            
+        for trade, reason in await ExitRuleEvaluator(config).sell_intents([(trade, current_price)]):
+            execute_sell.send(trade.id, reason)
+
     except Exception as e:
         logger.error(f"Error monitoring price: {e}")
+    finally:
+        # Schedule next check
+        if interval is not None:
+            monitor_price.send_with_options(
+                args=(trade_id, ),
+                delay=timedelta(seconds=interval)
+            )
 
 async def _can_execute_trade() -> bool:
     """
@@ -373,21 +612,9 @@ async def _can_execute_trade() -> bool:
     """
     try:
         config = await AutoTradingConfig.get_config()
-        
-        # Check number of active trades
-        active_trades = await Trade.objects.filter(status='BOUGHT').acount()
-        if active_trades >= config.max_active_trades:
-            return False
-            
-        # Check total invested amount
-        total_invested = await Trade.objects.filter(status='BOUGHT').aaggregate(total=Sum('buy_amount'))
-        total_invested = total_invested.get("total") or 0
-        
-        if total_invested >= (config.trade_amount * config.max_active_trades):
-            return False
-            
-        return True
-        
+        exposure = await Exposure.get()
+        return exposure.has_room(config.trade_amount, config.max_active_trades, config.max_invested)
+
     except Exception as e:
         logger.error(f"Error checking trade limits: {e}")
         return False
@@ -0,0 +1,114 @@
+import asyncio
+import time
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from hexbytes import HexBytes
+from web3 import Web3
+
+from trading.services.broadcaster import EndpointStats, TransactionBroadcaster
+
+RAW_TRANSACTION = "0x" + "ab" * 64
+
+
+async def stub_rpc(delay: float = 0.0, result: str = None, error: str = None) -> TestServer:
+    """
+    Local JSON-RPC endpoint answering eth_sendRawTransaction after delay
+
+    Returns result as the transaction hash, or error as a JSON-RPC error when set
+    """
+    async def handler(request):
+        payload = await request.json()
+        await asyncio.sleep(delay)
+        if error is not None:
+            return web.json_response({"jsonrpc": "2.0", "id": payload["id"], "error": {"code": -32000, "message": error}})
+        return web.json_response({"jsonrpc": "2.0", "id": payload["id"], "result": result})
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def tx_hash(i: int) -> str:
+    return "0x" + f"{i:064x}"
+
+
+class TransactionBroadcasterTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.saved_stats = TransactionBroadcaster.stats
+        TransactionBroadcaster.stats = {}
+        self.servers = []
+
+    async def asyncTearDown(self):
+        # Losing endpoints keep running after broadcast returns
+        await asyncio.gather(*TransactionBroadcaster._background, return_exceptions=True)
+        for server in self.servers:
+            await server.close()
+        TransactionBroadcaster.stats = self.saved_stats
+
+    async def endpoint(self, **kwargs) -> str:
+        server = await stub_rpc(**kwargs)
+        self.servers.append(server)
+        return str(server.make_url("/"))
+
+    async def test_first_accepted_wins(self):
+        slow = await self.endpoint(delay=1.0, result=tx_hash(2))
+        fast = await self.endpoint(delay=0.05, result=tx_hash(1))
+
+        started = time.perf_counter()
+        result = await TransactionBroadcaster([slow, fast]).broadcast(RAW_TRANSACTION)
+
+        self.assertEqual(result, HexBytes(tx_hash(1)))
+        self.assertLess(time.perf_counter() - started, 0.9)
+
+    async def test_rejection_and_timeout_are_skipped(self):
+        rejecting = await self.endpoint(error="nonce too low")
+        hanging = await self.endpoint(delay=5.0, result=tx_hash(3))
+        accepting = await self.endpoint(delay=0.1, result=tx_hash(1))
+
+        result = await TransactionBroadcaster([rejecting, hanging, accepting], timeout=0.5).broadcast(RAW_TRANSACTION)
+        await asyncio.gather(*TransactionBroadcaster._background)
+
+        self.assertEqual(result, HexBytes(tx_hash(1)))
+        stats = TransactionBroadcaster.get_stats()
+        self.assertEqual((stats[rejecting]['accepted'], stats[rejecting]['rejected']), (0, 1))
+        self.assertEqual((stats[hanging]['accepted'], stats[hanging]['rejected']), (0, 1))
+        self.assertEqual((stats[accepting]['accepted'], stats[accepting]['rejected']), (1, 0))
+
+    async def test_already_known_counts_as_accepted(self):
+        known = await self.endpoint(error="already known")
+
+        result = await TransactionBroadcaster([known]).broadcast(RAW_TRANSACTION)
+
+        self.assertEqual(result, HexBytes(Web3.keccak(hexstr=RAW_TRANSACTION)))
+
+    async def test_all_rejected_raises(self):
+        rejecting = await self.endpoint(error="insufficient funds")
+        hanging = await self.endpoint(delay=5.0, result=tx_hash(1))
+
+        with self.assertRaisesRegex(Exception, "rejected by all endpoints.*insufficient funds"):
+            await TransactionBroadcaster([rejecting, hanging], timeout=0.3).broadcast(RAW_TRANSACTION)
+
+    async def test_endpoints_ranked_by_latency(self):
+        slow = await self.endpoint(delay=0.3, result=tx_hash(2))
+        fast = await self.endpoint(delay=0.01, result=tx_hash(1))
+        unknown = "http://127.0.0.1:9/"
+
+        await TransactionBroadcaster([slow, fast]).broadcast(RAW_TRANSACTION)
+        await asyncio.gather(*TransactionBroadcaster._background)
+
+        self.assertEqual(TransactionBroadcaster.ranked_endpoints([unknown, slow, fast]), [fast, slow, unknown])
+
+
+class EndpointStatsTest(unittest.TestCase):
+    def test_latency_is_smoothed(self):
+        stats = EndpointStats()
+        stats.record(1.0, True)
+        stats.record(2.0, True)
+        stats.record(10.0, False)
+
+        self.assertAlmostEqual(stats.latency, 0.2 * 2.0 + 0.8 * 1.0)
+        self.assertEqual((stats.accepted, stats.rejected), (2, 1))
@@ -0,0 +1,18 @@
+import unittest
+from decimal import Decimal
+
+from trading.models.token_analysis import analysis_fields
+
+
+class AnalysisFieldsTest(unittest.TestCase):
+    def test_taxes_are_stored_as_percent(self):
+        fields = analysis_fields({'buy_tax': '0.05', 'sell_tax': '0.1'})
+
+        self.assertEqual(fields['buy_tax'], Decimal('5'))
+        self.assertEqual(fields['sell_tax'], Decimal('10'))
+
+    def test_missing_tax_stays_unknown(self):
+        fields = analysis_fields({'sell_tax': ''})
+
+        self.assertIsNone(fields['buy_tax'])
+        self.assertIsNone(fields['sell_tax'])